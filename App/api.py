@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+app/api.py - RigVeda Visualizer headless query API (ASGI)
+
+Usage (from project root):
+    python App/api.py [--dataset data/processed/rigveda_with_translations.jsonl] \
+        [--backend store|sqlite] [--workers 4] [--port 8000] [--cache-size 4096]
+
+  or under any ASGI server:  uvicorn --app-dir App api:app
+
+Endpoints (JSON):
+  GET /verses/{id}                 one verse, id as RV-01-001-01 or 1.1.1
+  GET /hymns/{mandala}/{sukta}     all verses of a hymn, in order
+  GET /search?q=&mandala=&sukta=&verse=&deity=&rishi=&offset=0&limit=20
+                                   filtered search (q uses the search index syntax:
+                                   terms, agn*, "phrases"); {total, offset, limit, results}
+  GET /stats                       total verses and per-mandala counts
+  GET /healthz
+
+The query layer is the app's (scripts/corpus_db.py): the memory-mapped columnar store
++ inverted index, or the SQLite/FTS5 database with a pool of read-only connections.
+The store/database is built (if stale) once by the launcher before workers start; each
+worker then only maps the same files, so the OS shares their pages between processes.
+
+Responses are cached per worker in an LRU keyed by the normalized request (path plus
+sorted, whitespace-collapsed query parameters with defaults applied), so
+"?limit=20&q=Agni" and "?q=agni " share one entry.
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import re
+import socket
+import sys
+import traceback
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import orjson
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from corpus_db import StoreQuery, open_db
+from corpus_store import Corpus, open_store
+from search_index import open_index
+
+# ---------- Config (environment, so every worker process sees the launcher's options) ----------
+DEFAULT_DATASET = "data/processed/rigveda_with_translations.jsonl"
+DATASET = os.environ.get("RIGVEDA_DATASET", DEFAULT_DATASET)
+BACKEND = os.environ.get("RIGVEDA_BACKEND", "store")
+CACHE_SIZE = int(os.environ.get("RIGVEDA_CACHE_SIZE", "4096"))
+DB_POOL_SIZE = int(os.environ.get("RIGVEDA_DB_POOL", "4"))
+MAX_LIMIT = 200
+MAX_HYMN_VERSES = 1000
+
+ID_RE = re.compile(r'^(?:RV-(\d+)-(\d+)-(\d+)|(\d+)\.(\d+)\.(\d+))$', re.I)
+SEARCH_PARAMS = {"q": "", "mandala": "", "sukta": "", "verse": "", "deity": "", "rishi": "", "offset": "0", "limit": "20"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LRUCache:
+    """Response bodies by normalized request key; oldest entries are evicted past max_entries."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.data: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[int, bytes]]:
+        item = self.data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return item
+
+    def put(self, key: str, item: Tuple[int, bytes]):
+        if self.max_entries <= 0:
+            return
+        self.data[key] = item
+        self.data.move_to_end(key)
+        while len(self.data) > self.max_entries:
+            self.data.popitem(last=False)
+
+
+def open_query(dataset: str, backend: str, rebuild_stale: bool = False):
+    """The app's query layer over the shared files; only the launcher passes rebuild_stale=True."""
+    if backend == "sqlite":
+        return open_db(dataset, rebuild_stale=rebuild_stale, pool_size=DB_POOL_SIZE)
+    return StoreQuery(Corpus(open_store(dataset, rebuild_stale=rebuild_stale)),
+                      open_index(dataset, rebuild_stale=rebuild_stale))
+
+
+def _int_param(params: Dict[str, str], name: str) -> Optional[int]:
+    v = params.get(name, "")
+    if v == "":
+        return None
+    try:
+        return int(v)
+    except ValueError:
+        raise HTTPError(400, f"'{name}' must be an integer")
+
+
+def normalize_request(path: str, query_string: str) -> Tuple[str, Dict[str, str]]:
+    """(cache key, params): trailing slash dropped, known parameters only, values whitespace-collapsed."""
+    path = path.rstrip("/") or "/"
+    params = {}
+    for k, v in parse_qsl(query_string, keep_blank_values=True):
+        if k in SEARCH_PARAMS:
+            params[k] = " ".join(v.split())
+    if path == "/search":
+        params = {k: params.get(k, d) for k, d in SEARCH_PARAMS.items()}
+        params["q"] = params["q"].lower()
+        params["deity"] = params["deity"].lower()
+        params["rishi"] = params["rishi"].lower()
+        key = path + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+    else:
+        key = path
+    return key, params
+
+
+class VerseAPI:
+    """ASGI application; the query layer is opened at lifespan startup (once per worker)."""
+
+    def __init__(self, dataset: str = DATASET, backend: str = BACKEND, cache_size: int = CACHE_SIZE):
+        self.dataset = dataset
+        self.backend = backend
+        self.query = None
+        self.cache = LRUCache(cache_size)
+
+    def ensure_open(self):
+        if self.query is None:
+            self.query = open_query(self.dataset, self.backend)
+
+    # ---------- Handlers (synchronous; run off the event loop) ----------
+
+    def verse(self, ref: str) -> Any:
+        m = ID_RE.match(ref)
+        if not m:
+            raise HTTPError(400, "verse id must look like RV-01-001-01 or 1.1.1")
+        mandala, sukta, verse = (int(x) for x in (m.groups()[:3] if m.group(1) else m.groups()[3:]))
+        recs = self.query.records(0, 1, mandala=mandala, sukta=sukta, verse_index=verse)
+        if not recs:
+            raise HTTPError(404, f"verse {ref} not found")
+        return recs[0]
+
+    def hymn(self, mandala: str, sukta: str) -> Any:
+        try:
+            filters = {"mandala": int(mandala), "sukta": int(sukta)}
+        except ValueError:
+            raise HTTPError(400, "mandala and sukta must be integers")
+        recs = self.query.records(0, MAX_HYMN_VERSES, **filters)
+        if not recs:
+            raise HTTPError(404, f"hymn {mandala}.{sukta} not found")
+        return {"mandala": filters["mandala"], "sukta": filters["sukta"], "verses": recs}
+
+    def search(self, params: Dict[str, str]) -> Any:
+        offset = max(0, _int_param(params, "offset") or 0)
+        limit = min(MAX_LIMIT, max(0, _int_param(params, "limit") or 0))
+        filters = {
+            "mandala": _int_param(params, "mandala"), "sukta": _int_param(params, "sukta"),
+            "verse_index": _int_param(params, "verse"), "deity": params["deity"] or None,
+            "rishi": params["rishi"] or None, "text": params["q"] or None,
+        }
+        total = self.query.count(**filters)
+        results = self.query.records(offset, limit, **filters) if limit and offset < total else []
+        return {"total": total, "offset": offset, "limit": limit, "results": results}
+
+    def stats(self) -> Any:
+        counts = self.query.mandala_counts
+        return {"total_verses": len(self.query), "backend": self.backend,
+                "by_mandala": {str(int(m)): int(c) for m, c in zip(counts["mandala"], counts["count"])}}
+
+    def route(self, path: str, params: Dict[str, str]) -> Any:
+        parts = [p for p in path.split("/") if p]
+        if parts == ["healthz"]:
+            return {"ok": True}
+        if parts == ["stats"]:
+            return self.stats()
+        if parts == ["search"]:
+            return self.search(params)
+        if len(parts) == 2 and parts[0] == "verses":
+            return self.verse(parts[1])
+        if len(parts) == 3 and parts[0] == "hymns":
+            return self.hymn(parts[1], parts[2])
+        raise HTTPError(404, "not found")
+
+    def respond(self, path: str, params: Dict[str, str]) -> Tuple[int, bytes]:
+        """Runs in a worker thread; the cache is only touched from the event loop."""
+        try:
+            return 200, orjson.dumps(self.route(path, params))
+        except HTTPError as e:
+            return e.status, orjson.dumps({"error": str(e)})
+        except Exception:
+            traceback.print_exc()
+            return 500, orjson.dumps({"error": "internal error"})
+
+    # ---------- ASGI ----------
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    try:
+                        await asyncio.to_thread(self.ensure_open)
+                    except Exception as e:
+                        await send({"type": "lifespan.startup.failed", "message": str(e)})
+                        return
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._send(send, 405, orjson.dumps({"error": "method not allowed"}))
+            return
+        key, params = normalize_request(scope["path"], scope.get("query_string", b"").decode("latin-1"))
+        item = self.cache.get(key)
+        if item is None:
+            if self.query is None:  # servers without lifespan support
+                await asyncio.to_thread(self.ensure_open)
+            item = await asyncio.to_thread(self.respond, key.split("?", 1)[0], params)
+            if item[0] in (200, 404):  # 400s depend on the raw input, not worth caching
+                self.cache.put(key, item)
+        status, body = item
+        await self._send(send, status, body if scope["method"] == "GET" else b"", len(body))
+
+    @staticmethod
+    async def _send(send, status: int, body: bytes, length: Optional[int] = None):
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body) if length is None else length).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+
+app = VerseAPI()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Serve the verse query API (ASGI, via uvicorn)")
+    p.add_argument("--dataset", default=DATASET, help="Processed JSONL (store/index/database live next to it)")
+    p.add_argument("--backend", choices=["store", "sqlite"], default=BACKEND)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--workers", type=int, default=1, help="Worker processes (all map the same store files)")
+    p.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="LRU response cache entries per worker (0 = off)")
+    args = p.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("uvicorn is required to serve the API: pip install uvicorn", file=sys.stderr)
+        return 1
+    # Build stale files once here, so workers only open (and never race to rebuild) them
+    query = open_query(args.dataset, args.backend, rebuild_stale=True)
+    print(f"Serving {len(query)} verses from {args.dataset} ({args.backend}) on http://{args.host}:{args.port}")
+    del query
+    os.environ.update(RIGVEDA_DATASET=args.dataset, RIGVEDA_BACKEND=args.backend, RIGVEDA_CACHE_SIZE=str(args.cache_size))
+    # Bind the listening socket here with TCP_NODELAY (inherited by accepted connections on Linux).
+    # uvicorn's own multi-worker socket has proto 0, so asyncio skips NODELAY and keep-alive
+    # responses (headers and body are separate writes) stall ~40 ms on Nagle + delayed ACK.
+    family = socket.AF_INET6 if ":" in args.host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((args.host, args.port))
+    sock.set_inheritable(True)
+    uvicorn.run("api:app", app_dir=str(Path(__file__).resolve().parent), fd=sock.fileno(),
+                workers=args.workers, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,83 +14,126 @@ If not present it will try:
 Requirements:
   streamlit
   pandas
+  numpy
+  pydeck
   orjson (optional - faster JSON)
+
+On first start the JSONL is compiled into a memory-mapped columnar store
+(<dataset>.store/, see scripts/corpus_store.py); later starts only map it.
+The sidebar can switch queries to the optional SQLite/FTS5 backend
+(<dataset>.sqlite, see scripts/corpus_db.py), which runs filters, search and
+paging inside SQLite.
 """
 
 from pathlib import Path
+import sys
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
-import orjson
 import textwrap
-from typing import List, Dict, Any
 import io
 import random
+import tempfile
+import pydeck as pdk
+try:  # pydeck-internal encoder hook; without it the graph falls back to pdk.Deck's own (indented) JSON
+    from pydeck.bindings.json_tools import default_serialize
+except ImportError:
+    default_serialize = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from corpus_store import Corpus, open_store
+from search_index import SearchIndex, open_index
+from corpus_export import EXPORT_FORMATS, export, export_mime
+from corpus_db import StoreQuery, VerseDB, default_db_path, fts5_available, open_db
+from corpus_aggregates import Aggregates, open_aggregates
+from corpus_graph import GRAPH_KINDS, GraphSet, open_graphs
 
 # ---------- Config ----------
 DEFAULT_DATA_PATHS = [
     Path("data/processed/rigveda_with_translations.jsonl"),
     Path("data/processed/rigveda_mandalas_1-10.jsonl")
 ]
+RESULT_PAGE_SIZES = [25, 50, 100, 250]
+BACKENDS = ["Columnar store", "SQLite (FTS5)"]
 
 st.set_page_config(page_title="Rig Veda Visualizer — Verse Browser", layout="wide")
 
 # ---------- Helpers ----------
 
-@st.cache_data(ttl=3600)
-def load_jsonl(path: str) -> List[Dict[str, Any]]:
-    """Load newline-delimited JSON into a list of dicts. Use orjson for speed."""
-    records = []
-    p = Path(path)
-    if not p.exists():
-        raise FileNotFoundError(f"Dataset not found: {path}")
-    with p.open("rb") as fh:
-        for raw in fh:
-            raw = raw.strip()
-            if not raw:
-                continue
-            try:
-                obj = orjson.loads(raw)
-            except Exception:
-                try:
-                    obj = json.loads(raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else raw)
-                except Exception:
-                    # Last resort: decode bytes and try
-                    obj = json.loads(raw.decode("utf-8", errors="replace"))
-            records.append(obj)
-    return records
-
-def to_dataframe(records: List[Dict[str, Any]]) -> pd.DataFrame:
-    """Create dataframe with normalized columns and safe defaults."""
-    df = pd.json_normalize(records)
-    # ensure required columns exist
-    for c in ["id","mandala","sukta","verse_index","verse_id","deity","rishi","sanskrit",
-              "transliteration","translation","metre","source_file","page_number","notes"]:
-        if c not in df.columns:
-            df[c] = None
-    # Coerce types where sensible
-    df["mandala"] = pd.to_numeric(df["mandala"], errors="coerce").fillna(0).astype(int)
-    df["sukta"] = pd.to_numeric(df["sukta"], errors="coerce").fillna(0).astype(int)
-    df["verse_index"] = pd.to_numeric(df["verse_index"], errors="coerce").fillna(0).astype(int)
-    return df
-
-def filter_df_by_selection(df: pd.DataFrame, mandala: int, sukta: int, verse_index: int):
-    q = df
-    if mandala is not None:
-        q = q[q["mandala"] == int(mandala)]
-    if sukta is not None:
-        q = q[q["sukta"] == int(sukta)]
-    if verse_index is not None:
-        q = q[q["verse_index"] == int(verse_index)]
-    return q
+@st.cache_resource
+def load_corpus(path: str) -> Corpus:
+    """
+    Open (building on first use) the memory-mapped store next to the JSONL dataset and
+    precompute dropdown lists/counts. Shared across reruns and sessions without copying,
+    so callers must not mutate corpus.df in place.
+    """
+    return Corpus(open_store(path))
 
 def paragraphify(s: str, n=80):
     if not s:
         return ""
     return "\n".join(textwrap.wrap(s, width=n))
 
-def download_bytes(content: bytes, filename: str, mime: str):
-    st.download_button(label=f"Download {filename}", data=content, file_name=filename, mime=mime)
+@st.cache_resource
+def load_search_index(path: str) -> SearchIndex:
+    """Prebuilt inverted index over sanskrit/translation (scripts/search_index.py); built on first use."""
+    return open_index(path)
+
+@st.cache_resource
+def load_db(path: str) -> VerseDB:
+    """SQLite/FTS5 database next to the dataset (scripts/corpus_db.py); built on first use."""
+    return open_db(path)
+
+@st.cache_resource
+def load_aggregates(path: str) -> Aggregates:
+    """Aggregate cube written with the dataset (scripts/corpus_aggregates.py); computed if missing or stale."""
+    return open_aggregates(path)
+
+@st.cache_resource
+def load_graphs(path: str) -> GraphSet:
+    """Co-occurrence graphs with cached layouts (scripts/corpus_graph.py); built on first use."""
+    return open_graphs(path)
+
+class CompactDeck(pdk.Deck):
+    """Deck serialized without indentation: pydeck's indent=2 forces json's pure-Python encoder (~5x slower on big layers)."""
+    def to_json(self):
+        if default_serialize is None:
+            return super().to_json()
+        return json.dumps(self, sort_keys=True, default=default_serialize)
+
+def render_graph(nodes, edges, n_labels: int = 40, max_edge_tips: int = 5000):
+    """WebGL (deck.gl) drawing of a precomputed layout: edges, nodes sized by weight, the top labels."""
+    scale = 500.0
+    nodes = pd.DataFrame({
+        "x": (nodes["x"].astype("float64") * scale).round(1), "y": (nodes["y"].astype("float64") * scale).round(1),
+        "r": (2 + np.log1p(nodes["weight"]) * 1.5).round(1), "label": nodes["label"],
+        "color": [[200, 70, 50] if s == "deity" else [50, 90, 200] for s in nodes["side"]],
+        "tip": nodes["label"] + " (" + nodes["weight"].astype(int).astype(str) + ")",
+    })
+    # Edges carry only coordinates and width (plus a tooltip while there are few enough to pick)
+    frame = (edges[["sx", "sy", "tx", "ty"]].astype("float64") * scale).round(1)
+    frame["width"] = (0.5 + np.log1p(edges["weight"]) / np.log1p(max(edges["weight"].max(), 1)) * 3).round(2)
+    pick_edges = len(edges) <= max_edge_tips
+    if pick_edges:
+        frame["tip"] = edges["source"] + " — " + edges["target"] + " (" + edges["weight"].astype(int).astype(str) + ")"
+    layers = [
+        pdk.Layer("LineLayer", frame, get_source_position=["sx", "sy"], get_target_position=["tx", "ty"],
+                  get_width="width", get_color=[120, 120, 120, 90], pickable=pick_edges),
+        pdk.Layer("ScatterplotLayer", nodes, get_position=["x", "y"], get_radius="r", radius_units=pdk.types.String("pixels"),
+                  get_fill_color="color", pickable=True),
+        pdk.Layer("TextLayer", nodes.nlargest(n_labels, "r"), get_position=["x", "y"], get_text="label",
+                  get_size=12, get_color=[20, 20, 20], get_pixel_offset=[0, -12]),
+    ]
+    st.pydeck_chart(CompactDeck(layers=layers, views=[pdk.View(type="OrthographicView", controller=True)],
+                                initial_view_state=pdk.ViewState(target=[0, 0, 0], zoom=-0.2),
+                                map_provider=None, tooltip={"text": "{tip}"}))
+
+def load_query(path: str, backend: str):
+    """Query layer for the chosen backend; both expose count/records/page/row_ids over the same filters."""
+    if backend == BACKENDS[1]:
+        return load_db(path)
+    return StoreQuery(load_corpus(path), load_search_index(path))
 
 # ---------- Load data ----------
 
@@ -108,17 +151,22 @@ if DATA_PATH is None:
 with st.sidebar:
     st.header("Rig Veda Visualizer")
     st.markdown(f"**Dataset:** `{DATA_PATH}`")
+    backend = BACKENDS[0]
+    if fts5_available():
+        backend = st.radio("Query backend", BACKENDS, index=int(default_db_path(DATA_PATH).exists()),
+                           help="SQLite keeps filtering, search and paging in the database (built on first use)")
     if st.button("Reload dataset"):
         st.cache_data.clear()
+        st.cache_resource.clear()
         st.experimental_rerun()
     st.markdown("---")
     st.markdown("Usage tips:")
     st.markdown("- Use search to find verses.\n- Export filtered results.\n- Toggle raw JSON for debugging.")
 
-# Load records (cached)
+# Load the query layer (cached resources: columnar store + index, or the SQLite database)
 with st.spinner("Loading dataset..."):
-    records = load_jsonl(str(DATA_PATH))
-df = to_dataframe(records)
+    query = load_query(str(DATA_PATH), backend)
+    aggregates = load_aggregates(str(DATA_PATH))
 
 # ---------- Controls / Filters ----------
 
@@ -127,34 +175,25 @@ col1, col2 = st.columns([1,3])
 
 with col1:
     st.subheader("Browse")
-    mandalas = sorted(df["mandala"].unique())
+    mandalas = query.mandalas
     mandala_sel = st.selectbox("Mandala", options=[None]+mandalas, format_func=lambda x: "All" if x is None else f"Mandala {x}")
-    sukta_opts = []
-    if mandala_sel is not None:
-        sukta_opts = sorted(df[df["mandala"]==mandala_sel]["sukta"].unique())
-    else:
-        sukta_opts = sorted(df["sukta"].unique())
+    sukta_opts = query.sukta_options(mandala_sel)
     sukta_sel = st.selectbox("Sukta (Hymn)", options=[None]+sukta_opts, format_func=lambda x: "All" if x is None else f"Sukta {x}")
 
-    verse_opts = []
-    if mandala_sel is not None and sukta_sel is not None:
-        verse_opts = sorted(df[(df["mandala"]==mandala_sel) & (df["sukta"]==sukta_sel)]["verse_index"].unique())
-    elif mandala_sel is not None and sukta_sel is None:
-        verse_opts = sorted(df[df["mandala"]==mandala_sel]["verse_index"].unique())
-    else:
-        verse_opts = sorted(df["verse_index"].unique())
+    verse_opts = query.verse_options(mandala_sel, sukta_sel)
     verse_sel = st.selectbox("Verse index", options=[None]+verse_opts, format_func=lambda x: "All" if x is None else f"Verse {x}")
 
     st.markdown("---")
     st.subheader("Search")
-    q_text = st.text_input("Text search (Sanskrit or English)", value="")
+    q_text = st.text_input("Text search (Sanskrit or English)", value="",
+                           help='Words must all match; use agn* for prefixes and "quotes" for phrases. Results are ranked.')
     q_deity = st.text_input("Filter by deity (e.g., Agni, Indra)", value="")
-    quick_btns = st.columns(3)
+    quick_btns = st.columns(4)
     if quick_btns[0].button("Random verse"):
         # pick a random row from current filtered set
-        candidates = filter_df_by_selection(df, mandala_sel, sukta_sel, None)
-        if not candidates.empty:
-            r = candidates.sample(1).iloc[0]
+        n_candidates = query.count(mandala=mandala_sel, sukta=sukta_sel)
+        if n_candidates:
+            r = query.records(random.randrange(n_candidates), 1, mandala=mandala_sel, sukta=sukta_sel)[0]
             mandala_sel = int(r["mandala"]); sukta_sel = int(r["sukta"]); verse_sel = int(r["verse_index"])
             st.experimental_rerun()
     if quick_btns[1].button("First verse of Mandala"):
@@ -162,32 +201,78 @@ with col1:
             mandala_sel = mandalas[0]
             st.experimental_rerun()
     if quick_btns[2].button("Stats"):
-        st.metric("Total verses in dataset", len(df))
+        st.session_state.show_stats = not st.session_state.get("show_stats", False)
+    if quick_btns[3].button("Network"):
+        st.session_state.show_graph = not st.session_state.get("show_graph", False)
 
 with col2:
     # placeholder for main content
     pass
 
+# ---------- Dashboards (rolled up from the aggregate cube, not the verses) ----------
+
+if st.session_state.get("show_stats", False):
+    scope = "all mandalas" if mandala_sel is None else f"Mandala {mandala_sel}"
+    st.subheader(f"Dashboards — {scope}")
+    total = aggregates.rollup([], mandala_sel).iloc[0]
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Verses", f"{int(total['verses']):,}")
+    m2.metric("Translated", f"{total['coverage_%']:.1f}%")
+    m3.metric("Avg. Sanskrit chars / verse", f"{total['avg_sanskrit_chars']:.0f}")
+    m4.metric("Avg. words / translation", f"{total['avg_translation_words']:.0f}")
+
+    d1, d2 = st.columns(2)
+    with d1:
+        if mandala_sel is None:
+            st.markdown("**Verses and translation coverage by mandala**")
+            by_mandala = aggregates.rollup(["mandala"])
+            st.bar_chart(by_mandala[["verses", "translated"]])
+            st.bar_chart(by_mandala[["avg_sanskrit_chars"]])
+        st.markdown("**Top deities**")
+        st.bar_chart(aggregates.top("deity", 15, mandala_sel)["verses"])
+    with d2:
+        st.markdown("**Metre distribution**")
+        st.bar_chart(aggregates.top("metre", 15, mandala_sel)["verses"])
+        st.markdown("**Top rishis**")
+        st.bar_chart(aggregates.top("rishi", 15, mandala_sel)["verses"])
+
+    if mandala_sel is None:
+        st.markdown("**Verses per deity per mandala** (top deities)")
+        top_deities = aggregates.top("deity", 15).index
+        pivot = aggregates.rollup(["deity", "mandala"])["verses"].unstack(fill_value=0)
+        st.dataframe(pivot.loc[top_deities])
+    st.markdown("---")
+
+# ---------- Network view (precomputed layouts; only the edge filter runs per rerun) ----------
+
+if st.session_state.get("show_graph", False):
+    graphs = load_graphs(str(DATA_PATH))
+    st.subheader("Network — " + ("all mandalas" if mandala_sel is None else f"Mandala {mandala_sel}"))
+    g1, g2, g3, g4 = st.columns([2, 2, 1, 1])
+    graph_kind = g1.selectbox("Graph", options=list(GRAPH_KINDS),
+                              help="deity-comention counts clauses of the translation naming both deities")
+    graph = graphs[graph_kind]
+    bipartite = len(graph.sides) > 1
+    focus = g2.selectbox("Focus node", options=[None] + sorted(graph.nodes, key=lambda n: (n[1], n[0])),
+                         format_func=lambda n: "All" if n is None else (f"{n[1]} ({n[0]})" if bipartite else n[1]))
+    min_weight = g3.number_input("Min. weight", min_value=1, value=1, step=1)
+    max_edges = g4.number_input("Max. edges", min_value=10, max_value=50000, value=2000, step=500)
+    nodes, edges = graph.subgraph(mandala_sel, int(min_weight), focus, int(max_edges))
+    st.caption(f"{len(nodes)} nodes, {len(edges)} edges (heaviest first) of {len(graph)} nodes")
+    if len(edges):
+        render_graph(nodes, edges)
+    else:
+        st.info("No edges match these filters.")
+    st.markdown("---")
+
 # ---------- Apply filters & search ----------
 
-filtered = df.copy()
-if mandala_sel is not None:
-    filtered = filtered[filtered["mandala"] == mandala_sel]
-if sukta_sel is not None:
-    filtered = filtered[filtered["sukta"] == sukta_sel]
-if verse_sel is not None:
-    filtered = filtered[filtered["verse_index"] == verse_sel]
-if q_deity:
-    # fuzzy-ish filter on deity column
-    filtered = filtered[filtered["deity"].fillna("").str.contains(q_deity, case=False, na=False)]
-if q_text:
-    # search in Sanskrit or translation; handle NaN and case-insensitive
-    mask = filtered["sanskrit"].fillna("").str.contains(q_text, case=False, na=False) | \
-           filtered["translation"].fillna("").str.contains(q_text, case=False, na=False)
-    filtered = filtered[mask]
-
-# Sort by mandala/sukta/verse_index for stable ordering
-filtered = filtered.sort_values(by=["mandala","sukta","verse_index"]).reset_index(drop=True)
+# Filters go to the query layer; only the count, the visible verse and the table page are materialized.
+# Text search results keep relevance order (the trailing word is a prefix while typing), otherwise
+# rows are in mandala/sukta/verse_index order.
+filters = dict(mandala=mandala_sel, sukta=sukta_sel, verse_index=verse_sel,
+               deity=q_deity or None, text=q_text or None, prefix_last=True)
+n_results = query.count(**filters)
 
 # ---------- Main view: show one verse at a time and a table of results ----------
 
@@ -196,7 +281,7 @@ main_col, side_col = st.columns([3,1])
 with main_col:
     st.subheader("Verse viewer")
 
-    if filtered.empty:
+    if n_results == 0:
         st.warning("No verses match your filters/search.")
     else:
         # pager state
@@ -204,10 +289,10 @@ with main_col:
             st.session_state.viewer_idx = 0
 
         # clamp viewer_idx
-        st.session_state.viewer_idx = max(0, min(st.session_state.viewer_idx, len(filtered)-1))
+        st.session_state.viewer_idx = max(0, min(st.session_state.viewer_idx, n_results-1))
 
         idx = st.session_state.viewer_idx
-        rec = filtered.iloc[idx].to_dict()
+        rec = query.records(idx, 1, **filters)[0]
 
         # header with nav
         nav_col1, nav_col2, nav_col3 = st.columns([1,6,1])
@@ -216,7 +301,7 @@ with main_col:
                 st.session_state.viewer_idx -= 1
                 st.experimental_rerun()
         with nav_col3:
-            if st.button("Next →") and st.session_state.viewer_idx < len(filtered)-1:
+            if st.button("Next →") and st.session_state.viewer_idx < n_results-1:
                 st.session_state.viewer_idx += 1
                 st.experimental_rerun()
 
@@ -228,7 +313,8 @@ with main_col:
                 "Rishi": rec.get("rishi"),
                 "Metre": rec.get("metre"),
                 "Source file": rec.get("source_file"),
-                "Page number": rec.get("page_number"),
+                ("Page number (estimated)" if "page_number_estimated" in (rec.get("notes") or "")
+                 else "Page number"): rec.get("page_number"),
                 "Notes": rec.get("notes")
             }
             st.json({k:v for k,v in md.items() if v is not None})
@@ -273,39 +359,47 @@ with main_col:
 
 with side_col:
     st.subheader("Filtered results")
-    st.write(f"Matching verses: **{len(filtered)}**")
-    # show a small table and let user pick a row to jump
-    table = filtered[["mandala","sukta","verse_index","id","deity"]].copy()
-    table["label"] = table.apply(lambda r: f"M{r['mandala']} S{r['sukta']} V{r['verse_index']}", axis=1)
-    st.dataframe(table.rename(columns={"mandala":"Mandala","sukta":"Sukta","verse_index":"Verse","id":"ID","deity":"Deity"}), height=360)
+    st.write(f"Matching verses: **{n_results}**")
+    # paged table: only the visible window is materialized, so cost does not grow with the result size
+    page_size = st.selectbox("Rows per page", options=RESULT_PAGE_SIZES, index=1)
+    n_pages = max(1, -(-n_results // page_size))
+    page_no = st.number_input("Page", min_value=1, max_value=n_pages,
+                              value=min(n_pages, st.session_state.get("viewer_idx", 0) // page_size + 1))
+    table = query.page((int(page_no) - 1) * page_size, page_size, **filters)
+    st.dataframe(table.rename(columns={"label":"Label","mandala":"Mandala","sukta":"Sukta","verse_index":"Verse","id":"ID","deity":"Deity"}), height=360)
+    st.caption(f"Page {int(page_no)} of {n_pages}")
 
     # Jump to a selected row
-    sel_idx = st.number_input("Jump to result index (0-based)", min_value=0, max_value=max(0, len(filtered)-1), value=st.session_state.get("viewer_idx",0))
+    sel_idx = st.number_input("Jump to result index (0-based)", min_value=0, max_value=max(0, n_results-1), value=st.session_state.get("viewer_idx",0))
     if st.button("Go to index"):
         st.session_state.viewer_idx = int(sel_idx)
         st.experimental_rerun()
 
     st.markdown("---")
     st.subheader("Export")
-    if st.button("Export filtered as JSONL"):
-        out_buf = io.BytesIO()
-        for _, r in filtered.iterrows():
-            out_buf.write(orjson.dumps(r.to_dict()))
-            out_buf.write(b"\n")
-        out_buf.seek(0)
-        st.download_button("Download JSONL", data=out_buf.getvalue(), file_name="filtered_verses.jsonl", mime="application/json")
-    if st.button("Export filtered as CSV"):
-        csv_buf = filtered.to_csv(index=False)
-        st.download_button("Download CSV", data=csv_buf.encode("utf-8"), file_name="filtered_verses.csv", mime="text/csv")
+    export_fmt = st.selectbox("Format", options=EXPORT_FORMATS, index=EXPORT_FORMATS.index("jsonl.gz"))
+    if st.button("Export filtered results"):
+        # encoded a column batch at a time into a temp file; only the final (compressed) payload is
+        # read back, because st.download_button needs it in memory
+        with tempfile.TemporaryFile() as out_buf:
+            try:
+                # from the active backend, so the SQLite backend does not also load the columnar corpus
+                export(query.export_source, export_fmt, out_buf, rows=query.row_ids(**filters))
+            except RuntimeError as e:  # optional dependency (zstandard/pyarrow) missing
+                st.error(str(e))
+            else:
+                out_buf.seek(0)
+                st.download_button(f"Download {export_fmt}", data=out_buf.read(), file_name=f"filtered_verses.{export_fmt}",
+                                   mime=export_mime(export_fmt))
 
 # ---------- Footer / Stats ----------
 
 st.sidebar.markdown("---")
 st.sidebar.subheader("Dataset stats")
-st.sidebar.write(f"Total verses (rows): **{len(df)}**")
+st.sidebar.write(f"Total verses (rows): **{len(query)}**")
+st.sidebar.write(f"Translated: **{aggregates.totals['translated'] / max(aggregates.totals['verses'], 1):.1%}**")
 st.sidebar.write("Mandala counts:")
-mandala_counts = df["mandala"].value_counts().sort_index()
-st.sidebar.dataframe(mandala_counts.rename_axis("mandala").reset_index(name="count"), height=200)
+st.sidebar.dataframe(aggregates.rollup(["mandala"])[["verses", "coverage_%"]].round(1), height=200)
 
 st.markdown("---")
 st.markdown("Powered by your local dataset. For issues, check `data/schema.md` and `scripts/` for parsing/cleaning tools.")
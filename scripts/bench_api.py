@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_api.py
+
+Load generator for the verse query API (App/api.py): N concurrent clients over a
+keep-alive connection pool send a mix of verse, hymn, search and stats requests for a
+fixed duration, then latency percentiles (p50/p90/p99), requests per second and errors
+are reported per endpoint and overall.
+
+Request targets are drawn from the dataset (real verse ids, hymns and words), so cache
+behaviour is realistic; --distinct N limits the mix to N distinct URLs (small N = hot
+cache), --distinct 0 makes every search unique (cold cache).
+
+Usage (start the server first: python App/api.py --workers 4):
+  python scripts/bench_api.py \
+    --url http://127.0.0.1:8000 \
+    --dataset data/processed/rigveda_with_translations.jsonl \
+    [--concurrency 32] [--duration 10] [--distinct 2000] [--json-out bench_api.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+
+import aiohttp
+import numpy as np
+
+from corpus_store import _iter_jsonl
+
+WORD_RE = re.compile(r"[A-Za-z]{4,}")
+MIX = (("verse", 0.4), ("hymn", 0.2), ("search", 0.35), ("stats", 0.05))
+
+
+def build_targets(dataset_path, n, seed=0):
+    """[(kind, path)] sampled from the dataset; n = 0 gives an endless supply of unique searches."""
+    rng = random.Random(seed)
+    ids, hymns, words = [], set(), set()
+    for rec in _iter_jsonl(dataset_path):
+        ids.append(rec["id"])
+        hymns.add((rec["mandala"], rec["sukta"]))
+        if len(words) < 5000:
+            words.update(w.lower() for w in WORD_RE.findall(rec.get("translation") or "")[:3])
+    hymns, words = sorted(hymns), sorted(words)
+
+    def one(i):
+        kind = rng.choices([k for k, _ in MIX], [w for _, w in MIX])[0]
+        if kind == "verse":
+            return kind, f"/verses/{rng.choice(ids)}"
+        if kind == "hymn":
+            m, s = rng.choice(hymns)
+            return kind, f"/hymns/{m}/{s}"
+        if kind == "stats":
+            return kind, "/stats"
+        q = rng.choice(words) + (" " + rng.choice(words)[:3] + "*" if rng.random() < 0.3 else "")
+        extra = f"&mandala={rng.randint(1, 10)}" if rng.random() < 0.3 else ""
+        offset = f"&offset={i}" if n == 0 else ""  # distinct offset -> distinct cache key
+        return kind, f"/search?q={q}{extra}{offset}&limit=20"
+
+    return [one(i) for i in range(n)] if n else one
+
+
+async def client(session, base, pick, deadline, lat, errors):
+    while time.perf_counter() < deadline:
+        kind, path = pick()
+        t0 = time.perf_counter()
+        try:
+            async with session.get(base + path) as resp:
+                await resp.read()
+                ok = resp.status in (200, 404)
+        except aiohttp.ClientError:
+            ok = False
+        lat[kind].append(time.perf_counter() - t0)
+        if not ok:
+            errors[kind] += 1
+
+
+async def run(base, targets, concurrency, duration, warmup):
+    rng = random.Random(1)
+    counter = iter(range(10 ** 12))
+    if callable(targets):
+        pick = lambda: targets(next(counter))
+    else:
+        pick = lambda: rng.choice(targets)
+    connector = aiohttp.TCPConnector(limit=concurrency, force_close=False)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        if warmup:
+            await asyncio.gather(*(client(session, base, pick, time.perf_counter() + warmup,
+                                          defaultdict(list), defaultdict(int)) for _ in range(concurrency)))
+        lat, errors = defaultdict(list), defaultdict(int)
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client(session, base, pick, t0 + duration, lat, errors) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    return lat, errors, elapsed
+
+
+def summarize(lat, errors, elapsed):
+    rows = {}
+    for kind in sorted(lat) + ["all"]:
+        xs = np.asarray(sum(lat.values(), []) if kind == "all" else lat[kind]) * 1000
+        if not len(xs):
+            continue
+        p50, p90, p99 = np.percentile(xs, [50, 90, 99])
+        rows[kind] = {"requests": int(len(xs)), "rps": len(xs) / elapsed, "p50_ms": float(p50),
+                      "p90_ms": float(p90), "p99_ms": float(p99), "max_ms": float(xs.max()),
+                      "errors": int(sum(errors.values()) if kind == "all" else errors[kind])}
+    return rows
+
+
+def main():
+    p = argparse.ArgumentParser(description="Load-test the verse query API and report latency percentiles and throughput")
+    p.add_argument("--url", default="http://127.0.0.1:8000")
+    p.add_argument("--dataset", default="data/processed/rigveda_with_translations.jsonl", help="JSONL to draw request targets from")
+    p.add_argument("--concurrency", type=int, default=32, help="Concurrent clients (= pooled keep-alive connections)")
+    p.add_argument("--duration", type=float, default=10.0, help="Seconds of measured load")
+    p.add_argument("--warmup", type=float, default=1.0, help="Seconds of unmeasured load first")
+    p.add_argument("--distinct", type=int, default=2000, help="Distinct URLs in the mix (0 = every search unique)")
+    p.add_argument("--json-out", default=None, help="Also write the summary as JSON")
+    args = p.parse_args()
+
+    targets = build_targets(args.dataset, args.distinct)
+    lat, errors, elapsed = asyncio.run(run(args.url.rstrip("/"), targets, args.concurrency, args.duration, args.warmup))
+    rows = summarize(lat, errors, elapsed)
+    if not rows:
+        sys.exit("No requests completed")
+    print(f"{args.concurrency} clients, {elapsed:.1f}s, distinct={args.distinct}")
+    print(f"{'endpoint':<8} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for kind, r in rows.items():
+        print(f"{kind:<8} {r['requests']:>9} {r['rps']:>9.0f} {r['p50_ms']:>8.2f} {r['p90_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['max_ms']:>8.2f} {r['errors']:>7}")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump({"url": args.url, "concurrency": args.concurrency, "duration_s": elapsed,
+                       "distinct": args.distinct, "endpoints": rows}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
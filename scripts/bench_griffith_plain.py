@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_griffith_plain.py
+
+Throughput benchmark for the griffith_plain_to_csv_v2.py parser on a plain-text dump:
+paragraph splitting, the PARA_TOKEN_RE tokenizer alone, and the full
+lines -> paragraphs -> entries pipeline (no output written).
+
+Usage:
+  python scripts/bench_griffith_plain.py \
+    --input data/raw/griffith_plain.txt \
+    [--repeat 5]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from griffith_plain_to_csv_v2 import iter_entries, iter_paragraphs, normalize_paragraph, tokenize_paragraph
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark the v2 Griffith plain-text parser")
+    p.add_argument("--input", "-i", default="data/raw/griffith_plain.txt")
+    p.add_argument("--repeat", type=int, default=5, help="Timing runs per stage (best is reported)")
+    args = p.parse_args()
+
+    inp = Path(args.input)
+    if not inp.exists():
+        sys.exit(f"Input file not found: {inp}")
+    raw = inp.read_text(encoding="utf-8", errors="replace")
+    lines = raw.split("\n")
+    mb = len(raw.encode("utf-8")) / 1e6
+    paras = list(iter_paragraphs(lines))
+    normalized = [normalize_paragraph(p) for p in paras]
+
+    stages = [
+        ("paragraphs", lambda: sum(1 for _ in iter_paragraphs(lines))),
+        ("tokenize", lambda: sum(1 for t in normalized for _ in tokenize_paragraph(t))),
+        ("full pipeline", lambda: sum(1 for _ in iter_entries(iter_paragraphs(lines)))),
+    ]
+    print(f"{inp}: {mb:.2f} MB, {len(lines)} lines, {len(paras)} paragraphs; best of {args.repeat}")
+    for name, fn in stages:
+        t, n = best_of(fn, args.repeat)
+        print(f"  {name:<14}: {t * 1000:8.1f} ms  {mb / t:7.1f} MB/s  ({n} items)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_parse.py
+
+Micro-benchmark: the one-pass sukta tokenizer (tokenize_sukta) against the reference
+normalize_text + extract_header_fields + split_into_stanzas pipeline, over every sukta
+of the raw corpus. Also checks that both produce identical header fields and verses.
+
+Usage:
+  python scripts/bench_parse.py \
+    --input-dir data/raw \
+    --input-glob 'rigveda_mandala_*.json' \
+    [--repeat 5]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+from parse_rigveda import (
+    extract_header_fields, iter_json_array, natural_key, normalize_text,
+    split_into_stanzas, tokenize_sukta,
+)
+
+
+def reference(raw):
+    text = normalize_text(raw)
+    deity, rishi, metre, header_lines, body = extract_header_fields(text)
+    return deity, rishi, metre, header_lines, split_into_stanzas(body, metre)
+
+
+def best_of(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark tokenize_sukta against the reference stanza splitter")
+    p.add_argument("--input-dir", default="data/raw")
+    p.add_argument("--input-glob", default="rigveda_mandala_*.json")
+    p.add_argument("--repeat", type=int, default=5, help="Timing runs per implementation (best is reported)")
+    args = p.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.input_dir, args.input_glob)), key=natural_key)
+    if not files:
+        sys.exit(f"No files matching {args.input_glob} in {args.input_dir}")
+    texts = []
+    for f in files:
+        with open(f, "r", encoding="utf-8") as fh:
+            texts.extend(entry.get("text", "") for entry in iter_json_array(fh))
+
+    mismatches = [i for i, t in enumerate(texts) if tokenize_sukta(t) != reference(t)]
+    n_verses = sum(len(tokenize_sukta(t)[4]) for t in texts)
+
+    t_ref = best_of(reference, texts, args.repeat)
+    t_new = best_of(tokenize_sukta, texts, args.repeat)
+    print(f"{len(texts)} suktas, {n_verses} verses from {len(files)} file(s); best of {args.repeat}")
+    print(f"  reference pipeline : {t_ref * 1000:8.1f} ms")
+    print(f"  tokenize_sukta     : {t_new * 1000:8.1f} ms  ({t_ref / t_new:.2f}x)")
+    if mismatches:
+        print(f"  MISMATCH on {len(mismatches)} sukta(s), first at index {mismatches[0]}")
+        sys.exit(1)
+    print("  outputs identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -29,23 +29,27 @@ import json
 import os
 import re
 import html
-from collections import defaultdict
 from pathlib import Path
 
-# ---- heuristics / regexes ----
-BOILERPLATE_PATTERNS = [
-    r'^\s*Index\b', r'^\s*Next:', r'^\s*Previous:', r'^\s*Contents\b',
-    r'^\s*Sacred Texts\b', r'^\s*Hinduism\b', r'^\s*All Rights Reserved\b',
-    r'^\s*Table of Contents\b', r'^\s*Copyright', r'^\s*By R\. T\. H\. Griffith',
-    r'^\s*Translated by', r'^\s*Download Options\b', r'^\s*Full Text\b',
-    r'^\s*Read Online\b', r'^\s*Visit\b', r'^\s*For more', r'={3,}', r'-{3,}'
+from text_patterns import PhraseMatcher, tag_phrases
+
+# ---- heuristics / patterns ----
+# Line-initial headings, navigation tokens and index words are found by one PhraseMatcher
+# scan per text (scripts/text_patterns.py); rules of '===' / '---' count as boilerplate anywhere.
+BOILERPLATE_HEADINGS = [
+    'Index', 'Next:', 'Previous:', 'Contents', 'Sacred Texts', 'Hinduism', 'All Rights Reserved',
+    'Table of Contents', 'Copyright', 'By R. T. H. Griffith', 'Translated by', 'Download Options',
+    'Full Text', 'Read Online', 'Visit', 'For more'
 ]
-BOILERPLATE_RE = re.compile("|".join(f"(?:{p})" for p in BOILERPLATE_PATTERNS), re.I)
+NAV_TOKENS = ['Next', 'Previous', 'Index', 'Back', 'Forward', 'Home']
+INDEX_WORDS = ['Index', 'Contents', 'Prev', 'Next', 'Sanskrit', 'Sanskrit Index']
+
+PAGE_MATCHER = PhraseMatcher(tag_phrases(heading=BOILERPLATE_HEADINGS, nav=NAV_TOKENS, index=INDEX_WORDS),
+                             patterns={r'={3}': ['rule'], r'-{3}': ['rule']})
 
 HTML_TAG_RE = re.compile(r'<[^>]+>')
 MULTI_WHITESPACE_RE = re.compile(r'\s+')
 
-NAV_TOKEN_RE = re.compile(r'\b(Next|Previous|Index|Back|Forward|Home)\b', re.I)
 UPPERCASE_WORD_RE = re.compile(r'^[\sA-Z0-9\W]{5,}$')  # lines that are mostly uppercase punctuation/numbers
 
 # score weights
@@ -99,10 +103,19 @@ def clean_text(s):
     s = re.sub(r'^(Next:|Previous:).*$','', s, flags=re.I).strip()
     return s
 
+def text_tags(s):
+    """Subset of {'boilerplate', 'nav', 'index'} present in s, from a single matcher scan."""
+    found = PAGE_MATCHER.find(s)
+    tags = {t for t in ('nav', 'index') if t in found}
+    if 'rule' in found or found.get('heading') == len(s) - len(s.lstrip()):
+        tags.add('boilerplate')
+    return tags
+
 def is_junk(s):
     if not s or len(s) < 3:
         return True
-    if BOILERPLATE_RE.search(s):
+    tags = text_tags(s)
+    if 'boilerplate' in tags:
         return True
     # lines that are mostly uppercase/non-letter characters are junk
     # if over 60% chars are non-lowercase letters, treat as junk
@@ -111,10 +124,10 @@ def is_junk(s):
         # too short and no letters
         return True
     # nav tokens large presence
-    if NAV_TOKEN_RE.search(s) and len(s) < 80:
+    if 'nav' in tags and len(s) < 80:
         return True
     # common "Index" style duplicates
-    if re.search(r'\b(Index|Contents|Prev|Next|Sanskrit|Sanskrit Index)\b', s, re.I):
+    if 'index' in tags:
         return True
     return False
 
@@ -134,11 +147,12 @@ def score_text(s):
     lower = re.findall(r'[a-z]', s)
     lower_ratio = len(lower) / (len(letters) or 1)
     score = LENGTH_WEIGHT * length + LOWERCASE_RATIO_WEIGHT * (lower_ratio * 100)
+    tags = text_tags(s)
     if UPPERCASE_WORD_RE.search(s):
         score += UPPERCASE_PENALTY
-    if NAV_TOKEN_RE.search(s):
+    if 'nav' in tags:
         score += NAV_PENALTY
-    if BOILERPLATE_RE.search(s):
+    if 'boilerplate' in tags:
         score += JUNK_PENALTY
     # tiny boost for punctuation variety (real sentences have commas/periods)
     punct_count = sum(s.count(x) for x in [',', '.', ';', ':', '—', '-'])
@@ -151,30 +165,77 @@ def canonical_int(v):
     except Exception:
         return 0
 
-def dedupe_and_select(rows):
+# ---- column (vectorized) versions of is_junk / score_text ----
+
+ASCII_PUNCT = b',.;:-'
+
+def canonical_int_series(col):
+    """canonical_int over a column, evaluated once per distinct value."""
+    return col.map({v: canonical_int(v) for v in col.unique()}).astype('int64')
+
+def _byte_class_counts(texts):
     """
-    rows: list of dicts with mandala,sukta,verse_index,translation_text
-    Returns:
-      selected (dict) : the single best row
-      others (list)   : other rows (for review or drop)
+    Per-row counts of ASCII letters, lowercase letters and punctuation (, . ; : - —), from one UTF-8
+    buffer of all rows (multi-byte characters never fall in these ASCII byte ranges).
     """
-    # compute score per row
-    scored = []
-    for r in rows:
-        txt = r['translation_text']
-        s = score_text(txt)
-        scored.append((s, r))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    best = scored[0][1]
-    others = [r for _, r in scored[1:]]
-    # also consider if best score is suspicious (too low) mark for review
-    best_score = scored[0][0]
-    return best, others, best_score
+    import numpy as np
+    encoded = [t.encode('utf-8') for t in texts]
+    ends = np.cumsum([len(b) for b in encoded])
+    starts = ends - np.array([len(b) for b in encoded], dtype=ends.dtype)
+    buf = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    def count(mask):
+        cs = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+        return cs[ends] - cs[starts]
+
+    lower = (buf >= ord('a')) & (buf <= ord('z'))
+    upper = (buf >= ord('A')) & (buf <= ord('Z'))
+    punct = np.isin(buf, np.frombuffer(ASCII_PUNCT, dtype=np.uint8))
+    dash = np.zeros(len(buf), dtype=bool)  # '—' (U+2014) is E2 80 94; mark its first byte
+    if len(buf) >= 3:
+        dash[:-2] = (buf[:-2] == 0xE2) & (buf[1:-1] == 0x80) & (buf[2:] == 0x94)
+    return count(lower | upper), count(lower), count(punct | dash)
+
+def text_features(texts):
+    """Per-row features shared by junk_mask and score_series; each pattern is evaluated once per row."""
+    import pandas as pd
+    texts = texts.astype(object)  # Python re semantics (\W, \b on non-ASCII), as in is_junk/score_text
+    letters, lower, punct = _byte_class_counts(texts.tolist())
+    tags = texts.map(text_tags)
+    return pd.DataFrame({
+        'length': texts.str.len(),
+        'letters': letters,
+        'lower': lower,
+        'boilerplate': tags.map(lambda t: 'boilerplate' in t),
+        'nav': tags.map(lambda t: 'nav' in t),
+        'upper': texts.map(UPPERCASE_WORD_RE.search).notna(),
+        'index_word': tags.map(lambda t: 'index' in t),
+        'punct': punct,
+    }, index=texts.index)
+
+def junk_mask(f):
+    """Vectorized is_junk over text_features()."""
+    return ((f['length'] < 3) | f['boilerplate']
+            | ((f['letters'] < 2) & (f['length'] < 40))
+            | (f['nav'] & (f['length'] < 80))
+            | f['index_word'])
+
+def score_series(f):
+    """Vectorized score_text over text_features() (same arithmetic, so scores are identical)."""
+    import numpy as np
+    lower_ratio = f['lower'] / f['letters'].where(f['letters'] > 0, 1)
+    score = LENGTH_WEIGHT * f['length'] + LOWERCASE_RATIO_WEIGHT * (lower_ratio * 100)
+    score = score + np.where(f['upper'], UPPERCASE_PENALTY, 0.0)
+    score = score + np.where(f['nav'], NAV_PENALTY, 0.0)
+    score = score + np.where(f['boilerplate'], JUNK_PENALTY, 0.0)
+    score = score + 0.5 * f['punct']
+    return score.where(f['length'] > 0, -9999)
 
 def clean_dataframe(df, min_length=20, verbose=False, review_thresh=10):
-    # Apply cleaning rules
-    cleaned_rows = []
-    review_rows = []
+    """
+    Column-wise cleaner: text features and scores are computed once per row, candidates
+    are grouped by (mandala,sukta,verse_index) and the best row per group picked with idxmax.
+    """
     stats = {
         'total_rows': 0,
         'dropped_junk': 0,
@@ -186,70 +247,54 @@ def clean_dataframe(df, min_length=20, verbose=False, review_thresh=10):
     # normalize and clean text column
     df['translation_text'] = df['translation_text'].astype(str).fillna('').apply(clean_text)
     # cast numeric fields
-    df['mandala_i'] = df['mandala'].apply(canonical_int)
-    df['sukta_i'] = df['sukta'].apply(canonical_int)
-    df['verse_i'] = df['verse_index'].apply(canonical_int)
+    df['mandala_i'] = canonical_int_series(df['mandala'])
+    df['sukta_i'] = canonical_int_series(df['sukta'])
+    df['verse_i'] = canonical_int_series(df['verse_index'])
 
     stats['total_rows'] = len(df)
 
     # drop rows where mandala or sukta are 0 (likely header/intro) OR where text is junk
-    cand = []
-    for _, row in df.iterrows():
-        m = row['mandala_i']; s = row['sukta_i']; v = row['verse_i']
-        txt = row['translation_text'].strip()
-        if m <= 0 or s <= 0:
-            stats['dropped_junk'] += 1
-            if verbose:
-                print(f"Drop header/intro row: mandala={m},sukta={s},len={len(txt)}")
-            continue
-        if is_junk(txt):
-            stats['dropped_junk'] += 1
-            if verbose:
-                print(f"Drop junk row: mandala={m},sukta={s},verse={v},text_snip={txt[:60]!r}")
-            continue
-        if len(txt) < min_length:
-            stats['dropped_junk'] += 1
-            if verbose:
-                print(f"Drop short row (<{min_length}): mandala={m},sukta={s},verse={v},len={len(txt)}")
-            continue
-        cand.append({
-            'mandala': m, 'sukta': s, 'verse_index': v,
-            'translation_text': txt
-        })
-
-    # group by (mandala,sukta,verse_index)
-    groups = defaultdict(list)
-    for r in cand:
-        key = (r['mandala'], r['sukta'], r['verse_index'])
-        groups[key].append(r)
-
-    stats['dedup_groups'] = len(groups)
-
-    for key, rows in groups.items():
-        if len(rows) == 1:
-            # single candidate: keep
-            cleaned_rows.append(rows[0])
-            stats['kept'] += 1
-        else:
-            # dedupe & select best
-            best, others, best_score = dedupe_and_select(rows)
-            cleaned_rows.append(best)
-            stats['kept'] += 1
-            # if best score is low or other rows have close scores, mark for review
-            # compute score gap
-            others_scores = [score_text(o['translation_text']) for o in others]
-            gap = (best_score - max(others_scores)) if others_scores else best_score
-            if best_score < review_thresh or gap < 5:
-                stats['ambiguous_groups'] += 1
-                # include all rows for review
-                for r in rows:
-                    review_rows.append({
-                        'mandala': r['mandala'],
-                        'sukta': r['sukta'],
-                        'verse_index': r['verse_index'],
-                        'translation_text': r['translation_text'],
-                        'score': score_text(r['translation_text'])
-                    })
+    txt = df['translation_text'].str.strip()
+    feats = text_features(txt)
+    intro = (df['mandala_i'] <= 0) | (df['sukta_i'] <= 0)
+    junk = ~intro & junk_mask(feats)
+    short = ~intro & ~junk & (feats['length'] < min_length)
+    stats['dropped_junk'] = int((intro | junk | short).sum())
+    if verbose:
+        for i in df.index[intro | junk | short]:
+            m = df.at[i, 'mandala_i']; s = df.at[i, 'sukta_i']; v = df.at[i, 'verse_i']; t = txt[i]
+            if intro[i]:
+                print(f"Drop header/intro row: mandala={m},sukta={s},len={len(t)}")
+            elif junk[i]:
+                print(f"Drop junk row: mandala={m},sukta={s},verse={v},text_snip={t[:60]!r}")
+            else:
+                print(f"Drop short row (<{min_length}): mandala={m},sukta={s},verse={v},len={len(t)}")
+
+    keep = ~(intro | junk | short)
+    cand = df.loc[keep, ['mandala_i', 'sukta_i', 'verse_i']].rename(
+        columns={'mandala_i': 'mandala', 'sukta_i': 'sukta', 'verse_i': 'verse_index'})
+    cand['translation_text'] = txt[keep]
+    cand['score'] = score_series(feats[keep])
+    cand = cand.reset_index(drop=True)
+
+    # group by (mandala,sukta,verse_index); best = first row with the highest score
+    keys = ['mandala', 'sukta', 'verse_index']
+    groups = cand.groupby(keys, sort=False)
+    best_idx = groups['score'].idxmax()
+    stats['dedup_groups'] = len(best_idx)
+    stats['kept'] = len(best_idx)
+    best = cand.loc[best_idx.values]
+    cleaned_rows = best[keys + ['translation_text']].to_dict('records')
+
+    # ambiguous multi-row groups (low best score, or runner-up within 5 points) go to review
+    size = groups['score'].transform('size')
+    best_score = groups['score'].transform('max')
+    is_best = cand.index.isin(best_idx.values)
+    runner_up = cand['score'].where(~is_best).groupby([cand[k] for k in keys], sort=False).transform('max')
+    ambiguous = (size > 1) & ((best_score < review_thresh) | (best_score - runner_up < 5))
+    stats['ambiguous_groups'] = int(cand.loc[ambiguous, keys].drop_duplicates().shape[0])
+    order = groups.ngroup()[ambiguous].sort_values(kind='stable').index  # group first-seen order, rows in input order
+    review_rows = cand.loc[order, keys + ['translation_text', 'score']].to_dict('records')
 
     return cleaned_rows, review_rows, stats
 
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+scripts/corpus_aggregates.py
+
+Precomputed aggregate cube for the app's stats and dashboards, emitted by
+parse_rigveda.py and merge_translations.py next to their JSONL output
+(<output>_aggregates.json), so charts roll up a few hundred cells instead of
+grouping every verse on each interaction.
+
+Cube: one cell per (mandala, deity, metre, rishi) with additive measures
+  verses, translated, sanskrit_chars, padas, translation_words
+so any roll-up (verses per deity per mandala, metre distribution, translation
+coverage = translated / verses, average verse length = sanskrit_chars / verses)
+is a sum over cells. Deity/metre/rishi labels are trimmed and the ASCII ':' the
+sources use for visarga is folded (इन्द्र: and इन्द्रः are one deity).
+
+check_aggregates() recomputes the cube from the written JSONL with an independent
+pandas groupby and lists every disagreement. It is opt-in (--check here, or
+--check-aggregates on the pipeline scripts) since it is a second pass over the output.
+
+Usage:
+  python scripts/corpus_aggregates.py \
+    --dataset data/processed/rigveda_with_translations.jsonl [--check] [--by mandala deity]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from corpus_store import _iter_jsonl, file_fingerprint
+
+AGGREGATES_VERSION = 1
+DIMENSIONS = ("mandala", "deity", "metre", "rishi")
+MEASURES = ("verses", "translated", "sanskrit_chars", "padas", "translation_words")
+
+
+def aggregates_path(dataset_path) -> str:
+    return os.path.splitext(str(dataset_path))[0] + "_aggregates.json"
+
+
+def label(value) -> Optional[str]:
+    """Dimension label: trimmed, ASCII ':' after Devanagari folded to visarga; None if empty."""
+    from parse_rigveda import ASCII_VISARGA_RE
+
+    if value is None or value != value:  # None / NaN
+        return None
+    s = ASCII_VISARGA_RE.sub("ः", str(value).strip())
+    return s or None
+
+
+def _int(v) -> int:
+    try:
+        return int(float(v))
+    except (TypeError, ValueError):
+        return 0
+
+
+class AggregateBuilder:
+    """Accumulates the cube from records as they stream to the output file."""
+
+    def __init__(self):
+        self.cells: Dict[tuple, List[int]] = {}
+
+    def add(self, rec: Dict[str, Any]):
+        key = (_int(rec.get("mandala")), label(rec.get("deity")), label(rec.get("metre")), label(rec.get("rishi")))
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = [0] * len(MEASURES)
+        translation = rec.get("translation") or ""
+        cell[0] += 1
+        cell[1] += 1 if translation.strip() else 0
+        cell[2] += len(rec.get("sanskrit") or "")
+        cell[3] += len(rec.get("padas") or [])
+        cell[4] += len(translation.split())
+
+    def feed(self, records: Iterable[Dict[str, Any]]):
+        """Pass records through unchanged while adding them (wraps the writer's record stream)."""
+        for rec in records:
+            self.add(rec)
+            yield rec
+
+    def to_json(self, source=None) -> Dict[str, Any]:
+        cells = sorted(self.cells.items(), key=lambda kv: tuple("" if k is None else str(k).zfill(3) for k in kv[0]))
+        totals = [sum(c[i] for c in self.cells.values()) for i in range(len(MEASURES))]
+        return {
+            "aggregates_version": AGGREGATES_VERSION,
+            "generated_at": datetime.now().isoformat(),
+            "source": str(source) if source else None,
+            "source_fingerprint": file_fingerprint(source) if source else None,
+            "dimensions": list(DIMENSIONS),
+            "measures": list(MEASURES),
+            "totals": dict(zip(MEASURES, totals)),
+            "cells": [list(k) + v for k, v in cells],
+        }
+
+
+def write_aggregates(builder: AggregateBuilder, dataset_path, out_path=None, check: bool = False) -> Dict[str, Any]:
+    """Write the cube for a finished JSONL; with check, verify it against the file (problems are printed)."""
+    out_path = out_path or aggregates_path(dataset_path)
+    data = builder.to_json(dataset_path)
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, out_path)
+    if check:
+        problems = check_aggregates(out_path, dataset_path)
+        for p in problems[:20]:
+            print(f"Aggregate check: {p}", file=sys.stderr)
+        data["check_problems"] = len(problems)
+    return data
+
+
+def build_aggregates(dataset_path, out_path=None, check: bool = False) -> Dict[str, Any]:
+    """Compute the cube from an existing JSONL (for datasets written before the pipeline emitted it)."""
+    builder = AggregateBuilder()
+    for rec in _iter_jsonl(dataset_path):
+        builder.add(rec)
+    return write_aggregates(builder, dataset_path, out_path, check)
+
+
+# ---------- Check ----------
+
+def check_aggregates(agg_path, dataset_path) -> List[str]:
+    """
+    Recompute the cube from the JSONL with pandas (a separate code path from AggregateBuilder)
+    and compare cell by cell; returns human-readable problems, empty when they agree. Records are
+    streamed and only their dimension labels and measures are kept, not the verse text.
+    """
+    import pandas as pd
+
+    with open(agg_path, "r", encoding="utf-8") as fh:
+        agg = json.load(fh)
+    problems = []
+    if agg.get("source_fingerprint") and agg["source_fingerprint"] != file_fingerprint(dataset_path):
+        problems.append(f"{agg_path} was built from a different version of {dataset_path}")
+
+    rows = []
+    for rec in _iter_jsonl(dataset_path):
+        translation, sanskrit, padas = rec.get("translation"), rec.get("sanskrit"), rec.get("padas")
+        rows.append((
+            rec.get("mandala"), label(rec.get("deity")), label(rec.get("metre")), label(rec.get("rishi")), 1,
+            int(isinstance(translation, str) and bool(translation.strip())),
+            len(sanskrit) if isinstance(sanskrit, str) else 0,
+            len(padas) if isinstance(padas, list) else 0,
+            len(translation.split()) if isinstance(translation, str) else 0,
+        ))
+    raw = pd.DataFrame(rows, columns=list(DIMENSIONS) + list(MEASURES))
+    raw["mandala"] = pd.to_numeric(raw["mandala"], errors="coerce").fillna(0).astype(int)
+    # Compare on a "" sentinel for missing labels (pandas turns None into NaN in string columns)
+    labels = [d for d in DIMENSIONS if d != "mandala"]
+    raw[labels] = raw[labels].astype(object).fillna("")
+    expected = raw.groupby(list(DIMENSIONS))[list(MEASURES)].sum()
+    cube = aggregates_frame(agg)
+    cube[labels] = cube[labels].astype(object).fillna("")
+    cube = cube.set_index(list(DIMENSIONS))[list(MEASURES)]
+
+    for key in expected.index.difference(cube.index):
+        problems.append(f"missing cell {tuple(key)}")
+    for key in cube.index.difference(expected.index):
+        problems.append(f"cell {tuple(key)} has no verses in the dataset")
+    both = expected.index.intersection(cube.index)
+    diff = (expected.loc[both] != cube.loc[both]).any(axis=1)
+    for key in diff[diff].index:
+        problems.append(f"cell {tuple(key)}: {cube.loc[key].tolist()} != {expected.loc[key].tolist()}")
+    totals = {m: int(raw[m].sum()) for m in MEASURES}
+    if agg.get("totals") != totals:
+        problems.append(f"totals {agg.get('totals')} != {totals}")
+    return problems
+
+
+# ---------- Read ----------
+
+def aggregates_frame(agg: Dict[str, Any]):
+    import pandas as pd
+    return pd.DataFrame(agg["cells"], columns=list(agg["dimensions"]) + list(agg["measures"]))
+
+
+class Aggregates:
+    """Loaded cube; roll-ups are groupbys over its few hundred cells, independent of corpus size."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.cells = aggregates_frame(data)
+        self.totals: Dict[str, int] = data["totals"]
+
+    @classmethod
+    def load(cls, path) -> "Aggregates":
+        with open(path, "r", encoding="utf-8") as fh:
+            return cls(json.load(fh))
+
+    def rollup(self, by: Sequence[str], mandala=None):
+        """Measures summed over `by` (optionally within one mandala), plus coverage and averages."""
+        cells = self.cells if mandala is None else self.cells[self.cells["mandala"] == int(mandala)]
+        out = cells.fillna({d: "(unknown)" for d in DIMENSIONS if d != "mandala"})
+        out = out.groupby(list(by), sort=True)[list(MEASURES)].sum() if by else out[list(MEASURES)].sum().to_frame().T
+        out["coverage_%"] = out["translated"] / out["verses"].where(out["verses"] > 0) * 100
+        out["avg_sanskrit_chars"] = out["sanskrit_chars"] / out["verses"].where(out["verses"] > 0)
+        out["avg_translation_words"] = out["translation_words"] / out["translated"].where(out["translated"] > 0)
+        return out
+
+    def top(self, dim: str, n: int = 15, mandala=None):
+        """The n largest labels of a dimension by verse count."""
+        return self.rollup([dim], mandala).sort_values("verses", ascending=False).head(n)
+
+
+def aggregates_is_fresh(dataset_path, path) -> bool:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            agg = json.load(fh)
+    except (OSError, ValueError):
+        return False
+    return (agg.get("aggregates_version") == AGGREGATES_VERSION
+            and agg.get("source_fingerprint") == file_fingerprint(dataset_path))
+
+
+def open_aggregates(dataset_path, path=None, rebuild_stale: bool = True) -> Aggregates:
+    """Load the cube for a dataset, computing it first if missing or older than the JSONL."""
+    path = path or aggregates_path(dataset_path)
+    if rebuild_stale and not aggregates_is_fresh(dataset_path, path):
+        return Aggregates(build_aggregates(dataset_path, path))
+    return Aggregates.load(path)
+
+
+# ---------- CLI ----------
+
+def main():
+    p = argparse.ArgumentParser(description="Build/check the aggregate cube for a processed dataset")
+    p.add_argument("--dataset", default="data/processed/rigveda_with_translations.jsonl", help="Input JSONL")
+    p.add_argument("--out", default=None, help="Aggregates JSON (default: <dataset>_aggregates.json)")
+    p.add_argument("--check", action="store_true", help="Only verify an existing aggregates file against the dataset")
+    p.add_argument("--by", nargs="*", default=["mandala"], help="Print a roll-up by these dimensions")
+    args = p.parse_args()
+
+    out = args.out or aggregates_path(args.dataset)
+    if args.check:
+        problems = check_aggregates(out, args.dataset)
+        for prob in problems:
+            print(prob)
+        print(f"{len(problems)} problem(s) in {out}")
+        return 1 if problems else 0
+    data = build_aggregates(args.dataset, out, check=True)
+    print(f"Wrote {len(data['cells'])} cells ({data['totals']['verses']} verses) to {out}; "
+          f"check: {data['check_problems']} problem(s)")
+    if args.by:
+        print(Aggregates(data).rollup(args.by).round(1).to_string())
+    return 1 if data["check_problems"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+scripts/corpus_db.py
+
+Optional SQLite backend for the verse browser, compiled from the processed JSONL:
+
+  - verses      : one row per record (row = JSONL line order, the same row ids as the
+                  corpus store), typed filter columns plus the record itself as JSON
+  - B-tree indexes on (mandala, sukta, verse_index), deity and rishi (NOCASE); the deity and
+                  rishi substring filters match deity_key / rishi_key, the labels folded with
+                  search_index.fold() as StoreQuery folds them, so both backends return the same rows
+  - verses_fts  : contentless FTS5 table over sanskrit / translation / transliteration,
+                  holding the same folded tokens as search_index.py (accents stripped;
+                  the 'ascii' tokenizer keeps Devanagari words whole), with prefix
+                  indexes for search-as-you-type
+  - meta        : db version and source fingerprint (staleness check, as for the store)
+
+VerseDB is the query layer the app uses with this backend: filters, full-text search,
+ordering and LIMIT/OFFSET paging run inside SQLite, so only the visible page or verse is
+ever materialized in Python. Query syntax is the one of search_index.py (terms, agn*,
+"phrases"; all clauses must match, ranked by bm25). StoreQuery offers the same interface
+over the columnar store + inverted index, so the app can switch backends.
+
+Usage:
+  python scripts/corpus_db.py \
+    --dataset data/processed/rigveda_with_translations.jsonl \
+    [--out data/processed/rigveda_with_translations.sqlite] [--query 'agni "chosen priest"' --mandala 1]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import sqlite3
+import queue
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from corpus_store import CANONICAL_COLUMNS, INT_COLUMNS, PAGE_COLUMNS, _coerce_int, _iter_jsonl, file_fingerprint
+from search_index import QUERY_RE, field_tokens, fold, tokenize
+
+DB_VERSION = 4
+# FTS columns -> (record field, fallback); sanskrit is indexed from the folded search key
+FTS_FIELDS = (("sanskrit", "search_key", "sanskrit"), ("translation", "translation", None),
+              ("transliteration", "transliteration", None))
+INSERT_BATCH = 2000
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE verses (
+    row INTEGER PRIMARY KEY,
+    id TEXT,
+    mandala INTEGER NOT NULL,
+    sukta INTEGER NOT NULL,
+    verse_index INTEGER NOT NULL,
+    deity TEXT COLLATE NOCASE,
+    rishi TEXT COLLATE NOCASE,
+    deity_key TEXT NOT NULL,
+    rishi_key TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX verses_msv ON verses (mandala, sukta, verse_index);
+CREATE INDEX verses_deity ON verses (deity);
+CREATE INDEX verses_rishi ON verses (rishi);
+CREATE VIRTUAL TABLE verses_fts USING fts5 (sanskrit, translation, transliteration, content='', prefix='2 3', tokenize='ascii');
+"""
+
+
+def default_db_path(dataset_path) -> Path:
+    return Path(dataset_path).with_suffix(".sqlite")
+
+
+def fts5_available() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE t USING fts5 (a)")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+# ---------- Build ----------
+
+def build_db(dataset_path, out_path=None) -> Path:
+    """Read the JSONL once and write the database (to a temp file swapped in at the end)."""
+    if not fts5_available():
+        raise RuntimeError("This Python's sqlite3 was built without FTS5; the SQLite backend is unavailable")
+    dataset_path = Path(dataset_path)
+    out_path = Path(out_path) if out_path else default_db_path(dataset_path)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    con = sqlite3.connect(tmp_path)
+    try:
+        con.execute("PRAGMA journal_mode = OFF")
+        con.execute("PRAGMA synchronous = OFF")
+        con.executescript(SCHEMA)
+        verses, fts = [], []
+        # Column kinds as the corpus store types them ("int" / "str" / "json"), for exports from the records
+        kinds = {c: "int" if c in INT_COLUMNS else "str" for c in CANONICAL_COLUMNS}
+        n = 0
+        for row, rec in enumerate(_iter_jsonl(dataset_path)):
+            for k, v in rec.items():
+                if kinds.setdefault(k, "str") == "str" and v is not None and not isinstance(v, str):
+                    kinds[k] = "json"
+            verses.append((row, rec.get("id"), _coerce_int(rec.get("mandala")), _coerce_int(rec.get("sukta")),
+                           _coerce_int(rec.get("verse_index")), rec.get("deity"), rec.get("rishi"),
+                           filter_key(rec.get("deity")), filter_key(rec.get("rishi")), orjson.dumps(rec).decode("utf-8")))
+            fts.append((row,) + tuple(" ".join(field_tokens(rec, field, fallback)) for _, field, fallback in FTS_FIELDS))
+            n += 1
+            if len(verses) >= INSERT_BATCH:
+                _insert(con, verses, fts)
+        _insert(con, verses, fts)
+        con.execute("INSERT INTO verses_fts (verses_fts) VALUES ('optimize')")
+        meta = {
+            "db_version": DB_VERSION,
+            "source": str(dataset_path),
+            "source_fingerprint": file_fingerprint(dataset_path),
+            "rows": n,
+            "columns": kinds,
+        }
+        con.executemany("INSERT INTO meta VALUES (?, ?)", [(k, json.dumps(v)) for k, v in meta.items()])
+        con.commit()
+        con.execute("ANALYZE")
+    finally:
+        con.close()
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def _insert(con, verses: list, fts: list):
+    con.executemany("INSERT INTO verses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", verses)
+    con.executemany("INSERT INTO verses_fts (rowid, sanskrit, translation, transliteration) VALUES (?, ?, ?, ?)", fts)
+    verses.clear()
+    fts.clear()
+
+
+# ---------- Query ----------
+
+def fts_query(query: str, prefix_last: bool = False) -> Optional[str]:
+    """
+    Translate search_index.py query syntax into an FTS5 MATCH expression over the folded
+    tokens; None when the query has no searchable words.
+    """
+    clauses = []
+    matches = list(QUERY_RE.finditer(query or ""))
+    for qi, m in enumerate(matches):
+        words = tokenize(m.group(1) if m.group(1) is not None else m.group(2))
+        if not words:
+            continue
+        phrase = '"' + " ".join(words) + '"'  # tokens hold no quotes, so no escaping is needed
+        if m.group(1) is None and len(words) == 1 and (m.group(2).endswith("*") or (prefix_last and qi == len(matches) - 1)):
+            phrase += "*"
+        clauses.append(phrase)
+    return " AND ".join(clauses) if clauses else None
+
+
+def filter_key(value) -> str:
+    """Matching form of a deity/rishi label or filter (search_index.fold); "" for missing labels."""
+    return fold(str(value)) if value else ""
+
+
+class VerseDB:
+    """
+    Read-only query layer over the database. Filter keywords (all optional) are
+    mandala, sukta, verse_index, deity (substring of the folded label, see filter_key), rishi (same) and
+    text (full-text query; results are then ranked instead of in canonical order).
+    """
+
+    def __init__(self, path, pool_size: int = 1):
+        self.path = Path(path)
+        # Read-only connections shared by the app's sessions / API request threads. A sqlite3
+        # connection must not be used by two threads at once, so each query checks one out.
+        self.pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        for _ in range(max(1, pool_size)):
+            self.pool.put(sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False))
+        self.meta = {k: json.loads(v) for k, v in self._all("SELECT key, value FROM meta")}
+        if self.meta.get("db_version") != DB_VERSION:
+            raise RuntimeError(f"Unsupported database version in {self.path}: {self.meta.get('db_version')}")
+        self.mandalas: List[int] = [r[0] for r in self._all("SELECT DISTINCT mandala FROM verses ORDER BY mandala")]
+        self._ints: Dict[str, np.ndarray] = {}
+
+    def _all(self, sql: str, params=()) -> list:
+        con = self.pool.get()
+        try:
+            return con.execute(sql, params).fetchall()
+        finally:
+            self.pool.put(con)
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    # ---------- Column reads (the CorpusStore surface corpus_export.py uses) ----------
+
+    @property
+    def kinds(self) -> Dict[str, str]:
+        return self.meta["columns"]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.kinds)
+
+    @property
+    def export_source(self) -> "VerseDB":
+        return self
+
+    def int_column(self, name: str) -> np.ndarray:
+        """int32 array for mandala/sukta/verse_index in row order (read once, then cached)."""
+        if name not in self._ints:
+            if self.kinds.get(name) != "int":
+                raise KeyError(f"{name} is not an integer column")
+            rows = self._all(f"SELECT {name} FROM verses ORDER BY row")
+            self._ints[name] = np.fromiter((r[0] for r in rows), dtype=np.int32, count=len(rows))
+        return self._ints[name]
+
+    def text_column(self, name: str, rows: Optional[Iterable[int]] = None) -> list:
+        """Decode a text column (or only the given rows, in that order) from the stored records."""
+        kind = self.kinds.get(name)
+        if kind not in ("str", "json"):
+            raise KeyError(f"{name} is not a text column")
+        # ->> extracts the SQL text, -> the JSON text of lists/numbers (decoded below)
+        expr = f"verses.record {'->>' if kind == 'str' else '->'} ?"
+        path = f'$."{name}"'
+        if rows is None:
+            values = self._all(f"SELECT {expr} FROM verses ORDER BY verses.row", (path,))
+        else:
+            values = self._all(f"SELECT {expr} FROM json_each(?) AS sel JOIN verses ON verses.row = sel.value "
+                               "ORDER BY sel.key", (path, json.dumps([int(r) for r in rows])))
+        if kind == "str":
+            return [r[0] for r in values]
+        return [None if r[0] is None else orjson.loads(r[0]) for r in values]
+
+    def sukta_options(self, mandala=None) -> List[int]:
+        if mandala is None:
+            return [r[0] for r in self._all("SELECT DISTINCT sukta FROM verses ORDER BY sukta")]
+        return [r[0] for r in self._all("SELECT DISTINCT sukta FROM verses WHERE mandala = ? ORDER BY sukta", (int(mandala),))]
+
+    def verse_options(self, mandala=None, sukta=None) -> List[int]:
+        sql, params = self._where(mandala=mandala, sukta=sukta)
+        return [r[0] for r in self._all(f"SELECT DISTINCT verse_index {sql} ORDER BY verse_index", params)]
+
+    @property
+    def mandala_counts(self):
+        import pandas as pd
+        rows = self._all("SELECT mandala, COUNT(*) FROM verses GROUP BY mandala ORDER BY mandala")
+        return pd.DataFrame(rows, columns=["mandala", "count"])
+
+    def _where(self, mandala=None, sukta=None, verse_index=None, deity=None, rishi=None,
+               text=None, prefix_last: bool = False) -> Tuple[str, list]:
+        """FROM/WHERE clause and parameters for a set of filters."""
+        conds, params = [], []
+        src = "FROM verses"
+        if text:
+            match = fts_query(text, prefix_last)
+            src = "FROM verses_fts JOIN verses ON verses.row = verses_fts.rowid"
+            conds.append("verses_fts MATCH ?")
+            params.append(match if match is not None else '""')
+        for col, val in (("mandala", mandala), ("sukta", sukta), ("verse_index", verse_index)):
+            if val is not None:
+                conds.append(f"verses.{col} = ?")
+                params.append(int(val))
+        for col, val in (("deity", deity), ("rishi", rishi)):
+            if val:
+                conds.append(f"instr(verses.{col}_key, ?) > 0")
+                params.append(filter_key(val))
+        return (src + (" WHERE " + " AND ".join(conds) if conds else "")), params
+
+    @staticmethod
+    def _order(filters) -> str:
+        if filters.get("text"):
+            return " ORDER BY verses_fts.rank, verses.row"
+        return " ORDER BY verses.mandala, verses.sukta, verses.verse_index, verses.row"
+
+    def count(self, **filters) -> int:
+        sql, params = self._where(**filters)
+        return self._all(f"SELECT COUNT(*) {sql}", params)[0][0]
+
+    def row_ids(self, **filters) -> np.ndarray:
+        """Matching row ids in result order (same ids as the corpus store, e.g. for export)."""
+        sql, params = self._where(**filters)
+        rows = self._all(f"SELECT verses.row {sql}{self._order(filters)}", params)
+        return np.fromiter((r[0] for r in rows), dtype=np.intp, count=len(rows))
+
+    def records(self, offset: int = 0, limit: int = 1, **filters) -> List[Dict[str, Any]]:
+        """Records [offset, offset + limit) of the result, as plain Python values."""
+        sql, params = self._where(**filters)
+        rows = self._all(f"SELECT verses.record {sql}{self._order(filters)} LIMIT ? OFFSET ?",
+                         params + [int(limit), int(offset)])
+        return [orjson.loads(r[0]) for r in rows]
+
+    def page(self, offset: int, limit: int, columns=PAGE_COLUMNS, **filters):
+        """One window of the results table (same frame as Corpus.page), selected with LIMIT/OFFSET."""
+        import pandas as pd
+        sql, params = self._where(**filters)
+        cols = ", ".join(f"verses.{c}" if c in ("id", "mandala", "sukta", "verse_index", "deity", "rishi")
+                         else f"json_extract(verses.record, '$.{c}')" for c in columns)
+        rows = self._all(f"SELECT {cols} {sql}{self._order(filters)} LIMIT ? OFFSET ?",
+                         params + [int(limit), int(offset)])
+        out = pd.DataFrame(rows, columns=list(columns))
+        out.insert(0, "label", "M" + out["mandala"].astype(str) + " S" + out["sukta"].astype(str)
+                   + " V" + out["verse_index"].astype(str))
+        out.index = pd.RangeIndex(offset, offset + len(out), name="result")
+        return out
+
+
+class StoreQuery:
+    """
+    The VerseDB interface over the columnar store and inverted index (the default backend),
+    so the app drives both the same way. Row positions of the last filter set are kept, as
+    one rerun asks for the count, the viewed verse and a table page of the same result.
+    """
+
+    def __init__(self, corpus, index):
+        self.corpus = corpus
+        self.index = index
+        self.mandalas = corpus.mandalas
+        self.mandala_counts = corpus.mandala_counts
+        self.sukta_options = corpus.sukta_options
+        self.verse_options = corpus.verse_options
+        self._last: Tuple[Optional[tuple], Optional[np.ndarray]] = (None, None)
+        # Folded deity/rishi labels (as VerseDB stores them), for the substring filters
+        self.filter_keys = {col: corpus.df[col].map(filter_key) for col in ("deity", "rishi")}
+
+    def __len__(self) -> int:
+        return len(self.corpus)
+
+    @property
+    def export_source(self):
+        """What corpus_export.py reads rows from for this backend."""
+        return self.corpus.store
+
+    def row_ids(self, mandala=None, sukta=None, verse_index=None, deity=None, rishi=None,
+                text=None, prefix_last: bool = False) -> np.ndarray:
+        key = (mandala, sukta, verse_index, deity, rishi, text, prefix_last)
+        last_key, last_rows = self._last  # one read: the instance is shared by app sessions
+        if last_key == key:
+            return last_rows
+        # Browse selection is a dict lookup of precomputed row positions; no full-frame copy or mask scan
+        rows = self.corpus.select(mandala, sukta, verse_index)
+        for col, val in (("deity", deity), ("rishi", rishi)):
+            if val:
+                rows = rows[self.filter_keys[col].iloc[rows].str.contains(filter_key(val), regex=False).to_numpy()]
+        if text:
+            # posting-list lookup in the inverted index; keep its relevance order
+            hits, _scores = self.index.search(text, prefix_last=prefix_last)
+            rows = hits[np.isin(hits, rows)]
+        else:
+            # precomputed (mandala, sukta, verse_index) rank, no frame sort
+            rows = self.corpus.sort_rows(rows)
+        self._last = (key, rows)
+        return rows
+
+    def count(self, **filters) -> int:
+        return len(self.row_ids(**filters))
+
+    def records(self, offset: int = 0, limit: int = 1, **filters) -> List[Dict[str, Any]]:
+        return [self.corpus.record(r) for r in self.row_ids(**filters)[offset:offset + limit]]
+
+    def page(self, offset: int, limit: int, columns=PAGE_COLUMNS, **filters):
+        return self.corpus.page(self.row_ids(**filters), offset, limit, columns)
+
+
+def db_is_fresh(dataset_path, db_path) -> bool:
+    if not Path(db_path).exists():
+        return False
+    try:
+        con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            meta = {k: json.loads(v) for k, v in con.execute("SELECT key, value FROM meta")}
+        finally:
+            con.close()
+    except (sqlite3.Error, ValueError):
+        return False
+    return (meta.get("db_version") == DB_VERSION
+            and meta.get("source_fingerprint") == file_fingerprint(dataset_path))
+
+
+def open_db(dataset_path, db_path=None, rebuild_stale: bool = True, pool_size: int = 1) -> VerseDB:
+    """Open the database for a dataset, (re)building it first if it is missing or older than the JSONL."""
+    db_path = Path(db_path) if db_path else default_db_path(dataset_path)
+    if rebuild_stale and not db_is_fresh(dataset_path, db_path):
+        build_db(dataset_path, db_path)
+    return VerseDB(db_path, pool_size)
+
+
+# ---------- CLI ----------
+
+def main():
+    p = argparse.ArgumentParser(description="Compile processed JSONL into the SQLite (FTS5) backend and optionally query it")
+    p.add_argument("--dataset", default="data/processed/rigveda_with_translations.jsonl", help="Input JSONL")
+    p.add_argument("--out", default=None, help="Database file (default: <dataset>.sqlite)")
+    p.add_argument("--query", default=None, help="Full-text query to run after building")
+    p.add_argument("--mandala", type=int, default=None)
+    p.add_argument("--deity", default=None)
+    p.add_argument("--limit", type=int, default=10)
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
+    out = build_db(args.dataset, args.out)
+    db = VerseDB(out)
+    print(f"Wrote {len(db)} rows to {out} ({os.path.getsize(out) / 1e6:.1f} MB) in {time.perf_counter() - t0:.2f}s")
+    if args.query or args.mandala is not None or args.deity:
+        filters = {"text": args.query, "mandala": args.mandala, "deity": args.deity}
+        t0 = time.perf_counter()
+        n = db.count(**filters)
+        print(f"{n} hits in {(time.perf_counter() - t0) * 1000:.3f} ms")
+        print(db.page(0, args.limit, **filters).to_string())
+
+
+if __name__ == "__main__":
+    main()
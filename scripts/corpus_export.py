@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+scripts/corpus_export.py
+
+Streaming export of corpus rows (all, or a filtered/ordered selection) from the
+columnar store or the SQLite database (corpus_db.VerseDB, which exposes the same
+column reads). Rows are encoded a column batch at a time and yielded as byte
+chunks, so neither the full result nor its serialized form is held in memory.
+
+Formats:
+  - jsonl, jsonl.gz, jsonl.zst   : one JSON object per line; with pyarrow each batch is
+                                   assembled column-wise from JSON fragments (store text
+                                   columns are wrapped zero-copy), else orjson per row
+  - csv,   csv.gz,   csv.zst     : header + rows; list-valued columns (padas) as JSON text
+  - parquet                      : row groups of batch_size rows (requires pyarrow)
+
+gzip uses the stdlib; zstd needs the optional 'zstandard' package.
+
+Usage:
+  python scripts/corpus_export.py \
+    --dataset data/processed/rigveda_with_translations.jsonl \
+    --out exports/rigveda.jsonl.gz \
+    [--format jsonl.gz] [--mandala 1] [--batch-size 2048]
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import io
+import sys
+import zlib
+from typing import BinaryIO, Iterable, Iterator, List, Optional
+
+import numpy as np
+import orjson
+
+from corpus_store import CorpusStore, open_store
+
+DEFAULT_BATCH_SIZE = 2048
+EXPORT_FORMATS = ["jsonl", "jsonl.gz", "jsonl.zst", "csv", "csv.gz", "csv.zst", "parquet"]
+# JSON string escapes (as orjson writes them); control characters are only replaced when present
+JSON_ESCAPES = [("\\", "\\\\"), ('"', '\\"')]
+JSON_CONTROL_ESCAPES = [(chr(c), {8: "\\b", 9: "\\t", 10: "\\n", 12: "\\f", 13: "\\r"}.get(c, f"\\u{c:04x}"))
+                        for c in range(0x20)]
+EXPORT_MIME = {
+    "jsonl": "application/json", "csv": "text/csv", "parquet": "application/octet-stream",
+    "gz": "application/gzip", "zst": "application/zstd",
+}
+
+
+def export_mime(fmt: str) -> str:
+    return EXPORT_MIME[fmt.rsplit(".", 1)[-1]]
+
+
+def _batches(store: CorpusStore, rows: Optional[np.ndarray], columns: List[str], batch_size: int):
+    """
+    Yield (n, {column: list of values}) per batch, decoding only the rows in the batch. `store` is
+    a CorpusStore or anything with the same kinds/int_column/text_column reads (corpus_db.VerseDB).
+    """
+    if rows is None:
+        rows = np.arange(len(store))
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        cols = {}
+        for c in columns:
+            if store.kinds[c] == "int":
+                cols[c] = np.asarray(store.int_column(c))[batch].tolist()
+            else:
+                cols[c] = store.text_column(c, batch.tolist())
+        yield len(batch), cols
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return None
+    return pa, pc
+
+
+def _arrow_batches(store, rows: Optional[np.ndarray], columns: List[str], batch_size: int):
+    """
+    Yield (n, [large_string array of JSON text per value, null where missing] per column) per batch.
+    Store text columns already have Arrow's layout (UTF-8 blob + int64 offsets), so they are wrapped
+    without copying and each batch is a take(); other sources go through _batches.
+    """
+    pa, pc = _pyarrow()
+    text = pa.large_string()
+    quote, empty = pa.scalar('"', text), pa.scalar("", text)
+
+    def fragments(kind, arr):
+        if kind == "int":
+            return pc.cast(arr, text)
+        if kind == "json":  # stored as JSON text
+            return arr
+        for a, b in JSON_ESCAPES:
+            arr = pc.replace_substring(arr, a, b)
+        if pc.any(pc.match_substring_regex(arr, "[\\x00-\\x1f]")).as_py():
+            for a, b in JSON_CONTROL_ESCAPES:
+                arr = pc.replace_substring(arr, a, b)
+        return pc.binary_join_element_wise(quote, arr, quote, empty)
+
+    kinds = [store.kinds[c] for c in columns]
+    if not isinstance(store, CorpusStore):
+        for n, cols in _batches(store, rows, columns, batch_size):
+            arrays = []
+            for c, kind in zip(columns, kinds):
+                if kind == "json":
+                    arr = pa.array([None if v is None else orjson.dumps(v).decode("utf-8") for v in cols[c]], text)
+                else:
+                    arr = pa.array(cols[c], pa.int64() if kind == "int" else text)
+                arrays.append(fragments(kind, arr))
+            yield n, arrays
+        return
+
+    full = []
+    for c, kind in zip(columns, kinds):
+        if kind == "int":
+            full.append(pa.array(np.asarray(store.int_column(c))))
+            continue
+        offsets, nulls, blob = store._text(c)
+        validity = np.packbits(~np.asarray(nulls, dtype=bool), bitorder="little")
+        full.append(pa.LargeStringArray.from_buffers(len(store), pa.py_buffer(np.ascontiguousarray(offsets)),
+                                                     pa.py_buffer(blob), pa.py_buffer(validity)))
+    if rows is None:
+        rows = np.arange(len(store))
+    for start in range(0, len(rows), batch_size):
+        batch = pa.array(rows[start:start + batch_size])
+        yield len(batch), [fragments(kind, arr.take(batch)) for kind, arr in zip(kinds, full)]
+
+
+def iter_jsonl(store: CorpusStore, rows=None, columns=None, batch_size=DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    columns = list(columns or store.columns)
+    if _pyarrow() is None:
+        for _, cols in _batches(store, rows, columns, batch_size):
+            lines = [orjson.dumps(dict(zip(columns, vals))) for vals in zip(*(cols[c] for c in columns))]
+            lines.append(b"")
+            yield b"\n".join(lines)
+        return
+    pa, pc = _pyarrow()
+    text = pa.large_string()
+    keys = [pa.scalar(("{" if i == 0 else ",") + orjson.dumps(c).decode("utf-8") + ":", text) for i, c in enumerate(columns)]
+    null, end, empty = pa.scalar("null", text), pa.scalar("}\n", text), pa.scalar("", text)
+    for n, arrays in _arrow_batches(store, rows, columns, batch_size):
+        # '{"id":' + id + ',"mandala":' + mandala + ... + '}\n' per row, then the rows joined into one chunk
+        parts = [p for key, arr in zip(keys, arrays) for p in (key, pc.fill_null(arr, null))]
+        lines = pc.binary_join_element_wise(*parts, end, empty)
+        chunk = pc.binary_join(pa.LargeListArray.from_arrays(pa.array([0, n], pa.int64()), lines), empty)
+        yield chunk[0].as_buffer().to_pybytes()
+
+
+def iter_csv(store: CorpusStore, rows=None, columns=None, batch_size=DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    columns = list(columns or store.columns)
+    json_cols = [c for c in columns if store.kinds[c] == "json"]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for _, cols in _batches(store, rows, columns, batch_size):
+        for c in json_cols:
+            cols[c] = [None if v is None else orjson.dumps(v).decode("utf-8") for v in cols[c]]
+        writer.writerows(zip(*(cols[c] for c in columns)))
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+
+
+def compress_chunks(chunks: Iterable[bytes], codec: str, level: Optional[int] = None) -> Iterator[bytes]:
+    """Incrementally compress a byte stream with 'gz' or 'zst'."""
+    if codec == "gz":
+        comp = zlib.compressobj(level if level is not None else 6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+        for chunk in chunks:
+            out = comp.compress(chunk)
+            if out:
+                yield out
+        yield comp.flush()
+    elif codec == "zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd export requires the 'zstandard' package (pip install zstandard)")
+        comp = zstandard.ZstdCompressor(level=level if level is not None else 3).compressobj()
+        for chunk in chunks:
+            out = comp.compress(chunk)
+            if out:
+                yield out
+        yield comp.flush()
+    else:
+        raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def write_parquet(store: CorpusStore, out: BinaryIO, rows=None, columns=None, batch_size=DEFAULT_BATCH_SIZE):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires the 'pyarrow' package (pip install pyarrow)")
+    columns = list(columns or store.columns)
+    types = {
+        "int": pa.int32(), "str": pa.string(),
+        "json": pa.string(),  # list/number columns are kept as JSON text, as in the store
+    }
+    schema = pa.schema([(c, types[store.kinds[c]]) for c in columns])
+    json_cols = [c for c in columns if store.kinds[c] == "json"]
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        for _, cols in _batches(store, rows, columns, batch_size):
+            for c in json_cols:
+                cols[c] = [None if v is None else orjson.dumps(v).decode("utf-8") for v in cols[c]]
+            writer.write_table(pa.table(cols, schema=schema))
+
+
+def export(store: CorpusStore, fmt: str, out: BinaryIO, rows=None, columns=None, batch_size=DEFAULT_BATCH_SIZE) -> int:
+    """Write rows in the given format to a binary file object. Returns bytes written (0 for parquet)."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {EXPORT_FORMATS}")
+    if fmt == "parquet":
+        write_parquet(store, out, rows, columns, batch_size)
+        return 0
+    base, _, codec = fmt.partition(".")
+    chunks = (iter_jsonl if base == "jsonl" else iter_csv)(store, rows, columns, batch_size)
+    if codec:
+        chunks = compress_chunks(chunks, codec)
+    written = 0
+    for chunk in chunks:
+        out.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def main():
+    p = argparse.ArgumentParser(description="Stream the corpus (or a mandala/sukta slice) to JSONL/CSV/Parquet")
+    p.add_argument("--dataset", default="data/processed/rigveda_with_translations.jsonl", help="Processed JSONL (store is built next to it)")
+    p.add_argument("--out", required=True, help="Output path, or '-' for stdout")
+    p.add_argument("--format", default=None, choices=EXPORT_FORMATS, help="Default: inferred from --out extension")
+    p.add_argument("--mandala", type=int, default=None)
+    p.add_argument("--sukta", type=int, default=None)
+    p.add_argument("--columns", default=None, help="Comma-separated column list (default: all)")
+    p.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = p.parse_args()
+
+    fmt = args.format or next((f for f in sorted(EXPORT_FORMATS, key=len, reverse=True) if args.out.endswith("." + f)), None)
+    if fmt is None:
+        p.error("Cannot infer --format from --out; pass it explicitly")
+
+    store = open_store(args.dataset)
+    rows = None
+    if args.mandala is not None or args.sukta is not None:
+        mask = np.ones(len(store), dtype=bool)
+        if args.mandala is not None:
+            mask &= store.int_column("mandala") == args.mandala
+        if args.sukta is not None:
+            mask &= store.int_column("sukta") == args.sukta
+        rows = np.flatnonzero(mask)
+    columns = args.columns.split(",") if args.columns else None
+
+    if args.out == "-":
+        export(store, fmt, sys.stdout.buffer, rows, columns, args.batch_size)
+        return
+    with open(args.out, "wb") as fh:
+        export(store, fmt, fh, rows, columns, args.batch_size)
+    n = len(store) if rows is None else len(rows)
+    print(f"Exported {n} rows as {fmt} to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
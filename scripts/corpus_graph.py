@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+scripts/corpus_graph.py
+
+Co-occurrence graphs for the app's network view, compiled from the processed JSONL into
+scipy-sparse adjacency plus a precomputed layout, so the app only filters edges and never
+runs a layout on a rerun.
+
+Graphs (GRAPH_KINDS):
+  deity-rishi      bipartite; edge weight = verses of that deity by that rishi
+  deity-metre      bipartite; edge weight = verses of that deity in that metre
+  deity-comention  deities named in the translations (Griffith spellings, folded to one
+                   name per deity, e.g. Indu/Pavamana -> Soma); edge weight = pada-level
+                   clauses (split on punctuation) naming both
+
+Edges are stored per mandala (COO entries: mandala, row, col, weight), so a mandala filter
+is a mask plus sum_duplicates. Node labels are the header labels of corpus_aggregates.label()
+(trimmed, ASCII visarga folded), so इन्द्रः and इन्द्र: are one node.
+
+Layouts are force-directed (Fruchterman-Reingold on the all-mandala adjacency, log-scaled
+weights, fixed seed) and cached under layouts/<graph key>.npy, the key being a hash of the
+graph's nodes and edges plus the layout parameters: rebuilding after a dataset change reuses
+every layout whose graph did not change, and a filtered view keeps its nodes where they are.
+
+Layout (directory next to the dataset, e.g. rigveda_with_translations.graphs/):
+  - manifest.json          : source fingerprint; per graph: node labels, sides, graph key
+  - <kind>.npz             : edge_mandala, edge_row, edge_col, edge_weight (row < col)
+  - layouts/<key>.npy      : float32 (nodes, 2) positions in [-1, 1]
+
+Usage:
+  python scripts/corpus_graph.py \
+    --dataset data/processed/rigveda_with_translations.jsonl \
+    [--out data/processed/rigveda_with_translations.graphs] [--kind deity-rishi --top 20]
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import re
+import shutil
+import time
+import unicodedata
+from collections import defaultdict
+from datetime import datetime
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.spatial import cKDTree
+
+from corpus_aggregates import label
+from corpus_store import _coerce_int, _iter_jsonl, file_fingerprint
+from search_index import LATIN_MARKS_RE
+
+GRAPH_VERSION = 2
+GRAPH_KINDS = {
+    "deity-rishi": ("deity", "rishi"),
+    "deity-metre": ("deity", "metre"),
+    "deity-comention": ("deity", None),
+}
+
+# Deity -> Griffith spellings (after folding diacritics: Aśvins -> Asvins). Griffith capitalizes
+# deity names, so matching is case-sensitive to keep "dawn"/"heaven"/"earth" as common nouns out.
+MENTION_NAMES = {
+    "Agni": ("Agni", "Jatavedas", "Vaisvanara"),
+    "Indra": ("Indra",),
+    "Soma": ("Soma", "Indu", "Pavamana"),
+    "Varuna": ("Varuna",),
+    "Mitra": ("Mitra",),
+    "Rudra": ("Rudra",),
+    "Vayu": ("Vayu", "Vata"),
+    "Surya": ("Surya",),
+    "Savitar": ("Savitar",),
+    "Aditi": ("Aditi",),
+    "Adityas": ("Adityas",),
+    "Usas": ("Usas", "Dawn", "Dawns"),
+    "Dyaus": ("Dyaus", "Heaven"),
+    "Prthivi": ("Prthivi", "Earth"),
+    "Ashvins": ("Asvins", "Ashvins", "Nasatyas"),
+    "Maruts": ("Maruts", "Rudras"),
+    "Vishnu": ("Visnu", "Vishnu"),
+    "Pusan": ("Pusan",),
+    "Brhaspati": ("Brhaspati", "Brahmanaspati"),
+    "Aryaman": ("Aryaman",),
+    "Bhaga": ("Bhaga",),
+    "Tvastar": ("Tvastar",),
+    "Parjanya": ("Parjanya",),
+    "Sarasvati": ("Sarasvati",),
+    "Rbhus": ("Rbhus",),
+    "Vasus": ("Vasus",),
+    "Yama": ("Yama",),
+    "Prajapati": ("Prajapati",),
+    "Vishvadevas": ("Visvedevas", "All-Gods"),
+    "Vrtra": ("Vrtra",),
+}
+MENTION_CANONICAL = {alias: name for name, aliases in MENTION_NAMES.items() for alias in aliases}
+MENTION_RE = re.compile(r"\b(" + "|".join(sorted(map(re.escape, MENTION_CANONICAL), key=len, reverse=True)) + r")\b")
+CLAUSE_SPLIT_RE = re.compile(r"[.;:!?]+|\s\d+\s")
+
+# Layout parameters (part of the layout cache key)
+LAYOUT_ITERATIONS = 120
+LAYOUT_SEED = 7
+REPULSION_RADIUS = 2.0  # in units of the ideal edge length k
+
+
+def default_graphs_path(dataset_path) -> Path:
+    return Path(dataset_path).with_suffix(".graphs")
+
+
+def mentions(text: Optional[str]) -> List[List[str]]:
+    """Deities named per clause of a translation (clauses without two or more are kept for node counts)."""
+    if not text:
+        return []
+    folded = LATIN_MARKS_RE.sub("", unicodedata.normalize("NFD", text))
+    out = []
+    for clause in CLAUSE_SPLIT_RE.split(folded):
+        names = sorted({MENTION_CANONICAL[m] for m in MENTION_RE.findall(clause)})
+        if names:
+            out.append(names)
+    return out
+
+
+# ---------- Layout ----------
+
+def force_layout(adj: sp.spmatrix, iterations: int = LAYOUT_ITERATIONS, seed: int = LAYOUT_SEED) -> np.ndarray:
+    """
+    Fruchterman-Reingold positions in [-1, 1] for a symmetric weighted adjacency.
+    Each iteration is O(nodes + edges): attraction is a bincount over the COO arrays and
+    repulsion is limited to near pairs, so tens of thousands of edges lay out in seconds.
+    """
+    n = adj.shape[0]
+    rng = np.random.default_rng(seed)
+    if n == 0:
+        return np.zeros((0, 2), dtype=np.float32)
+    pos = rng.uniform(-1.0, 1.0, (n, 2))
+    upper = sp.triu(adj, k=1).tocoo()
+    i, j = upper.row, upper.col
+    w = np.log1p(upper.data.astype(np.float64))
+    if len(w):
+        w /= w.max()
+    k = np.sqrt(4.0 / n)
+    temp = 0.1
+    for it in range(iterations):
+        disp = np.zeros((n, 2))
+        # Repulsion only between nodes closer than REPULSION_RADIUS * k (the grid variant of
+        # Fruchterman-Reingold): a k-d tree finds those pairs, about a dozen per node
+        pairs = cKDTree(pos).query_pairs(REPULSION_RADIUS * k, output_type="ndarray")
+        if len(pairs):
+            a, b = pairs[:, 0], pairs[:, 1]
+            d = pos[a] - pos[b]
+            f = d * (k * k / ((d ** 2).sum(1) + 1e-9))[:, None]
+            for axis in (0, 1):
+                disp[:, axis] += np.bincount(a, f[:, axis], minlength=n)
+                disp[:, axis] -= np.bincount(b, f[:, axis], minlength=n)
+        if len(i):
+            d = pos[i] - pos[j]
+            f = d * (np.sqrt((d ** 2).sum(1)) * w / k)[:, None]
+            for axis in (0, 1):
+                disp[:, axis] -= np.bincount(i, f[:, axis], minlength=n)
+                disp[:, axis] += np.bincount(j, f[:, axis], minlength=n)
+        disp -= pos * (k * 0.5)  # weak gravity keeps disconnected components in view
+        length = np.sqrt((disp ** 2).sum(1)) + 1e-9
+        pos += disp / length[:, None] * np.minimum(length, temp)[:, None]
+        temp = 0.1 * (1.0 - (it + 1) / iterations) + 0.002
+    pos -= pos.mean(0)
+    scale = np.abs(pos).max()
+    return (pos / scale if scale > 0 else pos).astype(np.float32)
+
+
+def graph_key(labels: List[str], rows: np.ndarray, cols: np.ndarray, weights: np.ndarray) -> str:
+    """Version of a graph's all-mandala adjacency and of the layout parameters (layout cache key)."""
+    h = hashlib.sha256(f"v{GRAPH_VERSION}:{LAYOUT_ITERATIONS}:{LAYOUT_SEED}:{REPULSION_RADIUS}".encode())
+    h.update("\n".join(labels).encode("utf-8"))
+    for a in (rows, cols, weights):
+        h.update(np.ascontiguousarray(a).tobytes())
+    return h.hexdigest()[:16]
+
+
+def total_adjacency(n: int, rows: np.ndarray, cols: np.ndarray, weights: np.ndarray) -> sp.csr_matrix:
+    """Symmetric n x n CSR from upper-triangle COO entries (duplicates, e.g. per-mandala splits, summed)."""
+    upper = sp.coo_matrix((weights.astype(np.float64), (rows, cols)), shape=(n, n)).tocsr()
+    upper.sum_duplicates()
+    return (upper + upper.T).tocsr()
+
+
+# ---------- Build ----------
+
+def _collect(dataset_path) -> Dict[str, Dict[Tuple[int, str, str], int]]:
+    """One pass over the JSONL: per graph kind, {(mandala, label a, label b): weight}."""
+    edges = {kind: defaultdict(int) for kind in GRAPH_KINDS}
+    for rec in _iter_jsonl(dataset_path):
+        mandala = _coerce_int(rec.get("mandala"))
+        deity = label(rec.get("deity"))
+        for kind, (_, other) in GRAPH_KINDS.items():
+            if other is None:
+                continue
+            value = label(rec.get(other))
+            if deity and value:
+                edges[kind][(mandala, deity, value)] += 1
+        comention = edges["deity-comention"]
+        for names in mentions(rec.get("translation")):
+            for a, b in combinations(names, 2):
+                comention[(mandala, a, b)] += 1
+            if len(names) == 1:  # keeps lone mentions as nodes (self-pair, dropped from edges)
+                comention[(mandala, names[0], names[0])] += 0
+    return edges
+
+
+def build_graphs(dataset_path, out_dir=None) -> Path:
+    """
+    Compile every graph in GRAPH_KINDS and lay out the ones whose key has no cached layout.
+    Written into a temp dir and swapped in at the end, like the store and index, so an
+    interrupted build never leaves a half-written directory; cached layouts still in use
+    are copied over, the rest are dropped with the old directory.
+    """
+    dataset_path = Path(dataset_path)
+    out_dir = Path(out_dir) if out_dir else default_graphs_path(dataset_path)
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    layouts_dir = tmp_dir / "layouts"
+    layouts_dir.mkdir(parents=True)
+
+    graphs = {}
+    for kind, counts in _collect(dataset_path).items():
+        bipartite = GRAPH_KINDS[kind][1] is not None
+        side0 = sorted({a for _, a, _ in counts})
+        side1 = sorted({b for _, _, b in counts}) if bipartite else []
+        if not bipartite:
+            side0 = sorted(set(side0) | {b for _, _, b in counts})
+        labels = side0 + side1
+        # One index per side: a label can be both (इन्द्रः is a deity and a rishi), and those are two nodes
+        index0 = {l: i for i, l in enumerate(side0)}
+        index1 = {l: len(side0) + i for i, l in enumerate(side1)} if bipartite else index0
+        items = sorted((m, index0[a], index1[b], w) for (m, a, b), w in counts.items()
+                       if w > 0 and index0[a] != index1[b])
+        edge_mandala = np.asarray([m for m, _, _, _ in items], dtype=np.int16)
+        edge_row = np.asarray([a for _, a, _, _ in items], dtype=np.int32)
+        edge_col = np.asarray([b for _, _, b, _ in items], dtype=np.int32)
+        edge_weight = np.asarray([w for _, _, _, w in items], dtype=np.int32)
+
+        adj = total_adjacency(len(labels), edge_row, edge_col, edge_weight)
+        upper = sp.triu(adj, k=1).tocoo()
+        key = graph_key(labels, upper.row, upper.col, upper.data)
+        layout_path = layouts_dir / f"{key}.npy"
+        cached = out_dir / "layouts" / f"{key}.npy"
+        t0 = time.perf_counter()
+        if cached.exists():
+            shutil.copyfile(cached, layout_path)
+        elif not layout_path.exists():
+            np.save(layout_path, force_layout(adj))
+        np.savez(tmp_dir / f"{kind}.npz", edge_mandala=edge_mandala, edge_row=edge_row, edge_col=edge_col, edge_weight=edge_weight)
+        graphs[kind] = {
+            "sides": [s for s in GRAPH_KINDS[kind] if s],
+            "labels": labels,
+            "side0": len(side0),
+            "edges": int(upper.nnz),
+            "edge_entries": len(items),
+            "graph_key": key,
+            "layout_seconds": round(time.perf_counter() - t0, 3),
+        }
+
+    manifest = {
+        "graph_version": GRAPH_VERSION,
+        "generated_at": datetime.now().isoformat(),
+        "source": str(dataset_path),
+        "source_fingerprint": file_fingerprint(dataset_path),
+        "graphs": graphs,
+    }
+    with open(tmp_dir / "manifest.json", "w", encoding="utf-8") as mf:
+        json.dump(manifest, mf, ensure_ascii=False, indent=2)
+
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    tmp_dir.rename(out_dir)
+    return out_dir
+
+
+# ---------- Read ----------
+
+class Graph:
+    """One compiled graph: node labels/sides, per-mandala COO edges and the cached layout."""
+
+    def __init__(self, path: Path, kind: str, meta: Dict):
+        self.kind = kind
+        self.labels: List[str] = meta["labels"]
+        self.sides: List[str] = meta["sides"]
+        self.side = (np.arange(len(self.labels)) >= meta["side0"]).astype(np.int8)
+        self._ids = {(self.sides[s], l): i for i, (s, l) in enumerate(zip(self.side.tolist(), self.labels))}
+        self.key: str = meta["graph_key"]
+        with np.load(path / f"{kind}.npz") as z:
+            self.edge_mandala = z["edge_mandala"]
+            self.edge_row = z["edge_row"]
+            self.edge_col = z["edge_col"]
+            self.edge_weight = z["edge_weight"]
+        self.pos = np.load(path / "layouts" / f"{self.key}.npy")
+        self._total = total_adjacency(len(self.labels), self.edge_row, self.edge_col, self.edge_weight)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def nodes(self) -> List[Tuple[str, str]]:
+        """(side, label) of every node, in node order."""
+        return [(self.sides[s], l) for s, l in zip(self.side.tolist(), self.labels)]
+
+    def node(self, side: str, label: str) -> Optional[int]:
+        """Node id of a label on one side (the same label may be a node on both sides)."""
+        return self._ids.get((side, label))
+
+    def adjacency(self, mandala=None) -> sp.csr_matrix:
+        """Symmetric weighted adjacency, over all mandalas or one."""
+        if mandala is None:
+            return self._total
+        m = self.edge_mandala == int(mandala)
+        return total_adjacency(len(self.labels), self.edge_row[m], self.edge_col[m], self.edge_weight[m])
+
+    def subgraph(self, mandala=None, min_weight: int = 1, focus: Optional[Tuple[str, str]] = None,
+                 max_edges: Optional[int] = None):
+        """
+        (nodes, edges) DataFrames for drawing: the heaviest max_edges edges of weight >= min_weight,
+        limited to focus (a (side, label) node) and its neighbours when given. Positions come from
+        the cached layout.
+        """
+        import pandas as pd
+
+        adj = self.adjacency(mandala)
+        upper = sp.triu(adj, k=1).tocoo()
+        rows, cols, w = upper.row, upper.col, upper.data
+        keep = w >= min_weight
+        if focus is not None:
+            f = self.node(*focus)
+            if f is None:
+                keep[:] = False
+            else:
+                neighbours = np.union1d(cols[keep & (rows == f)], rows[keep & (cols == f)])
+                ego = np.append(neighbours, f)
+                keep &= np.isin(rows, ego) & np.isin(cols, ego)
+        rows, cols, w = rows[keep], cols[keep], w[keep]
+        order = np.argsort(-w, kind="stable")[:max_edges]
+        rows, cols, w = rows[order], cols[order], w[order]
+
+        ids = np.union1d(rows, cols)
+        strength = np.bincount(rows, w, minlength=len(self.labels)) + np.bincount(cols, w, minlength=len(self.labels))
+        labels = np.asarray(self.labels, dtype=object)
+        nodes = pd.DataFrame({
+            "label": labels[ids], "side": [self.sides[s] for s in self.side[ids]],
+            "weight": strength[ids], "x": self.pos[ids, 0], "y": self.pos[ids, 1],
+        })
+        edges = pd.DataFrame({
+            "source": labels[rows], "target": labels[cols], "weight": w,
+            "sx": self.pos[rows, 0], "sy": self.pos[rows, 1], "tx": self.pos[cols, 0], "ty": self.pos[cols, 1],
+        })
+        return nodes, edges
+
+
+class GraphSet:
+    """All graphs of a dataset, loaded from the graphs directory."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "manifest.json", "r", encoding="utf-8") as mf:
+            self.manifest = json.load(mf)
+        if self.manifest.get("graph_version") != GRAPH_VERSION:
+            raise RuntimeError(f"Unsupported graph version in {self.path}: {self.manifest.get('graph_version')}")
+        self.graphs = {kind: Graph(self.path, kind, meta) for kind, meta in self.manifest["graphs"].items()}
+
+    def __getitem__(self, kind: str) -> Graph:
+        return self.graphs[kind]
+
+    @property
+    def kinds(self) -> List[str]:
+        return list(self.graphs)
+
+
+def graphs_are_fresh(dataset_path, graphs_path) -> bool:
+    manifest_path = Path(graphs_path) / "manifest.json"
+    if not manifest_path.exists():
+        return False
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as mf:
+            manifest = json.load(mf)
+    except (OSError, ValueError):
+        return False
+    return (manifest.get("graph_version") == GRAPH_VERSION
+            and manifest.get("source_fingerprint") == file_fingerprint(dataset_path)
+            and set(manifest.get("graphs", {})) == set(GRAPH_KINDS))
+
+
+def open_graphs(dataset_path, graphs_path=None, rebuild_stale: bool = True) -> GraphSet:
+    """Open the graphs for a dataset, (re)building them first if missing or older than the JSONL."""
+    graphs_path = Path(graphs_path) if graphs_path else default_graphs_path(dataset_path)
+    if rebuild_stale and not graphs_are_fresh(dataset_path, graphs_path):
+        build_graphs(dataset_path, graphs_path)
+    return GraphSet(graphs_path)
+
+
+# ---------- CLI ----------
+
+def main():
+    p = argparse.ArgumentParser(description="Build the co-occurrence graphs (sparse adjacency + cached layouts)")
+    p.add_argument("--dataset", default="data/processed/rigveda_with_translations.jsonl", help="Input JSONL")
+    p.add_argument("--out", default=None, help="Graphs directory (default: <dataset>.graphs)")
+    p.add_argument("--kind", choices=list(GRAPH_KINDS), default=None, help="Print the heaviest edges of this graph")
+    p.add_argument("--mandala", type=int, default=None)
+    p.add_argument("--top", type=int, default=15)
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
+    out = build_graphs(args.dataset, args.out)
+    graphs = GraphSet(out)
+    print(f"Built {len(graphs.kinds)} graphs in {time.perf_counter() - t0:.2f}s -> {out}")
+    for kind, meta in graphs.manifest["graphs"].items():
+        print(f"  {kind:<16} {len(meta['labels']):>5} nodes {meta['edges']:>7} edges "
+              f"(layout {meta['layout_seconds']:.2f}s, key {meta['graph_key']})")
+    if args.kind:
+        _, edges = graphs[args.kind].subgraph(args.mandala, max_edges=args.top)
+        for e in edges.itertuples():
+            print(f"  {int(e.weight):>6}  {e.source} — {e.target}")
+
+
+if __name__ == "__main__":
+    main()
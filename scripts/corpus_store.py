@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+scripts/corpus_store.py
+
+Compile the processed JSONL dataset into a columnar, memory-mapped corpus store
+so the Streamlit app never parses JSON at startup or on reruns.
+
+Layout (directory next to the dataset, e.g. rigveda_with_translations.store/):
+  - manifest.json        : row count, column kinds, fingerprint of the source JSONL
+  - <col>.npy            : integer columns (mandala, sukta, verse_index), coerced at build time
+  - <col>.offsets.npy    : text columns - int64 byte offsets into <col>.utf8 (rows + 1 entries)
+  - <col>.utf8           : text columns - concatenated UTF-8 payload
+  - <col>.null.npy       : text columns - bool mask of null values
+
+Non-string values (e.g. 'padas' lists, page numbers) are stored as JSON text ("json" kind)
+and decoded on access.
+
+Usage:
+  python scripts/corpus_store.py \
+    --dataset data/processed/rigveda_with_translations.jsonl \
+    [--out data/processed/rigveda_with_translations.store]
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import orjson
+
+STORE_VERSION = 1
+
+# Canonical columns (docs/schema.md); always present in the store, filled with null if missing.
+CANONICAL_COLUMNS = [
+    "id", "mandala", "sukta", "verse_index", "verse_id", "deity", "rishi", "sanskrit",
+    "transliteration", "translation", "metre", "source_file", "page_number", "notes"
+]
+# Coerced to int (missing/invalid -> 0), same rules the app applied in to_dataframe().
+INT_COLUMNS = ("mandala", "sukta", "verse_index")
+# Columns shown in the paged results table
+PAGE_COLUMNS = ("mandala", "sukta", "verse_index", "id", "deity")
+# Columns Corpus decodes into its frame (filters + results table); full records are read from the mapped store
+FRAME_COLUMNS = ("mandala", "sukta", "verse_index", "id", "deity", "rishi")
+
+
+def default_store_path(dataset_path) -> Path:
+    p = Path(dataset_path)
+    return p.with_suffix(".store")
+
+
+def file_fingerprint(path) -> Dict[str, int]:
+    """Cheap staleness key (size + mtime) checked by the app on startup."""
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _coerce_int(v) -> int:
+    try:
+        return int(float(v))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _iter_jsonl(path) -> Iterable[Dict[str, Any]]:
+    with open(path, "rb") as fh:
+        for i, raw in enumerate(fh, start=1):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                yield orjson.loads(raw)
+            except orjson.JSONDecodeError as e:
+                raise RuntimeError(f"Failed to parse JSONL at {path} line {i}: {e}")
+
+
+# ---------- Build ----------
+
+def build_store(dataset_path, out_dir=None) -> Path:
+    """Read the JSONL once and write the columnar store. Returns the store directory."""
+    dataset_path = Path(dataset_path)
+    out_dir = Path(out_dir) if out_dir else default_store_path(dataset_path)
+
+    columns: List[str] = list(CANONICAL_COLUMNS)
+    values: Dict[str, list] = {c: [] for c in columns}
+    sha = hashlib.sha256()
+    with open(dataset_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            sha.update(chunk)
+
+    n = 0
+    for rec in _iter_jsonl(dataset_path):
+        for k in rec:
+            if k not in values:
+                columns.append(k)
+                values[k] = [None] * n
+        for c in columns:
+            values[c].append(rec.get(c))
+        n += 1
+
+    # Write into a temp dir and swap, so a concurrently running app never sees a half-built store
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    kinds = {}
+    for c in columns:
+        col = values[c]
+        if c in INT_COLUMNS:
+            np.save(tmp_dir / f"{c}.npy", np.fromiter((_coerce_int(v) for v in col), dtype=np.int32, count=n))
+            kinds[c] = "int"
+            continue
+        kind = "str" if all(v is None or isinstance(v, str) for v in col) else "json"
+        kinds[c] = kind
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        nulls = np.zeros(n, dtype=bool)
+        with open(tmp_dir / f"{c}.utf8", "wb") as fh:
+            pos = 0
+            for i, v in enumerate(col):
+                if v is None:
+                    nulls[i] = True
+                else:
+                    b = v.encode("utf-8") if kind == "str" else orjson.dumps(v)
+                    fh.write(b)
+                    pos += len(b)
+                offsets[i + 1] = pos
+        np.save(tmp_dir / f"{c}.offsets.npy", offsets)
+        np.save(tmp_dir / f"{c}.null.npy", nulls)
+
+    manifest = {
+        "store_version": STORE_VERSION,
+        "generated_at": datetime.now().isoformat(),
+        "source": str(dataset_path),
+        "source_sha256": sha.hexdigest(),
+        "source_fingerprint": file_fingerprint(dataset_path),
+        "rows": n,
+        "columns": kinds,
+    }
+    with open(tmp_dir / "manifest.json", "w", encoding="utf-8") as mf:
+        json.dump(manifest, mf, ensure_ascii=False, indent=2)
+
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    tmp_dir.rename(out_dir)
+    return out_dir
+
+
+# ---------- Read ----------
+
+class CorpusStore:
+    """Read-only view over a store directory. Columns are memory-mapped lazily on first access."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "manifest.json", "r", encoding="utf-8") as mf:
+            self.manifest = json.load(mf)
+        if self.manifest.get("store_version") != STORE_VERSION:
+            raise RuntimeError(f"Unsupported store version in {self.path}: {self.manifest.get('store_version')}")
+        self.kinds: Dict[str, str] = self.manifest["columns"]
+        self._ints: Dict[str, np.ndarray] = {}
+        self._texts: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return self.manifest["rows"]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.kinds)
+
+    def int_column(self, name: str) -> np.ndarray:
+        """Zero-copy int32 array for mandala/sukta/verse_index."""
+        if name not in self._ints:
+            if self.kinds.get(name) != "int":
+                raise KeyError(f"{name} is not an integer column")
+            self._ints[name] = np.load(self.path / f"{name}.npy", mmap_mode="r")
+        return self._ints[name]
+
+    def _text(self, name: str):
+        if name not in self._texts:
+            if self.kinds.get(name) not in ("str", "json"):
+                raise KeyError(f"{name} is not a text column")
+            offsets = np.load(self.path / f"{name}.offsets.npy", mmap_mode="r")
+            nulls = np.load(self.path / f"{name}.null.npy", mmap_mode="r")
+            blob_path = self.path / f"{name}.utf8"
+            if os.path.getsize(blob_path):
+                with open(blob_path, "rb") as fh:
+                    blob = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                blob = b""  # mmap cannot map empty files (all-null column)
+            self._texts[name] = (offsets, nulls, blob)
+        return self._texts[name]
+
+    def value(self, name: str, row: int):
+        if self.kinds[name] == "int":
+            return int(self.int_column(name)[row])
+        offsets, nulls, blob = self._text(name)
+        if nulls[row]:
+            return None
+        raw = blob[int(offsets[row]):int(offsets[row + 1])]
+        return raw.decode("utf-8") if self.kinds[name] == "str" else orjson.loads(raw)
+
+    def text_column(self, name: str, rows: Optional[Iterable[int]] = None) -> list:
+        """Decode a text column (or only the given rows) into a list of Python objects."""
+        offsets, nulls, blob = self._text(name)
+        decode = (lambda b: b.decode("utf-8")) if self.kinds[name] == "str" else orjson.loads
+        if rows is None:
+            off = offsets.tolist()
+            nul = nulls.tolist()
+            return [None if nul[i] else decode(blob[off[i]:off[i + 1]]) for i in range(len(nul))]
+        return [None if nulls[r] else decode(blob[int(offsets[r]):int(offsets[r + 1])]) for r in rows]
+
+    def record(self, row: int) -> Dict[str, Any]:
+        return {c: self.value(c, row) for c in self.kinds}
+
+    def frame(self, columns: Optional[List[str]] = None):
+        """Build a pandas DataFrame; int columns come straight from the mapped arrays."""
+        import pandas as pd
+        data = {}
+        for c in (columns or self.columns):
+            if self.kinds[c] == "int":
+                data[c] = np.asarray(self.int_column(c))
+            else:
+                # object dtype keeps None for missing values (as json_normalize did), not NaN
+                data[c] = pd.Series(self.text_column(c), dtype=object)
+        return pd.DataFrame(data)
+
+
+class Corpus:
+    """
+    Typed frame plus the lookup tables the verse browser needs on every rerun.
+    Built once per process (the app holds it in st.cache_resource), so dropdowns
+    and mandala/sukta/verse selection are dict lookups instead of mask scans.
+    Only the small filter/table columns are decoded; verse text stays in the mapped
+    store, whose pages the OS shares between processes (API workers).
+    """
+
+    def __init__(self, store: CorpusStore, columns=FRAME_COLUMNS):
+        self.store = store
+        self.df = store.frame([c for c in columns if c in store.kinds])
+        df = self.df
+        self.rows_by_mandala: Dict[int, np.ndarray] = df.groupby("mandala", sort=True).indices
+        self.rows_by_hymn: Dict[tuple, np.ndarray] = df.groupby(["mandala", "sukta"], sort=True).indices
+        self.rows_by_verse: Dict[tuple, np.ndarray] = df.groupby(["mandala", "sukta", "verse_index"], sort=True).indices
+
+        self.mandalas: List[int] = [int(m) for m in self.rows_by_mandala]
+        self.suktas_by_mandala: Dict[int, List[int]] = {m: [] for m in self.mandalas}
+        for (m, s) in self.rows_by_hymn:
+            self.suktas_by_mandala[int(m)].append(int(s))
+        self.verses_by_hymn: Dict[tuple, List[int]] = {}
+        for (m, s, v) in self.rows_by_verse:
+            self.verses_by_hymn.setdefault((int(m), int(s)), []).append(int(v))
+        self.verses_by_mandala: Dict[int, List[int]] = {
+            m: sorted({v for s in self.suktas_by_mandala[m] for v in self.verses_by_hymn[(m, s)]})
+            for m in self.mandalas
+        }
+        self.all_suktas: List[int] = sorted({s for ss in self.suktas_by_mandala.values() for s in ss})
+        self.all_verses: List[int] = sorted({v for vs in self.verses_by_mandala.values() for v in vs})
+
+        # Canonical (mandala, sukta, verse_index) order and each row's rank in it, for paging
+        self.sorted_rows: np.ndarray = np.lexsort((df["verse_index"].to_numpy(), df["sukta"].to_numpy(),
+                                                   df["mandala"].to_numpy()))
+        self.sort_rank = np.empty(len(df), dtype=np.intp)
+        self.sort_rank[self.sorted_rows] = np.arange(len(df))
+
+        self.hymn_counts: Dict[tuple, int] = {k: len(v) for k, v in self.rows_by_hymn.items()}
+        self.mandala_counts = (df["mandala"].value_counts().sort_index()
+                               .rename_axis("mandala").reset_index(name="count"))
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def sukta_options(self, mandala=None) -> List[int]:
+        return self.all_suktas if mandala is None else self.suktas_by_mandala.get(int(mandala), [])
+
+    def verse_options(self, mandala=None, sukta=None) -> List[int]:
+        if mandala is not None and sukta is not None:
+            return self.verses_by_hymn.get((int(mandala), int(sukta)), [])
+        if mandala is not None:
+            return self.verses_by_mandala.get(int(mandala), [])
+        return self.all_verses
+
+    def select(self, mandala=None, sukta=None, verse_index=None) -> np.ndarray:
+        """Row positions matching the browse selection (None = any)."""
+        if mandala is not None:
+            m = int(mandala)
+            if sukta is not None:
+                if verse_index is not None:
+                    return self.rows_by_verse.get((m, int(sukta), int(verse_index)), np.empty(0, dtype=np.intp))
+                return self.rows_by_hymn.get((m, int(sukta)), np.empty(0, dtype=np.intp))
+            rows = self.rows_by_mandala.get(m, np.empty(0, dtype=np.intp))
+            if verse_index is not None:
+                rows = rows[self.store.int_column("verse_index")[rows] == int(verse_index)]
+            return rows
+        mask = np.ones(len(self.df), dtype=bool)
+        if sukta is not None:
+            mask &= self.store.int_column("sukta") == int(sukta)
+        if verse_index is not None:
+            mask &= self.store.int_column("verse_index") == int(verse_index)
+        return np.flatnonzero(mask)
+
+    def sort_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Order row positions by (mandala, sukta, verse_index) via the precomputed rank."""
+        if len(rows) == len(self.df):
+            return self.sorted_rows
+        return rows[np.argsort(self.sort_rank[rows], kind="stable")]
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """One verse as plain Python values (decoded from the store, JSON-serializable)."""
+        return self.store.record(int(row))
+
+    def page(self, rows: np.ndarray, offset: int, limit: int, columns=PAGE_COLUMNS):
+        """
+        Materialize only rows[offset:offset + limit] for the results table, with a vectorized
+        'M1 S1 V1' label; cost depends on the page size, not on len(rows).
+        """
+        import pandas as pd
+        window = rows[offset:offset + limit]
+        out = self.df.iloc[window][list(columns)].reset_index(drop=True)
+        out.insert(0, "label", "M" + out["mandala"].astype(str) + " S" + out["sukta"].astype(str)
+                   + " V" + out["verse_index"].astype(str))
+        out.index = pd.RangeIndex(offset, offset + len(window), name="result")
+        return out
+
+
+def store_is_fresh(dataset_path, store_path) -> bool:
+    manifest_path = Path(store_path) / "manifest.json"
+    if not manifest_path.exists():
+        return False
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as mf:
+            manifest = json.load(mf)
+    except (OSError, ValueError):
+        return False
+    return (manifest.get("store_version") == STORE_VERSION
+            and manifest.get("source_fingerprint") == file_fingerprint(dataset_path))
+
+
+def open_store(dataset_path, store_path=None, rebuild_stale: bool = True) -> CorpusStore:
+    """Open the store for a dataset, (re)building it first if it is missing or older than the JSONL."""
+    store_path = Path(store_path) if store_path else default_store_path(dataset_path)
+    if rebuild_stale and not store_is_fresh(dataset_path, store_path):
+        build_store(dataset_path, store_path)
+    return CorpusStore(store_path)
+
+
+# ---------- CLI ----------
+
+def main():
+    p = argparse.ArgumentParser(description="Compile processed JSONL into a columnar memory-mapped store")
+    p.add_argument("--dataset", default="data/processed/rigveda_with_translations.jsonl", help="Input JSONL")
+    p.add_argument("--out", default=None, help="Store directory (default: <dataset>.store)")
+    args = p.parse_args()
+
+    out = build_store(args.dataset, args.out)
+    store = CorpusStore(out)
+    print(f"Wrote store with {len(store)} rows and {len(store.columns)} columns to {out}")
+    print("Columns:", ", ".join(f"{c} ({k})" for c, k in store.kinds.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+scripts/fetch_griffith.py
+
+Asynchronous downloader for Griffith's Rig Veda translation (sacred-texts.com). Each hymn
+page is parsed once with lxml into per-verse records
+  {"mandala", "sukta", "verse_index", "translation_text", "source_page"}
+written to --jsonl, ready for merge_translations.py --griffith without the plain-text
+round trip and cleaning passes. Verses are the page's <p> blocks that open with the next
+verse number (footnotes and navigation do not); a block holding several numbered verses is
+split with split_griffith_verses.split_hymn. A verse number missing from a page is reported
+(stderr and "pages_with_gaps" in the summary) and the verses after it are still kept. Optionally (--text-out) the flattened page
+text is also written in the layout test.py has always produced (header, one "BOOK n"
+block per mandala, one "HYMN n: <title>" section per page).
+
+  - aiohttp connection pool with --concurrency requests in flight
+  - token-bucket rate limit: --rate requests/second on average, bursts of up to --burst
+  - on-disk per-page cache (<cache-dir>/rv01001.htm + rv01001.json with status and
+    validators); later runs send If-None-Match / If-Modified-Since and reuse the cached
+    page on 304, so a rerun costs one small request per hymn
+  - checkpoint log (<cache-dir>/checkpoint.log): pages finished by an interrupted run are
+    not requested again when it is resumed; the log is removed once a run completes
+  - output is written in book/hymn order from the cache as soon as each prefix of pages
+    is done, to <file>.part, and renamed over <file> at the end
+
+Pages that fail after --retries attempts are left out of the checkpoint (and reported),
+so the next run fetches them again. --base-url points the fetcher at any server with the
+same rvBBHHH.htm layout, e.g. a local stand-in for testing.
+
+Usage:
+  python scripts/fetch_griffith.py \
+    --jsonl data/translations/griffith_verses.jsonl \
+    [--text-out data/raw/griffith_plain.txt] [--cache-dir data/raw/griffith_cache] [--concurrency 8] [--rate 4] [--burst 4] \
+    [--books 1,2] [--max-hymns 10] [--base-url http://127.0.0.1:8000/] [--fresh]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+import lxml.html
+
+from split_griffith_verses import split_hymn
+
+BASE_URL = "https://www.sacred-texts.com/hin/rigveda/"
+# Hymns per mandala (sacred-texts numbering, rv01001.htm .. rv10191.htm)
+HYMN_COUNTS = {1: 191, 2: 43, 3: 62, 4: 58, 5: 87, 6: 75, 7: 104, 8: 103, 9: 114, 10: 191}
+HEADER = ("THE RIG VEDA - Complete Translation by Ralph T.H. Griffith\n"
+          "Source: sacred-texts.com\n" + "=" * 70 + "\n\n")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHECKPOINT_NAME = "checkpoint.log"
+VERSE_START_RE = re.compile(r'^(\d{1,3})\.?\s+(?=\S)')
+SPACE_RE = re.compile(r'\s+')
+
+
+def page_name(book: int, hymn: int) -> str:
+    return f"rv{book:02d}{hymn:03d}.htm"
+
+
+def plan_pages(books: Optional[Sequence[int]] = None, max_hymns: Optional[int] = None) -> List[Tuple[int, int, str]]:
+    """[(book, hymn, page)] in output order."""
+    pages = []
+    for book in books or sorted(HYMN_COUNTS):
+        count = HYMN_COUNTS.get(book, 0)
+        if max_hymns:
+            count = min(count, max_hymns)
+        pages.extend((book, hymn, page_name(book, hymn)) for hymn in range(1, count + 1))
+    return pages
+
+
+def extract_page(content: bytes, mandala: int, sukta: int) -> Tuple[str, str, List[Dict[str, Any]], List[int]]:
+    """
+    Parse a hymn page once. Returns (title, text, verses, missing): the page title, its text
+    lines longer than 2 characters (as test.py kept them), the per-verse records and the verse
+    numbers skipped between them (a verse whose number or <p> is malformed on the page).
+    """
+    try:
+        markup = content.decode('utf-8')
+    except UnicodeDecodeError:
+        markup = content.decode('cp1252', errors='replace')
+    doc = lxml.html.document_fromstring(markup)
+    for el in doc.xpath('//script|//style'):
+        el.drop_tree()
+    title = (doc.findtext('.//title') or '').strip() or f"Hymn {sukta}"
+    lines = [ln.strip() for ln in doc.text_content().split('\n')]
+    text = '\n'.join(ln for ln in lines if ln and len(ln) > 2)
+
+    for br in doc.iter('br'):  # line breaks inside a verse become spaces
+        br.tail = ' ' + (br.tail or '')
+    blocks = [SPACE_RE.sub(' ', p.text_content()).strip() for p in doc.iter('p')]
+    if not any(VERSE_START_RE.match(b) for b in blocks):
+        blocks = [SPACE_RE.sub(' ', ln) for ln in lines]  # no <p> structure: the verses are whole text lines
+    verses = []
+    last = 0
+    for block in blocks:
+        m = VERSE_START_RE.match(block)
+        # Any later number starts the next verse, so one missing verse does not drop the rest of the page
+        if not m or int(m.group(1)) <= last:
+            continue
+        for n, t in split_hymn(block[m.end():], first=int(m.group(1))):
+            verses.append({'mandala': mandala, 'sukta': sukta, 'verse_index': n,
+                           'translation_text': t, 'source_page': page_name(mandala, sukta)})
+            last = n
+    found = {v['verse_index'] for v in verses}
+    missing = [n for n in range(1, last + 1) if n not in found]
+    return title, text, verses, missing
+
+
+class TokenBucket:
+    """At most `rate` acquisitions per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self.lock:  # waiters are served in arrival order
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PageCache:
+    """<root>/<page> holds the last 200 body, <root>/<page>.json its status and validators."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _meta_path(self, name: str) -> Path:
+        return self.root / (Path(name).stem + ".json")
+
+    def meta(self, name: str) -> Dict:
+        try:
+            with open(self._meta_path(name), 'r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def body(self, name: str) -> Optional[bytes]:
+        try:
+            return (self.root / name).read_bytes()
+        except OSError:
+            return None
+
+    def store(self, name: str, status: int, body: bytes, headers) -> None:
+        if status == 200:
+            tmp = self.root / (name + ".tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, self.root / name)
+        meta = {'status': status, 'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified')}
+        tmp = self.root / (name + ".json.tmp")
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, self._meta_path(name))
+
+
+class Checkpoint:
+    """Append-only log of pages finished by the current run; deleted when the run completes."""
+
+    def __init__(self, path, fresh: bool = False):
+        self.path = Path(path)
+        if fresh and self.path.exists():
+            self.path.unlink()
+        self.done = set()
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                self.done = {ln.strip() for ln in fh if ln.strip()}
+        self.fh = open(self.path, 'a', encoding='utf-8')
+
+    def mark(self, name: str) -> None:
+        self.fh.write(name + "\n")
+        self.fh.flush()
+        self.done.add(name)
+
+    def close(self, completed: bool) -> None:
+        self.fh.close()
+        if completed:
+            self.path.unlink()
+
+
+async def fetch_page(session: aiohttp.ClientSession, bucket: TokenBucket, cache: PageCache,
+                     url: str, name: str, retries: int = 3) -> int:
+    """
+    GET one page (conditionally when a cached copy exists) and update the cache.
+    Returns the HTTP status (304 when the cached page is still current); raises on
+    network errors after `retries` retries.
+    """
+    meta = cache.meta(name)
+    headers = {}
+    if meta.get('status') == 200 and (cache.root / name).exists():
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    for attempt in range(retries + 1):
+        await bucket.acquire()
+        try:
+            async with session.get(url, headers=headers) as resp:
+                if resp.status == 304:
+                    return 304
+                if resp.status in RETRY_STATUSES and attempt < retries:
+                    try:
+                        delay = float(resp.headers.get('Retry-After', ''))
+                    except ValueError:
+                        delay = 0.5 * 2 ** attempt
+                    await asyncio.sleep(delay)
+                    continue
+                if resp.status in (200, 404):  # other failures leave the cached copy alone
+                    cache.store(name, resp.status, await resp.read() if resp.status == 200 else b'', resp.headers)
+                return resp.status
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == retries:
+                raise
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+
+class OrderedWriter:
+    """Writes verse records (and optionally page text) in page order once every earlier page is finished."""
+
+    def __init__(self, pages: List[Tuple[int, int, str]], cache: PageCache, jsonl_fh, text_fh=None):
+        self.pages = pages
+        self.cache = cache
+        self.jsonl_fh = jsonl_fh
+        self.text_fh = text_fh
+        self.finished = [False] * len(pages)
+        self.next = 0
+        self.book = None
+        self.hymns = 0
+        self.verses = 0
+        self.gaps: Dict[str, List[int]] = {}  # page -> verse numbers missing from it
+        if text_fh:
+            text_fh.write(HEADER)
+
+    def done(self, i: int) -> None:
+        self.finished[i] = True
+        while self.next < len(self.pages) and self.finished[self.next]:
+            self._write(*self.pages[self.next])
+            self.next += 1
+
+    def _write(self, book: int, hymn: int, name: str) -> None:
+        if self.text_fh and book != self.book:
+            self.text_fh.write(f"\n{'=' * 60}\nBOOK {book}\n{'=' * 60}\n\n")
+        self.book = book
+        if self.cache.meta(name).get('status') != 200:
+            return
+        content = self.cache.body(name)
+        if content is None:
+            return
+        title, text, verses, missing = extract_page(content, book, hymn)
+        if missing:
+            self.gaps[name] = missing
+            print(f"  ! {name}: no text found for verse(s) {', '.join(map(str, missing))}", file=sys.stderr)
+        for rec in verses:
+            self.jsonl_fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        if self.text_fh:
+            self.text_fh.write(f"HYMN {hymn}: {title}\n{'-' * 40}\n{text}\n\n")
+        self.hymns += 1
+        self.verses += len(verses)
+
+
+async def fetch_all(pages: List[Tuple[int, int, str]], cache: PageCache, checkpoint: Checkpoint,
+                    on_done: Callable[[int], None], base_url: str = BASE_URL, concurrency: int = 8,
+                    rate: float = 4.0, burst: int = 4, retries: int = 3, timeout: float = 20.0) -> Dict[str, int]:
+    """Fetch every page not yet in the checkpoint with `concurrency` workers; returns status counts."""
+    stats = {'fetched': 0, 'not_modified': 0, 'resumed': 0, 'missing': 0, 'failed': 0}
+    queue: asyncio.Queue = asyncio.Queue()
+    for i, (_, _, name) in enumerate(pages):
+        if name in checkpoint.done:
+            stats['resumed'] += 1
+            on_done(i)
+        else:
+            queue.put_nowait(i)
+    bucket = TokenBucket(rate, burst)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        async def worker():
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                name = pages[i][2]
+                try:
+                    status = await fetch_page(session, bucket, cache, base_url + name, name, retries)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    print(f"  ✗ {name}: {e.__class__.__name__} {e}", file=sys.stderr)
+                    stats['failed'] += 1
+                    on_done(i)
+                    continue
+                if status in (200, 304, 404):
+                    stats[{200: 'fetched', 304: 'not_modified', 404: 'missing'}[status]] += 1
+                    checkpoint.mark(name)
+                else:
+                    print(f"  ✗ {name}: HTTP {status}", file=sys.stderr)
+                    stats['failed'] += 1
+                on_done(i)
+                finished = sum(stats.values())
+                if finished % 100 == 0:
+                    print(f"  {finished}/{len(pages)} pages", file=sys.stderr)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return stats
+
+
+def run(jsonl_out, text_out=None, cache_dir="data/raw/griffith_cache", books=None, max_hymns=None,
+        base_url=BASE_URL, concurrency=8, rate=4.0, burst=4, retries=3, timeout=20.0, fresh=False) -> Dict[str, int]:
+    """Fetch (or revalidate) the pages and write the verse JSONL (and page text). Returns the summary dict."""
+    pages = plan_pages(books, max_hymns)
+    cache = PageCache(cache_dir)
+    checkpoint = Checkpoint(cache.root / CHECKPOINT_NAME, fresh=fresh)
+    outs = [Path(o) for o in (jsonl_out, text_out) if o]
+    for o in outs:
+        o.parent.mkdir(parents=True, exist_ok=True)
+    parts = [o.with_name(o.name + ".part") for o in outs]
+    t0 = time.perf_counter()
+    completed = False
+    try:
+        with ExitStack() as stack:
+            fhs = [stack.enter_context(open(pt, 'w', encoding='utf-8')) for pt in parts]
+            writer = OrderedWriter(pages, cache, fhs[0], fhs[1] if text_out else None)
+            stats = asyncio.run(fetch_all(pages, cache, checkpoint, writer.done, base_url, concurrency,
+                                          rate, burst, retries, timeout))
+        completed = stats['failed'] == 0
+        for pt, o in zip(parts, outs):
+            os.replace(pt, o)
+    finally:
+        checkpoint.close(completed)
+    stats.update({'pages': len(pages), 'hymns_written': writer.hymns, 'verses_written': writer.verses,
+                  'verses_missing': sum(map(len, writer.gaps.values())), 'pages_with_gaps': writer.gaps,
+                  'seconds': round(time.perf_counter() - t0, 2)})
+    return stats
+
+
+def main():
+    p = argparse.ArgumentParser(description="Download Griffith's Rig Veda translation (async, cached, resumable)")
+    p.add_argument("--jsonl", "-o", default="data/translations/griffith_verses.jsonl", help="Per-verse records (JSONL)")
+    p.add_argument("--text-out", default=None, help="Also write the flattened page text (e.g. data/raw/griffith_plain.txt)")
+    p.add_argument("--cache-dir", default="data/raw/griffith_cache", help="Per-page cache and checkpoint directory")
+    p.add_argument("--base-url", default=BASE_URL, help="Directory URL holding rvBBHHH.htm pages")
+    p.add_argument("--books", default=None, help="Comma-separated mandalas (default: 1-10)")
+    p.add_argument("--max-hymns", type=int, default=None, help="Only the first N hymns of each book")
+    p.add_argument("--concurrency", type=int, default=8, help="Requests in flight (connection pool size)")
+    p.add_argument("--rate", type=float, default=4.0, help="Average requests per second (0 = unlimited)")
+    p.add_argument("--burst", type=int, default=4, help="Token bucket size")
+    p.add_argument("--retries", type=int, default=3, help="Retries per page on 429/5xx/network errors")
+    p.add_argument("--timeout", type=float, default=20.0, help="Per-request timeout in seconds")
+    p.add_argument("--fresh", action="store_true", help="Ignore the checkpoint of an interrupted run")
+    args = p.parse_args()
+
+    books = [int(b) for b in args.books.split(",")] if args.books else None
+    base_url = args.base_url if args.base_url.endswith("/") else args.base_url + "/"
+    try:
+        stats = run(args.jsonl, args.text_out, args.cache_dir, books, args.max_hymns, base_url, args.concurrency,
+                    args.rate, args.burst, args.retries, args.timeout, args.fresh)
+    except KeyboardInterrupt:
+        print("\nInterrupted; rerun the same command to resume from the checkpoint.", file=sys.stderr)
+        return 130
+    print(f"Wrote {stats['verses_written']} verses from {stats['hymns_written']} hymns to {args.jsonl}", file=sys.stderr)
+    print("Summary:", json.dumps(stats))
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,30 +20,32 @@ import pandas as pd
 import re
 from pathlib import Path
 
+from text_patterns import PhraseReplacer
+
+# Misprints and diacritics, then (with --modernize) light archaic -> modern forms.
+# The combined table is applied in one whole-word pass, longest phrase first ("thou encompassest"
+# before "thou"), so "hasten" or "theme" are left alone.
+CORRECTIONS = {
+    'lavishest': 'lavishes', 'obtaineth': 'obtains', 'thou encompassest': 'you encompass',
+    'goeth': 'goes', 'Aṅgiras': 'Angiras', 'Varuṇa': 'Varuna', 'might power': 'mighty power',
+    'hitherward': 'hereward'
+}
+MODERN_CORRECTIONS = {'thee': 'you', 'thou': 'you', 'wilt': 'will', 'hast': 'have'}
+
+# Split on verse numbers: match 'num text' until next num
+VERSE_SPLIT_RE = re.compile(r'(\d+)\s+(.*?)(?=\s+\d+\s+|$)', re.DOTALL)
+
 def split_and_correct(df, modernize=True):
-    # Corrections dict
-    corrections = {
-        'lavishest': 'lavishes', 'obtaineth': 'obtains', 'thou encompassest': 'you encompass',
-        'goeth': 'goes', 'Aṅgiras': 'Angiras', 'Varuṇa': 'Varuna', 'might power': 'mighty power',
-        'hitherward': 'hereward'
-    }
-    if modernize:
-        corrections.update({'thee': 'you', 'thou': 'you', 'wilt': 'will', 'hast': 'have'})
+    correct = PhraseReplacer({**CORRECTIONS, **MODERN_CORRECTIONS} if modernize else CORRECTIONS)
 
     expanded_rows = []
     for _, row in df.iterrows():
         text = str(row['translation_text'])
-        # Split on verse numbers: match 'num text' until next num
-        pattern = r'(\d+)\s+(.*?)(?=\s+\d+\s+|$)(?s)'
-        matches = list(re.finditer(pattern, text, re.DOTALL))
-        for match in matches:
+        for match in VERSE_SPLIT_RE.finditer(text):
             num = int(match.group(1))
             verse_text = match.group(2).strip()
             if len(verse_text) > 10:  # Min length filter
-                # Apply corrections
-                corrected = verse_text
-                for wrong, right in corrections.items():
-                    corrected = corrected.replace(wrong, right)
+                corrected = correct(verse_text)
                 expanded_rows.append({
                     'mandala': int(row['mandala']),
                     'sukta': int(row['sukta']),
@@ -9,17 +9,22 @@ Produces:
   - JSONL: same objects, one per line
 
 Key features:
- - Aggressive pre-clean of navigation/boilerplate
+ - One compiled tokenizer scan per paragraph classifies each line (hymn/book heading,
+   navigation/boilerplate junk) and finds every inline "N text" verse marker
  - Stateful detection of Book/Mandala and Hymn/Sukta headings
  - Flexible verse-number detection (arabic, parenthesized, roman)
  - Paragraph fallback when explicit numbers are absent
  - Dry-run mode to inspect parsed output
+ - Streaming: lines -> paragraphs -> entries are generators and CSV + JSONL are written
+   together, so memory stays flat for multi-GB or concatenated dumps (--input - reads stdin)
 
 Usage:
   python scripts/griffith_plain_to_csv_v2.py --input data/raw/griffith_plain.txt --out-dir data/translations --dry-run --verbose
 
 Then run without --dry-run to write files:
   python scripts/griffith_plain_to_csv_v2.py --input data/raw/griffith_plain.txt --out-dir data/translations --min-length 12
+
+Throughput: python scripts/bench_griffith_plain.py --input data/raw/griffith_plain.txt
 """
 from pathlib import Path
 import re
@@ -29,48 +34,59 @@ import html
 import json
 import csv
 import sys
+from itertools import chain
 
-# ---- Regexes ----
-MANDALA_RE = re.compile(r'^\s*(?:RIG[-\s]?VEDA\s+BOOK|BOOK|MANDALA|BOOK OF)\b.*?([IVXLCDM]+|\d+)', re.I)
-HYMN_RE = re.compile(r'^\s*(?:HYMN|HYMN\s+NO|HYMN\s+NUMBER)\b.*?([IVXLCDM]+|\d+)', re.I)
-HYMN_ALT_RE = re.compile(r'^\s*(?:HYMN)\s+([IVXLCDM]+|\d+)\b(?:\s*[\.\-:])?\s*(.*)$', re.I)
-VERSE_RE = re.compile(r'^\s*\(?\s*(\d+|[IVXLCDM]+)\s*\)?\s*(?:[.\-—:)]\s*)?(.*)$')
-ROMAN_ONLY = re.compile(r'^[IVXLCDM]+$', re.I)
+from text_patterns import phrase_pattern
 
+# ---- Paragraph tokenizer ----
+# Page chrome of the sacred-texts.com dump; a line containing any of these is dropped whole.
 BOILERPLATE_PHRASES = [
-    r'Sacred Texts', r'Next:', r'Previous:', r'Table of Contents', r'Index',
-    r'Sanskrit', r'All Rights Reserved', r'Full Text', r'Download Options',
-    r'Read Online', r'Translated by', r'By R\. T\. H\. Griffith', r'—\s*HYMN'
+    'Sacred Texts', 'Next:', 'Previous:', 'Table of Contents', 'Index',
+    'Sanskrit', 'All Rights Reserved', 'Full Text', 'Download Options',
+    'Read Online', 'Translated by', 'By R. T. H. Griffith',
+    'sacred-texts.com', 'Buy this Book', 'Hinduism'
 ]
-BOILERPLATE_RE = re.compile("|".join(f"(?:{p})" for p in BOILERPLATE_PHRASES), re.I)
+NAV_WORDS = ['Next', 'Previous', 'Index', 'Contents', 'Back']
+ROMAN = r'(?-i:[IVXLCDM]+)'
+VERSE_MARK = r'\(?(?P<num>\d{1,3})\)?(?:[.:)—-][ \t]*|[ \t]+)(?=[^\s\d])'
+
+# One compiled scan classifies every line of a paragraph and finds inline verse markers.
+# Every alternative starts with its separator ('\n' before a line, ' ' before an inline
+# marker), so the regex engine can skip straight to candidate positions; the tokenizer
+# scans '\n' + paragraph. Alternatives are tried in order:
+#   hymn   : "HYMN 12" / "HYMN XII. Agni." heading line (the dump's page titles carry
+#            boilerplate, so this comes before junk)
+#   junk   : a line with boilerplate, a short line with a navigation word, a short line
+#            with fewer than 3 letters, or a rule of punctuation ("====="); lines that
+#            open with a verse marker are verse text and are not scanned for boilerplate
+#   book   : "BOOK 1" / "MANDALA II" / "RIG-VEDA BOOK 3" heading line (after junk, so
+#            "Rig-Veda Book 1 Index" navigation is not taken as a heading)
+#   rverse : "IV." / "(IV)" at line start (used only with --allow-roman)
+#   verse  : "N text", "N. text", "(N) text" at line start or after a space
+PARA_TOKEN_RE = re.compile(
+    r'\n(?:(?P<hymn>HYMN(?:[ \t]+(?:NO\.?|NUMBER))?[ \t]+(?P<sukta>' + ROMAN + r'|\d+)\b[^\n]*)'
+    r'|(?P<junk>(?!' + VERSE_MARK.replace('?P<num>', '') + r')(?:[^\n]*?(?:' + phrase_pattern(BOILERPLATE_PHRASES) + r'|—[ \t]*HYMN)[^\n]*'
+    r'|(?=[^\n]{0,59}$)[^\n]*?\b(?:' + '|'.join(NAV_WORDS) + r')\b[^\n]*'
+    r'|(?=[^\n]{0,39}$)[^A-Za-z\n]*(?:[A-Za-z][^A-Za-z\n]*){0,2}$'
+    r'|[^\w\n]+$))'
+    r'|(?P<book>(?:RIG[- \t]?VEDA[ \t]+BOOK|BOOK(?:[ \t]+OF)?|MANDALA)[ \t]+'
+    r'(?P<mandala>' + ROMAN + r'|\d+)\b[^\n]*)'
+    r'|(?P<rverse>\(?(?P<rnum>' + ROMAN + r')(?:\)|\.)[ \t]*(?=[^\s\d])))'
+    r'|[\n ](?P<verse>' + VERSE_MARK + r')',
+    re.I | re.M
+)
 
 HTML_TAG_RE = re.compile(r'<[^>]+>')
-WHITESPACE_RE = re.compile(r'\s+')
+INLINE_SPACE_RE = re.compile(r'[^\S\n]{2,}|[^\S\n ]')  # runs, or single tabs/nbsp: anything but a lone space
 
-def normalize_line(s):
-    if s is None:
-        return ""
-    s = str(s)
+def normalize_paragraph(s):
+    """Unescape HTML, drop tags, NFC, collapse spaces; line breaks are kept for the tokenizer."""
     s = html.unescape(s)
     s = HTML_TAG_RE.sub(' ', s)
     s = unicodedata.normalize("NFC", s)
     s = s.replace('\r\n', '\n').replace('\r','\n')
-    s = WHITESPACE_RE.sub(' ', s).strip()
-    return s
-
-def looks_like_junk(line):
-    if not line:
-        return True
-    if BOILERPLATE_RE.search(line):
-        return True
-    # lines with too few letters are junk
-    letters = re.findall(r'[A-Za-z]', line)
-    if len(letters) < 3 and len(line) < 40:
-        return True
-    # navigation-like short caps
-    if len(line) < 60 and re.search(r'\b(Next|Previous|Index|Contents|Back)\b', line, re.I):
-        return True
-    return False
+    s = INLINE_SPACE_RE.sub(' ', s)
+    return s.replace(' \n', '\n').replace('\n ', '\n').strip()
 
 def roman_to_int(r):
     r = r.upper()
@@ -85,165 +101,151 @@ def roman_to_int(r):
         prev = v
     return total
 
-def detect_mandala_token(line):
-    m = MANDALA_RE.search(line)
-    if not m:
-        return None
-    tok = m.group(1)
-    tok = tok.strip()
-    if ROMAN_ONLY.match(tok):
-        return roman_to_int(tok)
-    try:
-        return int(tok)
-    except:
-        return None
-
-def detect_hymn_token(line):
-    # try HYMN I. Agni style
-    m = HYMN_ALT_RE.match(line)
-    if m:
-        tok = m.group(1)
-        try:
-            if ROMAN_ONLY.match(tok):
-                return roman_to_int(tok)
-            return int(tok)
-        except:
-            return None
-    m2 = HYMN_RE.search(line)
-    if m2:
-        tok = m2.group(1)
-        if ROMAN_ONLY.match(tok):
-            return roman_to_int(tok)
-        try:
-            return int(tok)
-        except:
-            return None
-    return None
+def tokenize_paragraph(text):
+    """
+    Yield (kind, value, text) tokens for a normalized paragraph, from one PARA_TOKEN_RE scan:
+      ('book', mandala, line), ('hymn', sukta, line), ('junk', None, line),
+      ('verse', n, marker), ('inline_verse', n, marker), ('roman_verse', n, marker),
+      ('text', None, text between tokens)
+    'verse' markers start a line; 'inline_verse' markers follow other text on the same line.
+    """
+    text = '\n' + text
+    pos = 0
+    for m in PARA_TOKEN_RE.finditer(text):
+        start = m.start() + 1  # past the separator
+        if start > pos:
+            yield 'text', None, text[pos:start]
+        pos = m.end()
+        if m.group('hymn') is not None:
+            tok = m.group('sukta')
+            yield 'hymn', roman_to_int(tok) if not tok.isdigit() else int(tok), m.group('hymn')
+        elif m.group('junk') is not None:
+            yield 'junk', None, m.group('junk')
+        elif m.group('book') is not None:
+            tok = m.group('mandala')
+            yield 'book', roman_to_int(tok) if not tok.isdigit() else int(tok), m.group('book')
+        elif m.group('rverse') is not None:
+            yield 'roman_verse', roman_to_int(m.group('rnum')), m.group('rverse')
+        else:
+            yield ('verse' if text[m.start()] == '\n' else 'inline_verse'), int(m.group('num')), m.group('verse')
+    if pos < len(text):
+        yield 'text', None, text[pos:]
 
-def split_paragraphs(lines):
-    # split raw text lines into paragraphs separated by blank-ish lines
-    paras = []
+def iter_paragraphs(lines):
+    """Yield paragraphs (stripped lines joined by newlines) separated by blank-ish lines."""
     buf = []
     for ln in lines:
         s = ln.strip()
         if s == "":
             if buf:
-                paras.append(" ".join(buf).strip())
+                yield "\n".join(buf)
                 buf = []
             continue
         buf.append(s)
     if buf:
-        paras.append(" ".join(buf).strip())
-    return paras
+        yield "\n".join(buf)
 
-def parse_file(lines, min_length=10, allow_roman=True, verbose=False):
+def split_paragraphs(lines):
+    return list(iter_paragraphs(lines))
+
+def iter_entries(paragraphs, min_length=10, allow_roman=True, verbose=False):
     """
-    Stateful parsing:
-     - iterate paragraphs
-     - update mandala/hymn when headings detected
-     - extract numbered verses (or assign sequential verse_index per hymn)
-    Returns list of dicts: {'mandala':int,'sukta':int,'verse_index':int,'translation_text':str}
+    Stateful parsing over paragraph tokens:
+     - update mandala/hymn on heading lines, drop junk lines and any text before the first mandala heading
+     - each accepted verse marker starts a stanza that runs to the next marker, heading or junk
+       line; inline markers are accepted only as the next number in sequence, so most numbers in
+       the prose ("the 3 worlds") stay in the text
+     - text outside any numbered stanza becomes one stanza with the next sequential verse_index
+    Yields dicts: {'mandala':int,'sukta':int,'verse_index':int,'translation_text':str}
+    Only the current mandala/sukta/verse counters are kept, so any input size streams through.
     """
-    entries = []
     current_mandala = 0
     current_sukta = 0
     verse_counter = 0
 
-    paras = split_paragraphs(lines)
-    if verbose:
-        print(f"[parser] paragraphs: {len(paras)}", file=sys.stderr)
+    i = -1
+    for i, p in enumerate(paragraphs):
+        num = None  # verse number of the open stanza (None: unnumbered text)
+        buf = []
+        for kind, value, text in chain(tokenize_paragraph(normalize_paragraph(p)), [('end', None, '')]):
+            if kind == 'text' or (kind == 'inline_verse' and value != verse_counter + 1) \
+                    or (kind == 'roman_verse' and not allow_roman):
+                buf.append(text)
+                continue
 
-    for i, p in enumerate(paras):
-        ln = normalize_line(p)
-        if not ln or looks_like_junk(ln):
-            if verbose:
-                print(f"[skip] paragraph {i} junk/boilerplate: {ln[:80]!r}", file=sys.stderr)
-            continue
+            # Anything else closes the open stanza (its pieces are adjacent slices of the paragraph)
+            stanza = ''.join(buf).replace('\n', ' ').strip()
+            if stanza and not current_mandala:
+                # title page / preface before the first mandala heading is not a verse
+                if verbose:
+                    print(f"[skip] paragraph {i} text before the first mandala heading: {stanza[:80]!r}", file=sys.stderr)
+            elif stanza:
+                if num is None:
+                    verse_counter += 1
+                    num = verse_counter
+                if len(stanza) >= min_length:
+                    yield {'mandala': current_mandala, 'sukta': current_sukta, 'verse_index': num, 'translation_text': stanza}
+                elif verbose:
+                    print(f"[short] paragraph {i} stanza shorter than min_length -> skipped: {stanza[:80]!r}", file=sys.stderr)
+            num = None
+            buf = []
 
-        # Update mandala if paragraph looks like a Book/Mandala heading
-        mand_tok = detect_mandala_token(ln)
-        if mand_tok:
-            current_mandala = mand_tok
-            current_sukta = 0
-            verse_counter = 0
-            if verbose:
-                print(f"[mandala] detected mandala {current_mandala} at para {i}", file=sys.stderr)
-            # possible rest of line contains heading; skip to next para
-            continue
+            if kind == 'book':
+                current_mandala = value
+                current_sukta = 0
+                verse_counter = 0
+                if verbose:
+                    print(f"[mandala] detected mandala {current_mandala} at para {i}", file=sys.stderr)
+            elif kind == 'hymn':
+                current_sukta = value
+                verse_counter = 0
+                if verbose:
+                    print(f"[hymn] detected hymn/sukta {current_sukta} at para {i}", file=sys.stderr)
+            elif kind == 'junk':
+                if verbose:
+                    print(f"[skip] paragraph {i} junk/boilerplate: {text[:80]!r}", file=sys.stderr)
+            elif kind != 'end':
+                num = verse_counter = value
+    if verbose:
+        print(f"[parser] paragraphs: {i + 1}", file=sys.stderr)
 
-        # Update hymn/sukta if detected
-        hymn_tok = detect_hymn_token(ln)
-        if hymn_tok:
-            current_sukta = hymn_tok
-            verse_counter = 0
-            if verbose:
-                print(f"[hymn] detected hymn/sukta {current_sukta} at para {i}", file=sys.stderr)
-            # There may be a title (deity name) after the hymn token; don't treat as verse
-            continue
+def parse_file(lines, min_length=10, allow_roman=True, verbose=False):
+    """List form of iter_entries over raw text lines."""
+    return list(iter_entries(iter_paragraphs(lines), min_length, allow_roman, verbose))
 
-        # Check for explicit verse numbering within paragraph (one or many numbered lines)
-        # We'll split paragraph into lines and test each for number markers
-        para_lines = [l.strip() for l in re.split(r'\n+', p) if l.strip()]
-        explicit_found = False
-        for pl in para_lines:
-            m = VERSE_RE.match(pl)
-            if m:
-                num_tok = m.group(1)
-                rest = m.group(2).strip()
-                # parse number (arabic or roman)
-                try:
-                    if ROMAN_ONLY.match(num_tok) and allow_roman:
-                        num_val = roman_to_int(num_tok)
-                    else:
-                        num_val = int(num_tok)
-                except:
-                    num_val = None
-                # If we have a number, take rest as verse text (if rest long enough)
-                if num_val is not None and rest and len(rest) >= min_length:
-                    explicit_found = True
-                    verse_counter = num_val
-                    entries.append({'mandala': current_mandala, 'sukta': current_sukta, 'verse_index': verse_counter, 'translation_text': rest})
-                else:
-                    # If number present but rest short/empty, we may need to collect following lines.
-                    # For simplicity treat the full paragraph as stanza and assign num_val if present.
-                    if num_val is not None:
-                        explicit_found = True
-                        verse_counter = num_val
-                        text = pl
-                        if len(text) >= min_length:
-                            entries.append({'mandala': current_mandala, 'sukta': current_sukta, 'verse_index': verse_counter, 'translation_text': text})
-                # continue checking other lines in paragraph
-        if explicit_found:
-            continue
+def iter_lines(path):
+    """Lines of a text file (or stdin for '-') without trailing newlines, read lazily."""
+    if str(path) == "-":
+        for ln in sys.stdin:
+            yield ln.rstrip("\n")
+        return
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        for ln in fh:
+            yield ln.rstrip("\n")
 
-        # If paragraph contains no explicit numbers, treat it as a stanza:
-        verse_counter += 1
-        if len(ln) >= min_length:
-            entries.append({'mandala': current_mandala, 'sukta': current_sukta, 'verse_index': verse_counter, 'translation_text': ln})
-        else:
-            if verbose:
-                print(f"[short] paragraph {i} shorter than min_length -> skipped: {ln[:80]!r}", file=sys.stderr)
-    return entries
+def tally(entries, counts):
+    """Pass entries through, counting them per (mandala, sukta) into `counts`."""
+    for e in entries:
+        key = (int(e['mandala'] or 0), int(e['sukta'] or 0))
+        counts[key] = counts.get(key, 0) + 1
+        yield e
 
 def write_outputs(entries, out_dir:Path, prefix="griffith_map_v2"):
+    """Write CSV and JSONL side by side as entries arrive (single pass over `entries`)."""
     out_dir.mkdir(parents=True, exist_ok=True)
     csv_path = out_dir / f"{prefix}.csv"
     jsonl_path = out_dir / f"{prefix}.jsonl"
-    # write CSV
-    with csv_path.open("w", encoding="utf-8", newline='') as fh:
-        writer = csv.writer(fh)
+    with csv_path.open("w", encoding="utf-8", newline='') as cfh, jsonl_path.open("w", encoding="utf-8") as jfh:
+        writer = csv.writer(cfh)
         writer.writerow(['mandala','sukta','verse_index','translation_text'])
         for e in entries:
             writer.writerow([e['mandala'], e['sukta'], e['verse_index'], e['translation_text']])
-    # write JSONL
-    with jsonl_path.open("w", encoding="utf-8") as fh:
-        for e in entries:
-            fh.write(json.dumps(e, ensure_ascii=False) + "\n")
+            jfh.write(json.dumps(e, ensure_ascii=False) + "\n")
     return csv_path, jsonl_path
 
 def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--input","-i", required=True, help="Input plain-text Griffith file")
+    p.add_argument("--input","-i", required=True, help="Input plain-text Griffith file ('-' for stdin)")
     p.add_argument("--out-dir","-o", default="data/translations", help="Output directory")
     p.add_argument("--min-length", type=int, default=10, help="Minimum characters to consider a stanza")
     p.add_argument("--dry-run", action="store_true", help="Don't write files; print a sample and stats")
@@ -252,26 +254,21 @@ def main():
     args = p.parse_args()
 
     inp = Path(args.input)
-    if not inp.exists():
+    if args.input != "-" and not inp.exists():
         print("Input file not found:", inp, file=sys.stderr); sys.exit(2)
-    lines = []
-    with inp.open("r", encoding="utf-8", errors="replace") as fh:
-        for ln in fh:
-            lines.append(ln.rstrip("\n"))
-
-    entries = parse_file(lines, min_length=args.min_length, allow_roman=args.allow_roman, verbose=args.verbose)
 
-    # Post-process: coerce zeros -> 0, fill defaults, and remove entries with no mandala/sukta (optional)
-    # Keep entries even when mandala/sukta == 0 (you may inspect them), but we will report counts.
-    total = len(entries)
+    # lines -> paragraphs -> entries, all lazy; only per-(mandala,sukta) counts are kept.
+    # Entries with mandala/sukta == 0 are kept (you may inspect them) and show up in the counts.
     by_ms_count = {}
-    for e in entries:
-        key = (int(e['mandala'] or 0), int(e['sukta'] or 0))
-        by_ms_count[key] = by_ms_count.get(key,0) + 1
+    entries = tally(iter_entries(iter_paragraphs(iter_lines(args.input)), min_length=args.min_length,
+                                 allow_roman=args.allow_roman, verbose=args.verbose), by_ms_count)
 
     if args.dry_run:
-        print(f"Parsed entries: {total}", file=sys.stderr)
-        sample = entries[:40]
+        sample = []
+        for e in entries:
+            if len(sample) < 40:
+                sample.append(e)
+        print(f"Parsed entries: {sum(by_ms_count.values())}", file=sys.stderr)
         for e in sample:
             print(f"{e['mandala']},{e['sukta']},{e['verse_index']}: {e['translation_text'][:160]}")
         # print basic distribution for inspection
@@ -285,7 +282,7 @@ def main():
     out_dir = Path(args.out_dir)
     csv_path, jsonl_path = write_outputs(entries, out_dir)
     print("Wrote:", csv_path, jsonl_path, file=sys.stderr)
-    print(f"Total entries written: {total}", file=sys.stderr)
+    print(f"Total entries written: {sum(by_ms_count.values())}", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
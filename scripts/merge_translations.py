@@ -7,21 +7,28 @@ Merge Griffith (or other) translations into an existing canonical JSONL dataset.
 Features:
  - Accepts Griffith mapping in CSV or JSONL format (automatic detection).
  - Exact match by (mandala, sukta, verse_index) when possible.
- - Fallback "sequence alignment" per (mandala, sukta) to map translations by order
-   if exact verse_index keys are missing or inconsistent across sources.
+ - Fallback "sequence alignment" per (mandala, sukta): a banded DP alignment
+   (scripts/verse_align.py) on verse numbers and pada/word length shares, so a missing
+   or split stanza becomes a gap instead of shifting later verses. The report carries
+   a per-pair confidence.
  - Optionally overwrite existing translations with --overwrite.
  - Creates backups (if requested), detailed summary JSON and a mismatch CSV for manual review.
+ - Writes the aggregate cube for the merged output (<out>_aggregates.json, see
+   scripts/corpus_aggregates.py); --check-aggregates verifies it against the written file.
 
 Usage:
   python3 scripts/merge_translations.py \
     --dataset data/processed/rigveda_mandalas_1-10.jsonl \
     --griffith data/translations/griffith_map_clean.csv \
     --out data/processed/rigveda_with_translations.jsonl \
-    [--overwrite] [--backup] [--fuzzy] [--report data/processed/griffith_merge_report.csv]
+    [--overwrite] [--backup] [--fuzzy] [--report data/processed/griffith_merge_report.csv] [--stream]
+    [--check-aggregates]
 
 Notes:
  - The script is conservative by default (won't overwrite translations without --overwrite).
  - Use --fuzzy to attempt sequence-based mapping when verse_index mismatches are present.
+ - --stream joins the two inputs group by group instead of loading them; both must be ordered by
+   (mandala, sukta), as parse_rigveda.py and the Griffith CSV tools produce them.
 """
 
 from __future__ import annotations
@@ -32,7 +39,24 @@ import os
 import sys
 from typing import Dict, Tuple, List, Any
 from collections import defaultdict, Counter
-from copy import deepcopy
+from array import array
+from contextlib import ExitStack
+from itertools import groupby
+
+from corpus_aggregates import AggregateBuilder, write_aggregates
+from parse_rigveda import iter_json_array
+from verse_align import align_hymn
+
+# Per-record provenance codes (merge() keeps one byte per dataset record)
+MATCH_NONE, MATCH_EXACT, MATCH_OVERWRITE, MATCH_SEQUENCE = range(4)
+MATCH_METHODS = ("", "exact", "overwritten", "sequence")
+REPORT_HEADER = ['dataset_index','id','mandala','sukta','verse_index','existing_translation','new_translation','notes',
+                 'match_method','confidence']
+
+def _report_row(idx, rec, existing, method, confidence):
+    return [idx, rec.get('id'), rec.get('mandala'), rec.get('sukta'), rec.get('verse_index'),
+            existing or "", rec.get('translation') or "", rec.get('notes') or "",
+            MATCH_METHODS[method], f"{confidence:.3f}" if method == MATCH_SEQUENCE else ""]
 
 # ---------- Helper loaders ----------
 
@@ -58,15 +82,47 @@ def write_jsonl(records: List[Dict[str, Any]], out_path: str):
         for rec in records:
             fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
 
-def load_translations(path: str) -> Dict[Tuple[int,int,int], str]:
+def iter_jsonl_records(path: str):
+    """Stream a JSONL file one object at a time."""
+    with open(path, 'r', encoding='utf-8') as fh:
+        for i, line in enumerate(fh, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except Exception as e:
+                raise RuntimeError(f"Failed to parse JSONL at {path} line {i}: {e}")
+
+def _iter_json_items(path: str):
+    """Objects of a JSON array or JSONL translations file, read incrementally."""
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            # check if first non-empty line is JSON object or array
+            peek = None
+            for line in fh:
+                if line.strip():
+                    peek = line.strip()
+                    break
+            fh.seek(0)
+            if peek and peek.startswith('['):
+                # JSON array
+                yield from iter_json_array(fh)
+            else:
+                # assume JSONL
+                for line in fh:
+                    if not line.strip():
+                        continue
+                    yield json.loads(line)
+    except Exception as e:
+        raise RuntimeError(f"Could not read translations file {path}: {e}")
+
+def iter_translations(path: str):
     """
-    Load translations mapping from CSV or JSONL into a dict keyed by (mandala,sukta,verse_index).
-    If verse_index is missing or zero in source, it will still load rows keyed with verse_index==0.
+    Yield ((mandala,sukta,verse_index), text) from a CSV or JSON/JSONL translations file, in file order.
+    If verse_index is missing or zero in source, the row is keyed with verse_index==0.
     """
-    path_l = path.lower()
-    mapping = {}
-    entries_by_ms = defaultdict(list)  # for sequence fallback
-    if path_l.endswith('.csv'):
+    if path.lower().endswith('.csv'):
         with open(path, 'r', encoding='utf-8') as fh:
             reader = csv.DictReader(fh)
             # normalize header names
@@ -85,36 +141,9 @@ def load_translations(path: str) -> Dict[Tuple[int,int,int], str]:
                     v = 0
                 # pick possible translation columns
                 t = row.get('translation_text') or row.get('translation') or row.get('text') or ""
-                t = t.strip()
-                mapping[(m,s,v)] = t
-                entries_by_ms[(m,s)].append(((m,s,v), t))
+                yield (m,s,v), t.strip()
     else:
-        # try jsonl or json
-        try:
-            with open(path, 'r', encoding='utf-8') as fh:
-                # check if first non-empty line is JSON object or array
-                peek = None
-                for line in fh:
-                    if line.strip():
-                        peek = line.strip()
-                        break
-                fh.seek(0)
-                if peek and peek.startswith('['):
-                    # JSON array
-                    obj = json.load(fh)
-                    items = obj
-                else:
-                    # assume JSONL
-                    items = []
-                    fh.seek(0)
-                    for line in fh:
-                        if not line.strip():
-                            continue
-                        items.append(json.loads(line))
-        except Exception as e:
-            raise RuntimeError(f"Could not read translations file {path}: {e}")
-
-        for item in items:
+        for item in _iter_json_items(path):
             try:
                 m = int(item.get('mandala') or item.get('m') or 0)
             except:
@@ -128,31 +157,44 @@ def load_translations(path: str) -> Dict[Tuple[int,int,int], str]:
             except:
                 v = 0
             t = item.get('translation_text') or item.get('translation') or item.get('text') or ""
-            t = str(t).strip()
-            mapping[(m,s,v)] = t
-            entries_by_ms[(m,s)].append(((m,s,v), t))
+            yield (m,s,v), str(t).strip()
 
+def load_translations(path: str) -> Dict[Tuple[int,int,int], str]:
+    """
+    Load translations mapping from CSV or JSONL into a dict keyed by (mandala,sukta,verse_index).
+    If verse_index is missing or zero in source, it will still load rows keyed with verse_index==0.
+    """
+    mapping = {}
+    entries_by_ms = defaultdict(list)  # for sequence fallback
+    for key, t in iter_translations(path):
+        mapping[key] = t
+        entries_by_ms[key[:2]].append((key, t))
     return mapping, entries_by_ms
 
 # ---------- Core merge logic ----------
 
+def record_key(rec: Dict[str, Any]) -> Tuple[int,int,int]:
+    """(mandala, sukta, verse_index) of a dataset record, 0 for missing/invalid parts."""
+    try:
+        m = int(rec.get('mandala') or 0)
+    except:
+        m = 0
+    try:
+        s = int(rec.get('sukta') or 0)
+    except:
+        s = 0
+    try:
+        v = int(rec.get('verse_index') or 0)
+    except:
+        v = 0
+    return m, s, v
+
 def index_dataset(dataset: List[Dict[str, Any]]):
     """Create index: exact mapping (m,s,v) -> list of indices in dataset list."""
     index = defaultdict(list)
     ms_index = defaultdict(list)  # (m,s) -> list of dataset indices in natural order
     for idx, rec in enumerate(dataset):
-        try:
-            m = int(rec.get('mandala') or 0)
-        except:
-            m = 0
-        try:
-            s = int(rec.get('sukta') or 0)
-        except:
-            s = 0
-        try:
-            v = int(rec.get('verse_index') or 0)
-        except:
-            v = 0
+        m, s, v = record_key(rec)
         index[(m,s,v)].append(idx)
         ms_index[(m,s)].append((idx, v))
     # sort ms_index by verse_index so order is stable
@@ -173,10 +215,15 @@ def backup_file(path: str):
     return bak
 
 def merge(dataset_path: str, griffith_path: str, out_path: str,
-          overwrite: bool=False, backup: bool=False, fuzzy: bool=False, report_path: str=None):
+          overwrite: bool=False, backup: bool=False, fuzzy: bool=False, report_path: str=None,
+          check_aggregates: bool=False):
     # Load dataset
     dataset = load_jsonl(dataset_path)
-    orig_dataset = deepcopy(dataset)
+    # Provenance side arrays instead of a deep copy: the original translation and how each record was filled
+    orig_translation = [rec.get('translation') for rec in dataset]
+    match_method = bytearray(len(dataset))
+    match_confidence = array('f', bytes(4 * len(dataset)))  # alignment confidence of sequence matches
+    seq_matched_keys = set()  # translation keys placed (or already present) via sequence alignment
 
     # Optionally backup original dataset file
     backup_path = None
@@ -195,6 +242,7 @@ def merge(dataset_path: str, griffith_path: str, out_path: str,
         'total_translation_entries': len(griffith_map),
         'exact_matches_applied': 0,
         'sequence_matches_applied': 0,
+        'sequence_gaps': 0,
         'skipped_existing_translations': 0,
         'overwritten_translations': 0,
         'unmatched_translation_keys': 0,
@@ -229,8 +277,10 @@ def merge(dataset_path: str, griffith_path: str, out_path: str,
                     updated_indices.add(idx)
                     if existing and overwrite:
                         stats['overwritten_translations'] += 1
+                        match_method[idx] = MATCH_OVERWRITE
                     else:
                         stats['exact_matches_applied'] += 1
+                        match_method[idx] = MATCH_EXACT
         else:
             # will try sequence fallback later
             stats['unmatched_translation_keys'] += 1
@@ -254,19 +304,21 @@ def merge(dataset_path: str, griffith_path: str, out_path: str,
                 (km,ks,kv), txt = item
                 return (kv if isinstance(kv,(int,float)) and kv>0 else 1e9)
             entries_sorted = sorted(entries, key=_sort_key)
-            # if counts match or griffith has fewer, align by index
             if len(entries_sorted) == 0 or len(ds_indices) == 0:
                 continue
-            # We'll match up to min length
-            n_match = min(len(entries_sorted), len(ds_indices))
-            for i in range(n_match):
+            # Banded DP alignment on verse numbers and length shares; unpaired items become gaps
+            pairs = align_hymn(entries_sorted, [dataset[idx] for idx in ds_indices])
+            stats['sequence_gaps'] += len(entries_sorted) + len(ds_indices) - 2 * len(pairs)
+            for i, j, conf in pairs:
                 (gkey, gtext) = entries_sorted[i]
-                target_idx = ds_indices[i]
+                target_idx = ds_indices[j]
                 rec = dataset[target_idx]
                 existing = rec.get('translation')
                 # only update if empty or overwrite
                 if existing and existing != "" and not overwrite:
                     stats['skipped_existing_translations'] += 1
+                    if existing.strip() == gtext.strip():
+                        seq_matched_keys.add(gkey)  # the record already carries this translation
                     if len(stats['unmapped_translation_examples']) < 20:
                         stats['unmapped_translation_examples'].append({'sequence_skipped': (ms, i), 'existing_snip': existing[:120]})
                     continue
@@ -274,36 +326,23 @@ def merge(dataset_path: str, griffith_path: str, out_path: str,
                 notes = rec.get('notes') or ""
                 rec['notes'] = (notes + ";" if notes else "") + "griffith_seq_merged"
                 updated_indices.add(target_idx)
+                match_method[target_idx] = MATCH_SEQUENCE
+                match_confidence[target_idx] = conf
+                seq_matched_keys.add(gkey)
                 stats['sequence_matches_applied'] += 1
-                # If this gkey had previously been counted as unmatched, decrement
-                if gkey in griffith_map:
-                    # we matched this key; reduce unmatched counter if previously counted
-                    # (we don't remove from griffith_map dict, just adjust stats)
-                    pass
-
-    # 3) Final reporting: count leftover unmatched translation keys
-    unmatched = []
-    for key, text in griffith_map.items():
-        m,s,v = key
-        if key in index_exact:
-            # matched earlier
-            continue
-        # if fuzzy used we might have matched via sequence; detect if any dataset entries for ms have that text
-        matched_via_seq = False
-        if fuzzy:
-            ds_ms = ms_index.get((m,s), [])
-            # look for any dataset rec at idx that has translation exactly equal to this text
-            for idx,vv in ds_ms:
-                if dataset[idx].get('translation') and dataset[idx]['translation'].strip() == text.strip():
-                    matched_via_seq = True
-                    break
-        if not matched_via_seq:
-            unmatched.append({'key': key, 'text_snip': text[:200]})
+
+    # 3) Final reporting: keys matched neither exactly nor by sequence alignment (one pass, set lookups)
+    unmatched = [{'key': key, 'text_snip': text[:200]}
+                 for key, text in griffith_map.items()
+                 if key not in index_exact and key not in seq_matched_keys]
     stats['final_unmatched_translation_keys'] = len(unmatched)
     stats['final_unmatched_examples'] = unmatched[:20]
+    stats['match_method_counts'] = {MATCH_METHODS[c]: n for c, n in sorted(Counter(match_method).items()) if c}
 
-    # 4) Write out merged dataset
-    write_jsonl(dataset, out_path)
+    # 4) Write out merged dataset (and its aggregate cube)
+    aggregates = AggregateBuilder()
+    write_jsonl(aggregates.feed(dataset), out_path)
+    agg = write_aggregates(aggregates, out_path, check=check_aggregates)
 
     # 5) Write summary JSON
     summary = {
@@ -312,7 +351,8 @@ def merge(dataset_path: str, griffith_path: str, out_path: str,
         "output": out_path,
         "backup_created": backup_path if backup else None,
         "stats": stats,
-        "updated_record_count": len(updated_indices)
+        "updated_record_count": len(updated_indices),
+        "aggregates": {"cells": len(agg["cells"]), "check_problems": agg.get("check_problems")}
     }
     summary_path = os.path.splitext(out_path)[0] + "_merge_summary.json"
     with open(summary_path, 'w', encoding='utf-8') as sf:
@@ -323,17 +363,12 @@ def merge(dataset_path: str, griffith_path: str, out_path: str,
         # Report rows: dataset rec id, mandala,sukta,verse_index,existing_translation,merged_translation,notes
         with open(report_path, 'w', encoding='utf-8', newline='') as rf:
             writer = csv.writer(rf)
-            writer.writerow(['dataset_index','id','mandala','sukta','verse_index','existing_translation','new_translation','notes'])
+            writer.writerow(REPORT_HEADER)
             for idx, rec in enumerate(dataset):
-                did = rec.get('id')
-                m = rec.get('mandala'); s = rec.get('sukta'); v = rec.get('verse_index')
-                existing = None
-                # compare to original dataset to show change
-                orig_rec = orig_dataset[idx] if idx < len(orig_dataset) else {}
-                existing = orig_rec.get('translation') if orig_rec else None
+                existing = orig_translation[idx]
                 newt = rec.get('translation')
                 if (existing and existing != "") or (newt and newt != ""):
-                    writer.writerow([idx, did, m, s, v, existing or "", newt or "", rec.get('notes') or ""])
+                    writer.writerow(_report_row(idx, rec, existing, match_method[idx], match_confidence[idx]))
         # Also write unmatched translations to a separate file for manual inspection
         unmatched_path = os.path.splitext(report_path)[0] + "_unmatched.csv"
         with open(unmatched_path, 'w', encoding='utf-8', newline='') as uf:
@@ -344,6 +379,186 @@ def merge(dataset_path: str, griffith_path: str, out_path: str,
                 writer.writerow([m,s,v,u['text_snip']])
     return summary_path
 
+# ---------- Streaming merge (--stream) ----------
+
+def _ordered_groups(items, keyfn, label: str):
+    """groupby over a stream that must be ordered by (mandala, sukta); raises on out-of-order groups."""
+    prev = None
+    for key, grp in groupby(items, key=keyfn):
+        if prev is not None and key <= prev:
+            raise RuntimeError(f"{label} is not ordered by (mandala, sukta): {key} after {prev}; "
+                               f"sort it or run without --stream")
+        prev = key
+        yield key, list(grp)
+
+def _merge_group(recs, entries, overwrite: bool, fuzzy: bool, stats, exact_examples, seq_examples):
+    """
+    Apply the merge() rules to one (mandala, sukta) group: recs is [(dataset_index, record)],
+    entries the group's [((m,s,v), text)] in file order. Returns (orig_translation, match_method,
+    match_confidence, updated count, unmatched keys) for the group.
+    """
+    mapping = dict(entries)
+    stats['total_translation_entries'] += len(mapping)
+    orig_translation = [rec.get('translation') for _, rec in recs]
+    match_method = bytearray(len(recs))
+    match_confidence = array('f', bytes(4 * len(recs)))
+    index = defaultdict(list)
+    ordered = []  # (pos, verse_index) sorted by verse_index, as in index_dataset
+    for pos, (_, rec) in enumerate(recs):
+        key = record_key(rec)
+        index[key].append(pos)
+        ordered.append((pos, key[2]))
+    ordered.sort(key=lambda x: x[1])
+    updated = set()
+
+    # 1) Exact matching by (m,s,v)
+    for key, text in mapping.items():
+        if key not in index:
+            stats['unmatched_translation_keys'] += 1
+            if len(exact_examples) < 20:
+                exact_examples.append({'key':key, 'text_snip': text[:200]})
+            continue
+        for pos in index[key]:
+            rec = recs[pos][1]
+            existing = rec.get('translation')
+            if existing and existing != "" and not overwrite:
+                stats['skipped_existing_translations'] += 1
+                notes = rec.get('notes') or ""
+                if 'griffith_present' not in notes:
+                    rec['notes'] = (notes + ";" if notes else "") + "griffith_present"
+                continue
+            rec['translation'] = text
+            notes = rec.get('notes') or ""
+            rec['notes'] = (notes + ";" if notes else "") + ("griffith_overwritten" if existing and overwrite else "griffith_merged")
+            updated.add(pos)
+            if existing and overwrite:
+                stats['overwritten_translations'] += 1
+                match_method[pos] = MATCH_OVERWRITE
+            else:
+                stats['exact_matches_applied'] += 1
+                match_method[pos] = MATCH_EXACT
+
+    # 2) Sequence alignment fallback within the group
+    seq_matched_keys = set()
+    if fuzzy and entries and recs:
+        entries_sorted = sorted(entries, key=lambda item: item[0][2] if item[0][2] > 0 else 1e9)
+        pairs = align_hymn(entries_sorted, [recs[pos][1] for pos, _ in ordered])
+        stats['sequence_gaps'] += len(entries_sorted) + len(ordered) - 2 * len(pairs)
+        for i, j, conf in pairs:
+            gkey, gtext = entries_sorted[i]
+            pos = ordered[j][0]
+            rec = recs[pos][1]
+            existing = rec.get('translation')
+            if existing and existing != "" and not overwrite:
+                stats['skipped_existing_translations'] += 1
+                if existing.strip() == gtext.strip():
+                    seq_matched_keys.add(gkey)
+                if len(seq_examples) < 20:
+                    seq_examples.append({'sequence_skipped': (gkey[:2], i), 'existing_snip': existing[:120]})
+                continue
+            rec['translation'] = gtext
+            notes = rec.get('notes') or ""
+            rec['notes'] = (notes + ";" if notes else "") + "griffith_seq_merged"
+            updated.add(pos)
+            match_method[pos] = MATCH_SEQUENCE
+            match_confidence[pos] = conf
+            seq_matched_keys.add(gkey)
+            stats['sequence_matches_applied'] += 1
+
+    unmatched = [key for key in mapping if key not in index and key not in seq_matched_keys]
+    return orig_translation, match_method, match_confidence, len(updated), unmatched
+
+def merge_stream(dataset_path: str, griffith_path: str, out_path: str,
+                 overwrite: bool=False, backup: bool=False, fuzzy: bool=False, report_path: str=None,
+                 check_aggregates: bool=False):
+    """
+    Same merge as merge(), as a sort-merge join of the dataset and translation streams grouped by
+    (mandala, sukta). Both inputs must be ordered by (mandala, sukta) (verse order within a hymn is free);
+    output, report and unmatched rows are written group by group, so memory is bounded by one hymn.
+    """
+    backup_path = backup_file(dataset_path) if backup else None
+    stats = {
+        'total_dataset_records': 0,
+        'total_translation_entries': 0,
+        'exact_matches_applied': 0,
+        'sequence_matches_applied': 0,
+        'sequence_gaps': 0,
+        'skipped_existing_translations': 0,
+        'overwritten_translations': 0,
+        'unmatched_translation_keys': 0,
+        'unmapped_translation_examples': []
+    }
+    exact_examples, seq_examples, unmatched_examples = [], [], []
+    aggregates = AggregateBuilder()
+    method_counts = Counter()
+    n_unmatched = 0
+    n_updated = 0
+
+    out_dir = os.path.dirname(out_path)
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir, exist_ok=True)
+    ds_groups = _ordered_groups(enumerate(iter_jsonl_records(dataset_path)), lambda ir: record_key(ir[1])[:2], dataset_path)
+    tr_groups = _ordered_groups(iter_translations(griffith_path), lambda e: e[0][:2], griffith_path)
+    with ExitStack() as files:
+        out = files.enter_context(open(out_path, 'w', encoding='utf-8'))
+        report = unmatched_out = None
+        if report_path:
+            report = csv.writer(files.enter_context(open(report_path, 'w', encoding='utf-8', newline='')))
+            report.writerow(REPORT_HEADER)
+            unmatched_path = os.path.splitext(report_path)[0] + "_unmatched.csv"
+            unmatched_out = csv.writer(files.enter_context(open(unmatched_path, 'w', encoding='utf-8', newline='')))
+            unmatched_out.writerow(['mandala','sukta','verse_index','translation_snip'])
+
+        ds = next(ds_groups, None)
+        tr = next(tr_groups, None)
+        while ds is not None or tr is not None:
+            if tr is None or (ds is not None and ds[0] < tr[0]):
+                recs, entries = ds[1], []
+                ds = next(ds_groups, None)
+            elif ds is None or tr[0] < ds[0]:
+                recs, entries = [], tr[1]
+                tr = next(tr_groups, None)
+            else:
+                recs, entries = ds[1], tr[1]
+                ds, tr = next(ds_groups, None), next(tr_groups, None)
+
+            orig, methods, confidence, updated, unmatched = _merge_group(recs, entries, overwrite, fuzzy, stats, exact_examples, seq_examples)
+            stats['total_dataset_records'] += len(recs)
+            n_updated += updated
+            method_counts.update(methods)
+            for pos, (idx, rec) in enumerate(recs):
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                aggregates.add(rec)
+                newt = rec.get('translation')
+                if report and ((orig[pos] and orig[pos] != "") or (newt and newt != "")):
+                    report.writerow(_report_row(idx, rec, orig[pos], methods[pos], confidence[pos]))
+            texts = dict(entries)
+            for key in unmatched:
+                n_unmatched += 1
+                if len(unmatched_examples) < 20:
+                    unmatched_examples.append({'key': key, 'text_snip': texts[key][:200]})
+                if unmatched_out:
+                    unmatched_out.writerow([*key, texts[key][:200]])
+
+    agg = write_aggregates(aggregates, out_path, check=check_aggregates)
+    stats['unmapped_translation_examples'] = (exact_examples + seq_examples)[:20]
+    stats['final_unmatched_translation_keys'] = n_unmatched
+    stats['final_unmatched_examples'] = unmatched_examples
+    stats['match_method_counts'] = {MATCH_METHODS[c]: n for c, n in sorted(method_counts.items()) if c}
+    summary = {
+        "dataset_input": dataset_path,
+        "translations_input": griffith_path,
+        "output": out_path,
+        "backup_created": backup_path if backup else None,
+        "stats": stats,
+        "updated_record_count": n_updated,
+        "aggregates": {"cells": len(agg["cells"]), "check_problems": agg.get("check_problems")}
+    }
+    summary_path = os.path.splitext(out_path)[0] + "_merge_summary.json"
+    with open(summary_path, 'w', encoding='utf-8') as sf:
+        json.dump(summary, sf, ensure_ascii=False, indent=2)
+    return summary_path
+
 # ---------- CLI ----------
 
 def main():
@@ -355,16 +570,19 @@ def main():
     p.add_argument("--backup", action="store_true", help="Backup the original dataset JSONL (dataset.jsonl.bak)")
     p.add_argument("--fuzzy", action="store_true", help="Enable sequence-based fallback mapping per (mandala,sukta)")
     p.add_argument("--report", default=None, help="Optional CSV path to write a detailed merge report")
+    p.add_argument("--stream", action="store_true", help="Sort-merge join of inputs ordered by (mandala,sukta); memory bounded by one hymn")
+    p.add_argument("--check-aggregates", action="store_true", help="Re-read the output and verify the aggregate cube against it")
     args = p.parse_args()
 
-    summary_path = merge(
+    summary_path = (merge_stream if args.stream else merge)(
         dataset_path=args.dataset,
         griffith_path=args.griffith,
         out_path=args.out,
         overwrite=args.overwrite,
         backup=args.backup,
         fuzzy=args.fuzzy,
-        report_path=args.report
+        report_path=args.report,
+        check_aggregates=args.check_aggregates
     )
     print("Merge complete. Summary JSON written to:", os.path.splitext(args.out)[0] + "_merge_summary.json")
     if args.report:
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+scripts/page_index.py
+
+Compile the archive.org hOCR page helper (data/helpers/*_page_numbers.json: one entry per
+scanned leaf with the printed pageNumber OCR found on it) plus hymn start positions into a
+small sorted interval index, so parse_rigveda.py can resolve a verse's printed page with a
+binary search instead of loading the whole helper.
+
+  leaf -> page : printed arabic page numbers from the helper; undetected leaves between two
+                 detections with the same leaf/page offset are filled in, roman-numbered front
+                 matter and blank leaves stay null
+  hymn -> leaves : sorted (mandala, sukta) keys with the leaf range [start, next start]; a
+                 verse's leaf is interpolated within its hymn's range by verse position
+
+Hymn starts come from a CSV (mandala,sukta,leaf — or page, converted through the helper).
+Without one they are estimated by spreading hymns over the numbered leaves in proportion to
+their raw text length; the index then records source "estimated".
+
+The compiled index is cached as JSON under <cache-dir>/<key>.json, keyed by the sha256 of
+the helper and of the start positions (or of the raw files the estimate was made from).
+
+Usage:
+  python scripts/page_index.py \
+    --page-helper data/helpers/2015.237767.The-Hymns_page_numbers.json \
+    [--page-starts data/helpers/hymn_starts.csv | --input-dir data/raw] \
+    [--lookup 1.1.1]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+INDEX_VERSION = 2
+DEFAULT_CACHE_DIR = "data/processed/page_numbers.index"
+
+
+def hymn_key(mandala: int, sukta: int) -> int:
+    return int(mandala) * 1000 + int(sukta)
+
+
+def leaf_pages(helper: dict) -> List[Optional[int]]:
+    """Printed page per leaf (list index = leafNum); None where no arabic page number is known."""
+    pages = helper.get("pages") or []
+    n = max((int(p.get("leafNum", 0)) for p in pages), default=-1) + 1
+    out: List[Optional[int]] = [None] * n
+    for p in pages:
+        num = str(p.get("pageNumber") or "").strip()
+        if num.isdigit():
+            out[int(p["leafNum"])] = int(num)
+    # Fill leaves OCR missed when both neighbouring detections agree on the leaf/page offset
+    known = [leaf for leaf, page in enumerate(out) if page is not None]
+    for a, b in zip(known, known[1:]):
+        if b - a > 1 and a - out[a] == b - out[b]:
+            for leaf in range(a + 1, b):
+                out[leaf] = leaf - (a - out[a])
+    return out
+
+
+def read_starts(path: str, pages: List[Optional[int]]) -> Dict[Tuple[int, int], int]:
+    """(mandala, sukta) -> start leaf from a CSV with mandala,sukta and a leaf or page column."""
+    page_to_leaf = {page: leaf for leaf, page in enumerate(pages) if page is not None}
+    starts = {}
+    with open(path, 'r', encoding='utf-8', newline='') as fh:
+        for row in csv.DictReader(fh):
+            if (row.get("leaf") or "").strip():
+                leaf = int(row["leaf"])
+            elif int(row.get("page") or 0) in page_to_leaf:
+                leaf = page_to_leaf[int(row["page"])]
+            else:
+                continue
+            starts[(int(row["mandala"]), int(row["sukta"]))] = leaf
+    return starts
+
+
+def estimate_starts(weights: Dict[Tuple[int, int], int], pages: List[Optional[int]],
+                    first_page: Optional[int] = None, last_page: Optional[int] = None) -> Dict[Tuple[int, int], int]:
+    """Spread hymns (in canonical order) over the numbered leaves in proportion to their weights."""
+    leaves = [leaf for leaf, page in enumerate(pages)
+              if page is not None and (first_page is None or page >= first_page)
+              and (last_page is None or page <= last_page)]
+    if not leaves or not weights:
+        return {}
+    first, last = leaves[0], leaves[-1]
+    total = float(sum(max(w, 1) for w in weights.values()))
+    span = last - first + 1
+    starts = {}
+    done = 0
+    for hymn in sorted(weights):
+        starts[hymn] = first + min(span - 1, int(done / total * span))
+        done += max(weights[hymn], 1)
+    return starts
+
+
+class PageIndex:
+    """Sorted hymn intervals over scanned leaves; lookups are a bisect on the hymn key."""
+
+    def __init__(self, keys: List[int], start: List[int], end: List[int], pages: List[Optional[int]],
+                 source: str = "starts", key: str = ""):
+        self.keys = keys
+        self.start = start
+        self.end = end
+        self.pages = pages
+        self.source = source
+        self.key = key
+
+    @classmethod
+    def from_starts(cls, starts: Dict[Tuple[int, int], int], pages: List[Optional[int]],
+                    last_page: Optional[int] = None, **kw) -> "PageIndex":
+        items = sorted((hymn_key(m, s), leaf) for (m, s), leaf in starts.items())
+        keys = [k for k, _ in items]
+        start = [leaf for _, leaf in items]
+        # A hymn runs to the leaf the next one starts on (inclusive: hymns share leaves); the last
+        # one to the last numbered leaf (up to last_page)
+        last_leaf = max((leaf for leaf, page in enumerate(pages)
+                         if page is not None and (last_page is None or page <= last_page)), default=len(pages) - 1)
+        end = [max(a, b) for a, b in zip(start, start[1:] + [last_leaf])]
+        return cls(keys, start, end, pages, **kw)
+
+    def leaf(self, mandala: int, sukta: int, verse: int = 1, n_verses: int = 1) -> Optional[int]:
+        """Scanned leaf holding a verse, or None if its hymn is not in the index."""
+        k = hymn_key(mandala, sukta)
+        i = bisect_right(self.keys, k) - 1
+        if i < 0 or self.keys[i] != k:
+            return None
+        start, end = self.start[i], self.end[i]
+        frac = max(int(verse) - 1, 0) / max(int(n_verses), 1)
+        return min(end, start + int(frac * (end - start + 1)))
+
+    def lookup(self, mandala: int, sukta: int, verse: int = 1, n_verses: int = 1) -> Optional[int]:
+        """Printed page number of a verse, or None."""
+        leaf = self.leaf(mandala, sukta, verse, n_verses)
+        return self.pages[leaf] if leaf is not None and leaf < len(self.pages) else None
+
+    def to_json(self) -> dict:
+        return {"version": INDEX_VERSION, "key": self.key, "source": self.source,
+                "keys": self.keys, "start": self.start, "end": self.end, "pages": self.pages}
+
+    @classmethod
+    def from_json(cls, d: dict) -> "PageIndex":
+        return cls(d["keys"], d["start"], d["end"], d["pages"], source=d.get("source", "starts"), key=d.get("key", ""))
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def index_key(helper_path: str, starts_path: Optional[str] = None, raw_files: Iterable[str] = (),
+              first_page: Optional[int] = None, last_page: Optional[int] = None) -> str:
+    """Cache key: hashes of the helper and of whatever the hymn starts come from."""
+    parts = [f"v{INDEX_VERSION}", _sha256(helper_path)]
+    if starts_path:
+        parts.append("starts:" + _sha256(starts_path))
+    else:
+        parts.append(f"estimated:{first_page}:{last_page}")
+        parts += [os.path.basename(f) + ":" + _sha256(f) for f in sorted(raw_files)]
+    return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def hymn_text_lengths(raw_files: Iterable[str]) -> Dict[Tuple[int, int], int]:
+    """(mandala, sukta) -> raw text length, the weight used to estimate hymn starts."""
+    from parse_rigveda import iter_json_array
+
+    weights = {}
+    for file in raw_files:
+        with open(file, 'r', encoding='utf-8') as fh:
+            for entry in iter_json_array(fh):
+                hymn = (int(entry.get('mandala', 0)), int(entry.get('sukta', 0)))
+                weights[hymn] = weights.get(hymn, 0) + len(entry.get('text') or '')
+    return weights
+
+
+def load_or_build(helper_path: str, starts_path: Optional[str] = None, raw_files: Iterable[str] = (),
+                  cache_dir: str = DEFAULT_CACHE_DIR, first_page: Optional[int] = None,
+                  last_page: Optional[int] = None) -> PageIndex:
+    """Load the compiled index for these inputs from the cache, compiling (and caching) it on a miss."""
+    raw_files = list(raw_files)
+    key = index_key(helper_path, starts_path, raw_files, first_page, last_page)
+    cache_path = os.path.join(cache_dir, key + ".json")
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as fh:
+            return PageIndex.from_json(json.load(fh))
+    except (OSError, ValueError, KeyError):
+        pass
+
+    with open(helper_path, 'r', encoding='utf-8') as fh:
+        pages = leaf_pages(json.load(fh))
+    if starts_path:
+        index = PageIndex.from_starts(read_starts(starts_path, pages), pages, source="starts", key=key)
+    else:
+        starts = estimate_starts(hymn_text_lengths(raw_files), pages, first_page, last_page)
+        index = PageIndex.from_starts(starts, pages, last_page=last_page, source="estimated", key=key)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = cache_path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(index.to_json(), fh, separators=(',', ':'))
+    os.replace(tmp, cache_path)
+    return index
+
+
+def main():
+    import glob
+
+    p = argparse.ArgumentParser(description="Compile the hOCR page helper into a hymn -> page interval index")
+    p.add_argument("--page-helper", required=True, help="archive.org *_page_numbers.json")
+    p.add_argument("--page-starts", default=None, help="CSV mandala,sukta,leaf|page of hymn starts (default: estimate)")
+    p.add_argument("--input-dir", default="data/raw", help="Raw mandala files used to estimate hymn starts")
+    p.add_argument("--input-glob", default="rigveda_mandala_*.json")
+    p.add_argument("--first-page", type=int, default=None, help="Estimate: first printed page of hymn text")
+    p.add_argument("--last-page", type=int, default=None, help="Estimate: last printed page of hymn text")
+    p.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    p.add_argument("--lookup", action="append", default=[], help="Print the page of M.S.V (repeatable)")
+    args = p.parse_args()
+
+    raw_files = [] if args.page_starts else glob.glob(os.path.join(args.input_dir, args.input_glob))
+    index = load_or_build(args.page_helper, args.page_starts, raw_files, args.cache_dir, args.first_page, args.last_page)
+    numbered = sum(page is not None for page in index.pages)
+    print(f"{len(index.keys)} hymns over {numbered}/{len(index.pages)} numbered leaves "
+          f"({index.source}); cached as {os.path.join(args.cache_dir, index.key + '.json')}")
+    for ref in args.lookup:
+        m, s, v = (int(x) for x in ref.split('.'))
+        print(f"{ref}: page {index.lookup(m, s, v)} (leaf {index.leaf(m, s, v)})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
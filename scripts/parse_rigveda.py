@@ -3,26 +3,41 @@
 scripts/parse_rigveda.py
 
 Optimized: Enhanced header parsing (danda split), stanza split (danda+num capture),
-expanded regex/maps, pada extraction, dedup, stats. Outputs schema + 'padas'.
+expanded regex/maps, pada extraction, dedup, stats. Outputs schema + 'padas' +
+'search_key' (accent-stripped, folded Sanskrit used for search). Next to the JSONL it writes
+<output>_summary.json and the aggregate cube <output>_aggregates.json (corpus_aggregates.py;
+--check-aggregates verifies it against the written records).
 
 Usage:
   python scripts/parse_rigveda.py \
     --input-dir data/raw \
     --input-glob 'rigveda_mandala_*.json' \
     --output data/processed/rigveda_mandalas_1-10.jsonl \
-    --page-helper data/raw/2015.237767.The-Hymns_page_numbers.json \
+    --page-helper data/helpers/2015.237767.The-Hymns_page_numbers.json \
+    --page-starts data/helpers/hymn_starts.csv  # Optional: exact hymn start leaves/pages
+    --first-page 1 --last-page 400  # Optional: without --page-starts, estimate starts within these pages
     --max-suktas 100  # Optional: Limit for MVP
+    --incremental [--reparse 'rigveda_mandala_8.json']  # Optional: only re-parse changed mandalas
+    --workers 4  # Optional: parse mandala files in parallel processes
+    --check-aggregates  # Optional: re-read the output to verify the aggregate cube
 """
 
 import argparse
+import fnmatch
+import hashlib
 import json
 import os
 import glob
 import re
+import sys
 import unicodedata
-from collections import defaultdict, Counter
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from corpus_aggregates import AggregateBuilder, write_aggregates
+from page_index import load_or_build as load_page_index
+
 # ------- Constants & Maps -------
 DEITY_MAP = {
     "९": "अग्निः", "१०": "इन्द्रः", "४": "सोम पवमानः", "१२": "विश्वेदेवाः",
@@ -34,8 +49,18 @@ METRE_RE = re.compile(r'(गायत्री|त्रिष्टुप्|
 RISHI_RE_LAT = re.compile(r'\b(मधुच्छन्दा|वैश्वामित्र|गृत्समद|वामदेव|गौतम|कश्यप|आङ्गिरस|भरद्वाज|वसिष्ठ|Atri|Vishvamitra|Vasistha|Bharadvaja|Kashyapa|Angiras|Gritsamada|Kanva|Dirghatamas)\b', re.I)
 LATIN_DEITY_RE = re.compile(r'\b(Agni|Indra|Varuna|Soma|Rudra|Vayu|Surya|Mitra|Brahma|Aditi|Usas|Prajapati|Dawn|Dyaus|Ashvins|Maruts|Vishvadevas)\b', re.I)
 
+# Search-key folding: Vedic svara marks (udātta ॑, anudātta ॒, grave/acute, Vedic extensions) and ZWJ/ZWNJ
+VEDIC_MARKS_RE = re.compile(r'[\u0951-\u0954\u1CD0-\u1CFF\uA8E0-\uA8F1\u200C\u200D]')
+ASCII_VISARGA_RE = re.compile(r'(?<=[\u0900-\u097F]):')   # sources type visarga as ':' (विश्वत॑: → विश्वतः)
+FINAL_M_RE = re.compile(r'म्(?=\s|$)')                      # word-final म् and anusvara are sandhi variants
+KEY_DROP_RE = re.compile(r'[\u0964\u0965\u093D\u0966-\u096F0-9]+')  # dandas, avagraha, verse numbers
+WHITESPACE_RE = re.compile(r'\s+')
+
 VERSE_NUMBERED_MARKER = re.compile(r'^\s*\(?\d+\)?\s*[\.\-]?', flags=re.M)
 SUKTA_END_RE = re.compile(r'॥इति .*? मण्डलं समाप्तम्॥', re.I | re.DOTALL)
+STANZA_NUM_RE = re.compile(r'॥(\d+)॥')
+BLANK_LINE_RE = re.compile(r'\n\s*\n')
+OTHER_LINE_BREAK_RE = re.compile(r'[\x0b\x0c\x1c-\x1e\x85\u2028\u2029]')  # str.splitlines() breaks besides \n
 
 def normalize_text(s):
     if s is None:
@@ -49,21 +74,28 @@ def normalize_text(s):
     lines = [ln.rstrip() for ln in s.split("\n")]
     return "\n".join(lines).strip()
 
-def extract_header_fields(text):
-    """Parse header: Split first non-empty line by । for [num rishi] । deity । metre."""
-    if not text:
-        return None, None, None, [], ""
-    lines = [ln for ln in text.split("\n") if ln.strip()]
-    if not lines:
-        return None, None, None, [], text
-    header_line = lines[0].strip()
-    parts = re.split(r'।', header_line)
+def search_key(s):
+    """
+    Accent-stripped, NFD/NFC-folded form of a verse used for matching (app search + index).
+    Idempotent, so queries can be folded with the same function.
+    """
+    if not s:
+        return ""
+    s = unicodedata.normalize("NFD", str(s))
+    s = VEDIC_MARKS_RE.sub('', s)
+    s = unicodedata.normalize("NFC", s)
+    s = s.replace('\u0901', '\u0902')  # candrabindu -> anusvara
+    s = ASCII_VISARGA_RE.sub('\u0903', s)
+    s = KEY_DROP_RE.sub(' ', s)
+    s = FINAL_M_RE.sub('\u0902', s)
+    return WHITESPACE_RE.sub(' ', s).strip().casefold()
+
+def _header_fields(header_line):
+    """deity, rishi, metre from a '[num rishi] । deity । metre' header line (regex fallbacks)."""
+    parts = header_line.split('।')
     deity = None
     rishi = None
     metre = None
-    header_lines = [header_line] + lines[1:3]  # Up to 3 lines
-    body_start = 1 if len(lines) > 1 else 0
-    body = "\n".join(lines[body_start:]).strip()
 
     # Deity: parts[1], map if code
     if len(parts) > 1:
@@ -97,6 +129,18 @@ def extract_header_fields(text):
     # Multi-metre: Take first (e.g., "त्रिष्टुप्, १ अतिजगती" → "त्रिष्टुप्")
     if metre and ',' in metre:
         metre = metre.split(',')[0].strip()
+    return deity, rishi, metre
+
+def extract_header_fields(text):
+    """Parse header: Split first non-empty line by । for [num rishi] । deity । metre."""
+    if not text:
+        return None, None, None, [], ""
+    lines = [ln for ln in text.split("\n") if ln.strip()]
+    if not lines:
+        return None, None, None, [], text
+    header_line = lines[0].strip()
+    header_lines = [header_line] + lines[1:3]  # Up to 3 lines
+    deity, rishi, metre = _header_fields(header_line)
 
     # Find body start in original
     body = text.splitlines()[len(header_lines):]
@@ -109,7 +153,7 @@ def split_into_stanzas(body, metre=None):
     if not body:
         return []
     # Primary: Split on ॥\d+॥, capture num
-    stanzas = re.split(r'॥(\d+)॥', body)
+    stanzas = STANZA_NUM_RE.split(body)
     verses = []
     i = 0
     while i < len(stanzas):
@@ -128,7 +172,7 @@ def split_into_stanzas(body, metre=None):
             i += 1
     # Fallback if no dandas
     if not verses:
-        fallback = re.split(r'\n\s*\n', body)
+        fallback = BLANK_LINE_RE.split(body)
         for vi, stanza in enumerate(fallback[:10], 1):  # Limit
             content = normalize_text(stanza)
             padas = re.split(r'।', content)[:4]
@@ -136,109 +180,414 @@ def split_into_stanzas(body, metre=None):
             verses.append({'num': vi, 'sanskrit': content, 'padas': padas})
     return verses
 
-def parse_files(input_dir, pattern, output_file, page_helper_path=None, max_suktas=None):
-    files = glob.glob(os.path.join(input_dir, pattern))
-    files.sort()  # Mandala order
-    records = []
-    stats = defaultdict(int)
-    id_counter = Counter()
+def _stanza_text(s):
+    """Trim a stanza cut from already-normalized sukta text (normalize_text only if an end marker survived)."""
+    if '॥इति' in s:
+        return normalize_text(s)
+    return s.strip()
+
+def _verse(num, content, metre):
+    padas = [p.strip() for p in content.split('।', 4)[:4] if p.strip()]
+    if not padas and metre == 'गायत्री':
+        words = content.split()
+        padas = [' '.join(words[j:j+3]) for j in range(0, len(words), 3)][:3]
+    return {'num': num, 'sanskrit': content, 'padas': padas}
+
+def tokenize_sukta(raw):
+    """
+    One pass over a raw sukta: normalize once, then emit header fields and stanzas/padas.
+    Same result as normalize_text + extract_header_fields + split_into_stanzas, without
+    re-normalizing every stanza or splitting the text twice.
+    Returns (deity, rishi, metre, header_lines, verses).
+    """
+    text = normalize_text(raw)
+    if not text:
+        return None, None, None, [], []
+    if OTHER_LINE_BREAK_RE.search(text):  # header/body line counts differ from split('\n'); use the reference path
+        deity, rishi, metre, header_lines, body = extract_header_fields(text)
+        return deity, rishi, metre, header_lines, split_into_stanzas(body, metre)
+
+    lines = text.split('\n')  # normalize_text already rstripped every line
+    header_line = lines[0].strip()  # text is stripped, so the first line is non-blank
+    header_lines = [header_line]
+    for ln in lines[1:]:
+        if len(header_lines) == 3:  # Up to 3 lines, as in extract_header_fields
+            break
+        if ln.strip():
+            header_lines.append(ln)
+    deity, rishi, metre = _header_fields(header_line)
+    body = "\n".join(lines[len(header_lines):]).strip()
+    if not body:
+        return deity, rishi, metre, header_lines, []
+
+    verses = []
+    prev = 0
+    for m in STANZA_NUM_RE.finditer(body):
+        verses.append(_verse(int(m.group(1)), _stanza_text(body[prev:m.start()]), metre))
+        prev = m.end()
+    if not verses:
+        for vi, stanza in enumerate(BLANK_LINE_RE.split(body)[:10], 1):
+            content = _stanza_text(stanza)
+            padas = [p.strip() for p in content.split('।', 4)[:4] if p.strip()]
+            verses.append({'num': vi, 'sanskrit': content, 'padas': padas})
+    return deity, rishi, metre, header_lines, verses
+
+def natural_key(path):
+    """Sort rigveda_mandala_2.json before rigveda_mandala_10.json."""
+    return [int(t) if t.isdigit() else t for t in re.split(r'(\d+)', os.path.basename(path))]
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def iter_json_array(fh, chunk_size=1 << 16):
+    """
+    Yield the elements of a top-level JSON array one at a time, reading the file in chunks,
+    so a raw mandala file is never fully loaded (json.load would hold the whole array).
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    fill()
+    skip_ws()
+    if pos >= len(buf) or buf[pos] != '[':
+        raise ValueError("expected a JSON array")
+    pos += 1
+    need_sep = False
+    first = True
+    while True:
+        skip_ws()
+        if pos >= len(buf):
+            raise ValueError("unterminated JSON array")
+        if need_sep:
+            if buf[pos] == ']':
+                return
+            if buf[pos] != ',':
+                raise ValueError(f"expected ',' in JSON array, got {buf[pos]!r}")
+            pos += 1
+            need_sep = False
+            continue
+        if first and buf[pos] == ']':
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if end == len(buf) and not eof:
+            fill()  # a value touching the buffer end (e.g. a number) may continue in the next chunk
+            continue
+        yield obj
+        pos = end
+        need_sep = True
+        first = False
+
+def iter_file_records(file, page_index=None, max_suktas=None):
+    """Stream verse records from one raw mandala file (ids deduplicated within the file)."""
     seen_ids = set()
-    page_helper = {}
-    if page_helper_path:
-        with open(page_helper_path, 'r', encoding='utf-8') as f:
-            page_helper = json.load(f)
+    with open(file, 'r', encoding='utf-8') as fh:
+        for entry in iter_json_array(fh):
+            yield from _entry_records(file, entry, page_index, max_suktas, seen_ids)
+
+def parse_file(file, page_index=None, max_suktas=None):
+    """Parse one raw mandala file into a list of verse records (used for shards / worker processes)."""
+    return list(iter_file_records(file, page_index, max_suktas))
+
+def _entry_records(file, entry, page_index, max_suktas, seen_ids):
+    """Verse records of one sukta entry."""
+    mandala = entry.get('mandala', 0)
+    sukta = entry.get('sukta', 0)
+    if max_suktas and sukta > max_suktas:
+        return
+    deity, rishi, metre, _, verses = tokenize_sukta(entry.get('text', ''))
+    for v in verses:
+        rec_id = f"RV-{mandala:02d}-{sukta:03d}-{v['num']:02d}"
+        if rec_id in seen_ids:
+            continue  # Dedup
+        seen_ids.add(rec_id)
+        rec = {
+            "id": rec_id,
+            "mandala": int(mandala),
+            "sukta": int(sukta),
+            "verse_index": int(v['num']),
+            "verse_id": f"{mandala}.{sukta}.{v['num']}",
+            "deity": deity,
+            "rishi": rishi,
+            "sanskrit": v['sanskrit'],
+            "search_key": search_key(v['sanskrit']),
+            "transliteration": None,
+            "translation": None,
+            "metre": metre,
+            "padas": v['padas'],  # New: For viz
+            "source_file": os.path.basename(file),
+            "page_number": page_index.lookup(mandala, sukta, v['num'], len(verses)) if page_index else None,
+            "notes": None
+        }
+        # Notes
+        notes = []
+        if not deity: notes.append("deity_missing")
+        if not rishi: notes.append("rishi_missing")
+        if not metre: notes.append("metre_missing")
+        if rec["page_number"] is not None and page_index.source == "estimated":
+            notes.append("page_number_estimated")
+        if notes: rec["notes"] = ";".join(notes)
+        yield rec
+
+# ------- Incremental build (manifest + per-file shards) -------
+
+def build_dir_for(output_file):
+    return os.path.splitext(output_file)[0] + ".build"
+
+def load_manifest(build_dir):
+    try:
+        with open(os.path.join(build_dir, "manifest.json"), 'r', encoding='utf-8') as mf:
+            return json.load(mf)
+    except (OSError, ValueError):
+        return {}
+
+def read_shard(path):
+    with open(path, 'r', encoding='utf-8') as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
 
+def write_shard(path, records):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        for rec in records:
+            fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+def parse_many(files, page_index=None, max_suktas=None, workers=1):
+    """
+    Parse files serially or across a process pool. Returns {file: records}; files that fail are
+    reported and left out. Callers iterate their own ordered file list, so the merge order (and
+    therefore dedup-by-id and the output bytes) is identical for any worker count.
+    """
+    results = {}
+    if workers and workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+            futures = {file: pool.submit(parse_file, file, page_index, max_suktas) for file in files}
+            for file, fut in futures.items():
+                try:
+                    results[file] = fut.result()
+                except Exception as e:
+                    print(f"Error parsing {file}: {e}", file=sys.stderr)
+        return results
     for file in files:
         try:
-            with open(file, 'r', encoding='utf-8') as fh:
-                data = json.load(fh)
-            for entry in data:
-                mandala = entry.get('mandala', 0)
-                sukta = entry.get('sukta', 0)
-                if max_suktas and sukta > max_suktas:
-                    continue
-                text = normalize_text(entry.get('text', ''))
-                deity, rishi, metre, _, body = extract_header_fields(text)
-                verses = split_into_stanzas(body, metre)
-                for v in verses:
-                    rec_id = f"RV-{mandala:02d}-{sukta:03d}-{v['num']:02d}"
-                    if rec_id in seen_ids:
-                        continue  # Dedup
-                    seen_ids.add(rec_id)
-                    rec = {
-                        "id": rec_id,
-                        "mandala": int(mandala),
-                        "sukta": int(sukta),
-                        "verse_index": int(v['num']),
-                        "verse_id": f"{mandala}.{sukta}.{v['num']}",
-                        "deity": deity,
-                        "rishi": rishi,
-                        "sanskrit": v['sanskrit'],
-                        "transliteration": None,
-                        "translation": None,
-                        "metre": metre,
-                        "padas": v['padas'],  # New: For viz
-                        "source_file": os.path.basename(file),
-                        "page_number": page_helper.get(f"{mandala}-{sukta}-{v['num']}", None),
-                        "notes": None
-                    }
-                    # Notes
-                    notes = []
-                    if not deity: notes.append("deity_missing")
-                    if not rishi: notes.append("rishi_missing")
-                    if not metre: notes.append("metre_missing")
-                    if notes: rec["notes"] = ";".join(notes)
-                    records.append(rec)
-                    stats[mandala] += 1
-                    id_counter[rec_id] += 1
+            results[file] = parse_file(file, page_index, max_suktas)
         except Exception as e:
             print(f"Error parsing {file}: {e}", file=sys.stderr)
+    return results
+
+def parse_files(input_dir, pattern, output_file, page_helper_path=None, max_suktas=None,
+                incremental=False, reparse=None, workers=1, page_starts_path=None,
+                first_page=None, last_page=None, check_aggregates=False):
+    """
+    Parse all raw files and write the JSONL + summary.
+
+    incremental: keep a build manifest (<output>.build/manifest.json) with a content hash and the
+      build key (parser source / options) per raw file and a per-file shard of parsed records; only
+      files whose hash or build key changed are re-parsed, the rest are spliced back from their shards.
+    reparse: glob of file names to re-parse even if their hash and build key are unchanged; the
+      other files are spliced from their shards as long as their hash matches, even if the build
+      key changed (each shard keeps the key it was parsed with, so a later run without reparse
+      rebuilds the stale ones).
+    workers: parse files in a process pool of this size (output is byte-identical to workers=1).
+    page_helper_path / page_starts_path: the hOCR page list and optional hymn starts CSV, compiled
+      by page_index.py into a cached interval index (<output dir>/page_numbers.index/) that
+      resolves page_number per verse; without a starts CSV the hymn starts are estimated by text
+      length between first_page and last_page, and each such record gets "page_number_estimated"
+      in its notes.
+    check_aggregates: re-read the output and verify the aggregate cube against it (a second pass).
+    """
+    files = glob.glob(os.path.join(input_dir, pattern))
+    files.sort(key=natural_key)  # Mandala order (1, 2, ..., 10)
+    page_index = None
+    if page_helper_path:
+        page_index = load_page_index(page_helper_path, page_starts_path, [] if page_starts_path else files,
+                                     cache_dir=os.path.join(os.path.dirname(output_file), "page_numbers.index"),
+                                     first_page=first_page, last_page=last_page)
 
-    # Dedup post-process: Keep longest sanskrit per ID
-    deduped = {}
-    for rec in records:
-        vid = rec['verse_id']
-        if vid not in deduped or len(rec['sanskrit']) > len(deduped[vid]['sanskrit']):
-            deduped[vid] = rec
-    records = list(deduped.values())
+    build_dir = build_dir_for(output_file)
+    manifest = load_manifest(build_dir) if incremental else {}
+    build_key = {
+        "parser_sha256": file_sha256(os.path.abspath(__file__)),
+        "max_suktas": max_suktas,
+        "page_index_key": page_index.key if page_index else None,
+    }
+    new_manifest = {"build_key": build_key, "files": {}}
+    reparsed = []
+
+    # Decide per file: splice from shard, or (re)parse
+    plan = []  # (file, shard path or None, digest or None, reused manifest entry or None)
+    for file in files:
+        name = os.path.basename(file)
+        if not incremental:
+            plan.append((file, None, None, None))
+            continue
+        try:
+            digest = file_sha256(file)
+        except OSError as e:
+            print(f"Error parsing {file}: {e}", file=sys.stderr)
+            continue
+        shard = os.path.join(build_dir, "shards", name + "l")  # .json -> .jsonl
+        old = manifest.get("files", {}).get(name)
+        forced = reparse is not None and fnmatch.fnmatch(name, reparse)
+        # With --reparse only the named files are rebuilt: the others are spliced back even if parsed
+        # with an older parser, and keep that build key so the next plain run re-parses them
+        reuse = bool(old and old.get("sha256") == digest and not forced and os.path.exists(shard)
+                     and (reparse is not None or old.get("build_key") == build_key))
+        plan.append((file, shard, digest, old if reuse else None))
+
+    per_file = []
+    if not incremental and not (workers and workers > 1):
+        # Plain serial build: a generator per file, records flow straight from the raw JSON to the writer
+        for file, _, _, _ in plan:
+            per_file.append(_safe_records(file, page_index, max_suktas))
+            reparsed.append(os.path.basename(file))
+    else:
+        to_parse = [file for file, _, _, reused in plan if reused is None]
+        parsed = parse_many(to_parse, page_index, max_suktas, workers)
+        for file, shard, digest, reused in plan:
+            name = os.path.basename(file)
+            if reused is not None:
+                per_file.append(read_shard(shard))
+                count = reused.get("records")
+            else:
+                recs = parsed.get(file)
+                if recs is None:
+                    continue  # error already reported
+                reparsed.append(name)
+                if incremental:
+                    write_shard(shard, recs)
+                per_file.append(recs)
+                count = len(recs)
+            if incremental:
+                new_manifest["files"][name] = {"sha256": digest, "build_key": reused["build_key"] if reused else build_key,
+                                               "shard": os.path.relpath(shard, build_dir), "records": count}
+
+    if incremental:
+        new_manifest["generated_at"] = datetime.now().isoformat()
+        os.makedirs(build_dir, exist_ok=True)
+        with open(os.path.join(build_dir, "manifest.json"), 'w', encoding='utf-8') as mf:
+            json.dump(new_manifest, mf, ensure_ascii=False, indent=2)
+
+    aggregates = AggregateBuilder()
+    summary = splice_and_write(per_file, output_file, pattern, aggregates)
+    summary["reparsed_files"] = reparsed
+    agg = write_aggregates(aggregates, output_file, check=check_aggregates)
+    summary["aggregates"] = {"cells": len(agg["cells"]), "check_problems": agg.get("check_problems")}
+    if page_index:
+        summary["page_index"] = {"source": page_index.source, "hymns": len(page_index.keys), "key": page_index.key}
+    summary_path = os.path.splitext(output_file)[0] + "_summary.json"
+    with open(summary_path, 'w', encoding='utf-8') as sf:
+        json.dump(summary, sf, ensure_ascii=False, indent=2)
+    return summary
+
+def _safe_records(file, page_index, max_suktas):
+    """iter_file_records, reporting (not raising) errors; records yielded before an error are kept."""
+    try:
+        yield from iter_file_records(file, page_index, max_suktas)
+    except Exception as e:
+        print(f"Error parsing {file}: {e}", file=sys.stderr)
+
+def splice_and_write(per_file, output_file, pattern, aggregates=None):
+    """
+    Stream per-file record iterables in order into the JSONL, deduplicating ids across files,
+    and return the summary. Only ids and per-mandala counters are kept, so memory does not
+    grow with verse text. Written records are also added to `aggregates` (an AggregateBuilder).
+    """
+    stats = defaultdict(int)
+    with_deity = defaultdict(int)
+    seen_ids = set()
+    seen_verse_ids = set()
+    duplicates = []
 
-    # Output
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
     with open(output_file, 'w', encoding='utf-8') as out_fh:
-        for rec in records:
-            out_fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        for recs in per_file:
+            for rec in recs:
+                # Dedup across files (first wins). id and verse_id are both derived from the same
+                # (mandala, sukta, verse) triple, so the verse_id guard only catches malformed input.
+                if rec['id'] in seen_ids or rec['verse_id'] in seen_verse_ids:
+                    duplicates.append(rec['id'])
+                    continue
+                seen_ids.add(rec['id'])
+                seen_verse_ids.add(rec['verse_id'])
+                out_fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                if aggregates is not None:
+                    aggregates.add(rec)
+                stats[rec['mandala']] += 1
+                if rec['deity']:
+                    with_deity[rec['mandala']] += 1
 
     # Enhanced summary
-    total = len(rec)
-    coverage = {k: {'verses': v, 'deity_%': sum(1 for r in records if r['mandala']==k and r['deity']) / v * 100 if v else 0} for k,v in stats.items()}
-    summary = {
+    total = sum(stats.values())
+    coverage = {k: {'verses': v, 'deity_%': with_deity[k] / v * 100 if v else 0} for k,v in stats.items()}
+    return {
         "generated_at": datetime.now().isoformat(),
         "input_pattern": pattern,
         "total_records": total,
         "by_mandala": dict(coverage),
-        "duplicates": [k for k,v in id_counter.items() if v>1]
+        "duplicates": duplicates
     }
-    summary_path = os.path.splitext(output_file)[0] + "_summary.json"
-    with open(summary_path, 'w', encoding='utf-8') as sf:
-        json.dump(summary, sf, ensure_ascii=False, indent=2)
-    return summary
 
 def main():
-    import sys
     p = argparse.ArgumentParser(description=__doc__)
     p.add_argument("--input-dir", default="data/raw")
     p.add_argument("--input-glob", default="rigveda_mandala_*.json")
     p.add_argument("--output", default="data/processed/rigveda_mandalas_1-10.jsonl")
-    p.add_argument("--page-helper", default=None)
+    p.add_argument("--page-helper", default=None, help="archive.org hOCR page list (*_page_numbers.json) to resolve page_number")
+    p.add_argument("--page-starts", default=None, help="With --page-helper: CSV mandala,sukta,leaf|page of hymn starts (default: estimated from text length)")
+    p.add_argument("--first-page", type=int, default=None, help="Page estimate: first printed page of hymn text in the scanned volume")
+    p.add_argument("--last-page", type=int, default=None, help="Page estimate: last printed page of hymn text in the scanned volume")
     p.add_argument("--max-suktas", type=int, default=None, help="Limit suktas per mandala")
+    p.add_argument("--incremental", action="store_true", help="Re-parse only raw files whose content hash changed (manifest + shards in <output>.build/)")
+    p.add_argument("--workers", type=int, default=1, help="Parse raw files in a pool of N processes (default 1 = serial)")
+    p.add_argument("--reparse", default=None, help="With --incremental: glob of raw file names to force re-parsing (e.g. 'rigveda_mandala_8.json')")
+    p.add_argument("--check-aggregates", action="store_true", help="Re-read the output and verify the aggregate cube against it")
     args = p.parse_args()
 
-    summary = parse_files(args.input_dir, args.input_glob, args.output, args.page_helper, args.max_suktas)
+    summary = parse_files(args.input_dir, args.input_glob, args.output, args.page_helper, args.max_suktas,
+                          incremental=args.incremental, reparse=args.reparse, workers=args.workers,
+                          page_starts_path=args.page_starts, first_page=args.first_page, last_page=args.last_page,
+                          check_aggregates=args.check_aggregates)
     summary_path = os.path.splitext(args.output)[0] + "_summary.json"
     print(f"Wrote {summary['total_records']} records to {args.output}")
+    if args.incremental:
+        print(f"Re-parsed {len(summary['reparsed_files'])} file(s): {summary['reparsed_files']}")
     print("By mandala (verses, deity %):", {k: f"{v['verses']} ({v['deity_%']:.1f}%)" for k,v in summary['by_mandala'].items()})
     if summary["duplicates"]:
         print(f"Warning: {len(summary['duplicates'])} duplicate IDs (sample): {summary['duplicates'][:5]}")
+    if summary["aggregates"]["check_problems"]:
+        print(f"Warning: aggregates disagree with the output in {summary['aggregates']['check_problems']} place(s)")
     print(f"Summary: {summary_path}")
 
 if __name__ == "__main__":
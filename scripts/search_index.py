@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+scripts/search_index.py
+
+Prebuilt positional inverted index over the Sanskrit search key (accent-stripped,
+see parse_rigveda.search_key) and translation text of the processed dataset, so
+search in the app is a posting-list lookup instead of a regex scan over every row.
+
+Layout (directory next to the dataset, e.g. rigveda_with_translations.index/):
+  - manifest.json      : source fingerprint, row count, average document length
+  - terms.txt          : sorted vocabulary, one term per line (term id = line number)
+  - post_offsets.npy   : int64, per term -> slice of post_rows/post_tf
+  - post_rows.npy      : int32 row ids (same row order as the corpus store / JSONL)
+  - post_tf.npy        : uint16 term frequency per posting
+  - pos_offsets.npy    : int64, per posting -> slice of positions
+  - positions.npy      : int32 token positions (for phrase queries)
+  - doc_len.npy        : int32 tokens per row (BM25 length normalization)
+
+Query syntax (all clauses must match; results ranked by BM25):
+  agni indra          terms
+  agn*                prefix
+  "household priest"  phrase
+
+Usage:
+  python scripts/search_index.py \
+    --dataset data/processed/rigveda_with_translations.jsonl \
+    [--out data/processed/rigveda_with_translations.index] [--query 'agni "chosen priest"']
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import re
+import shutil
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from corpus_store import _iter_jsonl, file_fingerprint
+from parse_rigveda import search_key
+
+INDEX_VERSION = 3
+# (field, fallback) - datasets parsed before 'search_key' existed are folded at build time instead
+INDEX_FIELDS = (("search_key", "sanskrit"), ("translation", None))
+FIELD_GAP = 16          # position gap between fields so phrases never span sanskrit -> translation
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Word = letters/digits plus Devanagari (minus danda U+0964/U+0965), Vedic extensions and Latin combining marks
+TOKEN_RE = re.compile(r"(?:[^\W_]|[\u0900-\u0963\u0966-\u097F\u1CD0-\u1CFF\uA8E0-\uA8FF\u0300-\u036F])+")
+QUERY_RE = re.compile(r'"([^"]*)"?|(\S+)')
+LATIN_MARKS_RE = re.compile(r"[\u0300-\u036F]")
+# Devanagari (with Vedic extensions, ZWJ/ZWNJ and a trailing ASCII ':' typed for visarga)
+DEVANAGARI_RUN_RE = re.compile(r"[\u0900-\u097F\u1CD0-\u1CFF\uA8E0-\uA8FF\u200C\u200D]+:?")
+PREFOLDED_FIELDS = {"search_key"}
+
+
+def fold(text: str) -> str:
+    """
+    Form used for queries and for raw (not pre-folded) fields: Devanagari runs get the Sanskrit
+    search key (Vedic accents, dandas and verse numbers stripped, so अग्निमीळे matches अ॒ग्निमी॑ळे),
+    everything else only has Latin diacritics and case folded (Aṅgiras -> angiras, "10" stays).
+    """
+    text = DEVANAGARI_RUN_RE.sub(lambda m: search_key(m.group()), text)
+    text = LATIN_MARKS_RE.sub("", unicodedata.normalize("NFD", text))
+    return unicodedata.normalize("NFC", text).casefold()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return TOKEN_RE.findall(fold(text))
+
+
+def field_tokens(rec: Dict, field: str, fallback: Optional[str] = None) -> List[str]:
+    """Tokens of one record field; the search key is stored folded by the parser and only split here."""
+    value = rec.get(field)
+    if value and field in PREFOLDED_FIELDS:
+        return TOKEN_RE.findall(value)
+    return tokenize(value or (rec.get(fallback) if fallback else None))
+
+
+def default_index_path(dataset_path) -> Path:
+    return Path(dataset_path).with_suffix(".index")
+
+
+# ---------- Build ----------
+
+def build_index(dataset_path, out_dir=None) -> Path:
+    dataset_path = Path(dataset_path)
+    out_dir = Path(out_dir) if out_dir else default_index_path(dataset_path)
+
+    # term -> list of (row, [positions])
+    postings: Dict[str, list] = defaultdict(list)
+    doc_len = []
+    for row, rec in enumerate(_iter_jsonl(dataset_path)):
+        pos = 0
+        term_pos: Dict[str, list] = defaultdict(list)
+        for field, fallback in INDEX_FIELDS:
+            toks = field_tokens(rec, field, fallback)
+            for t in toks:
+                term_pos[t].append(pos)
+                pos += 1
+            pos += FIELD_GAP
+        doc_len.append(pos - FIELD_GAP * len(INDEX_FIELDS))
+        for t, plist in term_pos.items():
+            postings[t].append((row, plist))
+
+    terms = sorted(postings)
+    n_post = sum(len(postings[t]) for t in terms)
+    n_pos = sum(len(p) for t in terms for _, p in postings[t])
+    post_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    post_rows = np.empty(n_post, dtype=np.int32)
+    post_tf = np.empty(n_post, dtype=np.uint16)
+    pos_offsets = np.zeros(n_post + 1, dtype=np.int64)
+    positions = np.empty(n_pos, dtype=np.int32)
+    pi = 0
+    qi = 0
+    for ti, t in enumerate(terms):
+        for row, plist in postings[t]:
+            post_rows[pi] = row
+            post_tf[pi] = min(len(plist), 65535)
+            positions[qi:qi + len(plist)] = plist
+            qi += len(plist)
+            pi += 1
+            pos_offsets[pi] = qi
+        post_offsets[ti + 1] = pi
+
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    with open(tmp_dir / "terms.txt", "w", encoding="utf-8") as fh:
+        fh.write("\n".join(terms))
+    np.save(tmp_dir / "post_offsets.npy", post_offsets)
+    np.save(tmp_dir / "post_rows.npy", post_rows)
+    np.save(tmp_dir / "post_tf.npy", post_tf)
+    np.save(tmp_dir / "pos_offsets.npy", pos_offsets)
+    np.save(tmp_dir / "positions.npy", positions)
+    np.save(tmp_dir / "doc_len.npy", np.asarray(doc_len, dtype=np.int32))
+    manifest = {
+        "index_version": INDEX_VERSION,
+        "generated_at": datetime.now().isoformat(),
+        "source": str(dataset_path),
+        "source_fingerprint": file_fingerprint(dataset_path),
+        "fields": [f for f, _ in INDEX_FIELDS],
+        "rows": len(doc_len),
+        "terms": len(terms),
+        "postings": n_post,
+        "avg_doc_len": (sum(doc_len) / len(doc_len)) if doc_len else 0.0,
+    }
+    with open(tmp_dir / "manifest.json", "w", encoding="utf-8") as mf:
+        json.dump(manifest, mf, ensure_ascii=False, indent=2)
+
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    tmp_dir.rename(out_dir)
+    return out_dir
+
+
+# ---------- Query ----------
+
+class SearchIndex:
+    """Memory-mapped inverted index. search() returns row ids ranked by BM25."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "manifest.json", "r", encoding="utf-8") as mf:
+            self.manifest = json.load(mf)
+        if self.manifest.get("index_version") != INDEX_VERSION:
+            raise RuntimeError(f"Unsupported index version in {self.path}: {self.manifest.get('index_version')}")
+        with open(self.path / "terms.txt", "r", encoding="utf-8") as fh:
+            text = fh.read()
+        self.terms: List[str] = text.split("\n") if text else []
+        self.term_ids: Dict[str, int] = {t: i for i, t in enumerate(self.terms)}
+        load = lambda name: np.load(self.path / f"{name}.npy", mmap_mode="r")
+        self.post_offsets = load("post_offsets")
+        self.post_rows = load("post_rows")
+        self.post_tf = load("post_tf")
+        self.pos_offsets = load("pos_offsets")
+        self.positions = load("positions")
+        self.doc_len = load("doc_len")
+        self.n_rows = self.manifest["rows"]
+        self.avg_doc_len = self.manifest["avg_doc_len"] or 1.0
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Term-id range [lo, hi) of every vocabulary entry starting with prefix."""
+        lo = bisect_left(self.terms, prefix)
+        return lo, bisect_left(self.terms, prefix + "\U0010ffff", lo)
+
+    def _range_scores(self, lo: int, hi: int) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 contributions of every posting of term ids [lo, hi); postings of a range are contiguous."""
+        a, b = int(self.post_offsets[lo]), int(self.post_offsets[hi])
+        rows = np.asarray(self.post_rows[a:b])
+        tf = np.asarray(self.post_tf[a:b], dtype=np.float64)
+        dfs = np.diff(np.asarray(self.post_offsets[lo:hi + 1]))
+        idf = np.repeat(np.log1p((self.n_rows - dfs + 0.5) / (dfs + 0.5)), dfs)
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self.doc_len[rows] / self.avg_doc_len)
+        return rows, idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+
+    def _position_keys(self, tid: int, offset: int) -> np.ndarray:
+        """row << 32 | (position - offset) for every occurrence of a term (postings are contiguous)."""
+        a, b = int(self.post_offsets[tid]), int(self.post_offsets[tid + 1])
+        lo, hi = int(self.pos_offsets[a]), int(self.pos_offsets[b])
+        counts = np.diff(np.asarray(self.pos_offsets[a:b + 1]))
+        rows = np.repeat(np.asarray(self.post_rows[a:b], dtype=np.int64), counts)
+        pos = np.asarray(self.positions[lo:hi], dtype=np.int64) - offset
+        ok = pos >= 0
+        return (rows[ok] << 32) | pos[ok]
+
+    def _clause(self, lo: int, hi: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        OR over term ids [lo, hi) (a single term or a whole prefix expansion); summed scores per row.
+        The range's postings are contiguous, so even a one-letter prefix is a single bincount.
+        """
+        if hi <= lo:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        rows, scores = self._range_scores(lo, hi)
+        if hi - lo == 1:
+            return rows, scores
+        uniq = np.flatnonzero(np.bincount(rows, minlength=self.n_rows)).astype(np.int32)
+        return uniq, np.bincount(rows, weights=scores, minlength=self.n_rows)[uniq]
+
+    def _phrase(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        tids = [self.term_ids.get(w) for w in words]
+        if any(t is None for t in tids):
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        # Align every occurrence on the phrase start position and intersect
+        keys = self._position_keys(tids[0], 0)
+        for off, t in enumerate(tids[1:], start=1):
+            if not len(keys):
+                break
+            keys = np.intersect1d(keys, self._position_keys(t, off), assume_unique=True)
+        rows = np.unique(keys >> 32).astype(np.int32)
+        scores = np.zeros(len(rows))
+        for t in set(tids):
+            r, sc = self._clause(t, t + 1)
+            scores += sc[np.searchsorted(r, rows)]
+        return rows, scores
+
+    def search(self, query: str, limit: Optional[int] = None, prefix_last: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (row_ids, scores) for rows matching every clause, best first.
+        prefix_last treats a trailing bare word as a prefix (search-as-you-type).
+        """
+        clauses = []
+        matches = list(QUERY_RE.finditer(query or ""))
+        for qi, m in enumerate(matches):
+            if m.group(1) is not None:
+                words = tokenize(m.group(1))
+                if len(words) > 1:
+                    clauses.append(self._phrase(words))
+                    continue
+                raw, is_prefix = (words[0] if words else ""), False
+            else:
+                raw = m.group(2)
+                is_prefix = raw.endswith("*") or (prefix_last and qi == len(matches) - 1)
+                words = tokenize(raw)
+                if len(words) > 1:  # e.g. a hyphenated word: treat as phrase
+                    clauses.append(self._phrase(words))
+                    continue
+                raw = words[0] if words else ""
+            if not raw:
+                continue
+            if is_prefix:
+                clauses.append(self._clause(*self.prefix_range(raw)))
+            else:
+                tid = self.term_ids.get(raw)
+                clauses.append(self._clause(tid, tid + 1) if tid is not None else self._clause(0, 0))
+
+        if not clauses:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        rows, scores = clauses[0]
+        for r2, s2 in clauses[1:]:
+            rows, i1, i2 = np.intersect1d(rows, r2, assume_unique=True, return_indices=True)
+            scores = scores[i1] + s2[i2]
+        order = np.argsort(-scores, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return rows[order], scores[order]
+
+
+def index_is_fresh(dataset_path, index_path) -> bool:
+    manifest_path = Path(index_path) / "manifest.json"
+    if not manifest_path.exists():
+        return False
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as mf:
+            manifest = json.load(mf)
+    except (OSError, ValueError):
+        return False
+    return (manifest.get("index_version") == INDEX_VERSION
+            and manifest.get("source_fingerprint") == file_fingerprint(dataset_path))
+
+
+def open_index(dataset_path, index_path=None, rebuild_stale: bool = True) -> SearchIndex:
+    """Open the index for a dataset, (re)building it first if it is missing or older than the JSONL."""
+    index_path = Path(index_path) if index_path else default_index_path(dataset_path)
+    if rebuild_stale and not index_is_fresh(dataset_path, index_path):
+        build_index(dataset_path, index_path)
+    return SearchIndex(index_path)
+
+
+# ---------- CLI ----------
+
+def main():
+    p = argparse.ArgumentParser(description="Build (and optionally query) the full-text index for the processed dataset")
+    p.add_argument("--dataset", default="data/processed/rigveda_with_translations.jsonl", help="Input JSONL")
+    p.add_argument("--out", default=None, help="Index directory (default: <dataset>.index)")
+    p.add_argument("--query", default=None, help="Run a query against the built index and print the top hits")
+    p.add_argument("--limit", type=int, default=10)
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
+    out = build_index(args.dataset, args.out)
+    idx = SearchIndex(out)
+    print(f"Indexed {len(idx)} rows, {idx.manifest['terms']} terms, {idx.manifest['postings']} postings "
+          f"in {time.perf_counter() - t0:.2f}s -> {out}")
+    if args.query:
+        t0 = time.perf_counter()
+        rows, scores = idx.search(args.query, limit=args.limit)
+        print(f"{len(rows)} hits in {(time.perf_counter() - t0) * 1000:.3f} ms")
+        for r, s in zip(rows.tolist(), scores.tolist()):
+            print(f"  row {r}  score {s:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+scripts/split_griffith_verses.py
+
+Split whole-hymn Griffith rows ("I Laud Agni ... 2 Worthy is Agni ...", all under
+verse_index 1) into one row per verse, so merge_translations.py becomes a 1:1 keyed
+join on (mandala, sukta, verse_index).
+
+Verse markers are found with one compiled regex; a marker is only taken when it is one of
+the next MAX_VERSE_SKIP + 1 numbers in sequence (after 2: 3, or 4 when marker 3 is lost, ...),
+so numbers inside the prose ("the 30 worlds") rarely cause false splits and one missing
+marker does not fold the rest of the hymn into the previous verse. Rows that already hold a
+single verse (no marker anywhere) pass through unchanged without being scanned.
+
+With --dataset, split counts are compared to the Sanskrit verse count per hymn
+(the highest verse_index, or the row count if larger) and mismatches are written for review.
+
+Usage:
+  python scripts/split_griffith_verses.py \
+    --input data/translations/griffith_map_clean.csv \
+    --output data/translations/griffith_map_verses.csv \
+    [--dataset data/processed/rigveda_mandalas_1-10.jsonl] \
+    [--mismatches data/translations/griffith_split_mismatches.csv]
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# A verse number preceded by whitespace (or at the start) and followed by text
+VERSE_MARK_RE = re.compile(r'(?:^|(?<=\s))(\d{1,3})\s+(?=[^\s\d])')
+HAS_MARK_RE = re.compile(r'(?:^|(?<=\s))\d{1,3}\s+(?=[^\s\d])')  # same, without the group (for str.contains)
+MAX_VERSE_SKIP = 2  # missing markers tolerated between two verses
+
+
+def split_hymn(text, first=1):
+    """
+    Split one hymn blob into [(verse_number, text)]. Text before the first marker is verse
+    `first` (Griffith omits the leading "1"); an explicit leading marker is honoured.
+    """
+    text = (text or "").strip()
+    verses = []
+    num = first
+    expected = first + 1
+    start = 0
+    for m in VERSE_MARK_RE.finditer(text):
+        n = int(m.group(1))
+        if m.start() == 0 and n == first:
+            start = m.end()
+            continue
+        if not expected <= n <= expected + MAX_VERSE_SKIP:
+            continue
+        verses.append((num, text[start:m.start()].strip()))
+        num = n
+        start = m.end()
+        expected = n + 1
+    verses.append((num, text[start:].strip()))
+    return [(n, t) for n, t in verses if t]
+
+
+def split_frame(df):
+    """Explode a mandala,sukta,verse_index,translation_text frame into one row per verse."""
+    df = df.copy()
+    first = pd.to_numeric(df['verse_index'], errors='coerce').fillna(1).astype(int).clip(lower=1)
+    text = df['translation_text'].astype(str)
+    # Only rows with a marker need the sequential scan; the rest are one verse already
+    marked = text.str.contains(HAS_MARK_RE).to_numpy()
+    df['_parts'] = [split_hymn(t, f) if m else [(f, t.strip())] if t.strip() else []
+                    for t, f, m in zip(text, first, marked)]
+    out = df[['mandala', 'sukta', '_parts']].explode('_parts').dropna(subset=['_parts'])
+    parts = pd.DataFrame(out['_parts'].tolist(), index=out.index, columns=['verse_index', 'translation_text'])
+    out = pd.concat([out[['mandala', 'sukta']], parts], axis=1)
+    out['mandala'] = pd.to_numeric(out['mandala'], errors='coerce').fillna(0).astype(int)
+    out['sukta'] = pd.to_numeric(out['sukta'], errors='coerce').fillna(0).astype(int)
+    out = out.drop_duplicates(subset=['mandala', 'sukta', 'verse_index'], keep='first')
+    return out.sort_values(['mandala', 'sukta', 'verse_index'], kind='stable').reset_index(drop=True)
+
+
+def sanskrit_verse_counts(dataset_path):
+    """(mandala, sukta) -> number of Sanskrit verses, from a processed dataset JSONL."""
+    rows = []
+    with open(dataset_path, 'r', encoding='utf-8') as fh:
+        for line in fh:
+            if line.strip():
+                rec = json.loads(line)
+                rows.append((rec.get('mandala'), rec.get('sukta'), rec.get('verse_index')))
+    ds = pd.DataFrame(rows, columns=['mandala', 'sukta', 'verse_index']).apply(pd.to_numeric, errors='coerce').dropna()
+    g = ds.groupby(['mandala', 'sukta'])['verse_index']
+    counts = pd.concat([g.max(), g.size()], axis=1).max(axis=1).astype(int)
+    counts.index = counts.index.set_levels([lvl.astype(int) for lvl in counts.index.levels])
+    return counts.rename('sanskrit_verses')
+
+
+def compare_counts(split_df, counts):
+    """Hymns whose split verse count differs from the Sanskrit count (or exists on one side only)."""
+    split_counts = split_df.groupby(['mandala', 'sukta']).size().rename('split_verses')
+    cmp = pd.concat([split_counts, counts], axis=1).fillna(0).astype(int)
+    cmp = cmp[cmp['split_verses'] != cmp['sanskrit_verses']].reset_index()
+    cmp['status'] = 'fewer'
+    cmp.loc[cmp['split_verses'] > cmp['sanskrit_verses'], 'status'] = 'more'
+    cmp.loc[cmp['sanskrit_verses'] == 0, 'status'] = 'no_sanskrit'
+    cmp.loc[cmp['split_verses'] == 0, 'status'] = 'no_translation'
+    return cmp
+
+
+def main():
+    p = argparse.ArgumentParser(description="Split whole-hymn Griffith rows into per-verse rows")
+    p.add_argument("--input", "-i", required=True, help="CSV with mandala,sukta,verse_index,translation_text")
+    p.add_argument("--output", "-o", required=True, help="Per-verse CSV for merge_translations.py")
+    p.add_argument("--dataset", default=None, help="Processed Sanskrit JSONL to check verse counts against")
+    p.add_argument("--mismatches", default=None, help="CSV of hymns whose counts differ (default: <output>_mismatches.csv)")
+    args = p.parse_args()
+
+    inp = Path(args.input)
+    if not inp.exists():
+        print("Input file not found:", inp)
+        return 1
+    df = pd.read_csv(inp, dtype=str, keep_default_na=False)
+    out = split_frame(df)
+    out.to_csv(args.output, index=False)
+    stats = {'input_rows': len(df), 'verse_rows': len(out), 'hymns': int(out.groupby(['mandala', 'sukta']).ngroups)}
+    print(f"Wrote {len(out)} verse rows ({stats['hymns']} hymns) from {len(df)} input rows to {args.output}")
+
+    if args.dataset:
+        mism = compare_counts(out, sanskrit_verse_counts(args.dataset))
+        mism_path = args.mismatches or str(Path(args.output).with_suffix('')) + "_mismatches.csv"
+        mism.to_csv(mism_path, index=False)
+        stats['count_mismatches'] = mism['status'].value_counts().to_dict()
+        print(f"{len(mism)} hymn(s) with verse-count mismatches written to {mism_path}")
+
+    stats_path = Path(args.output).with_suffix('.json')
+    with open(stats_path, 'w', encoding='utf-8') as sf:
+        json.dump(stats, sf, indent=2)
+    print("Summary:", json.dumps(stats))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+scripts/text_patterns.py
+
+Shared multi-pattern matching for the Griffith cleaners, built once per pattern set:
+
+  - PhraseReplacer : dictionary replacement (archaic -> modern, misprint -> fix) in one pass.
+                     Phrases are compiled into a single character-trie regex, so lookup cost
+                     per position depends on phrase length, not on the number of entries,
+                     and the dictionary can grow to thousands of words. Longest phrase wins.
+  - PhraseMatcher  : tags found in a text (boilerplate, navigation tokens, ...) from literal
+                     phrases plus a few regex fragments, in one scan. Overlapping phrases
+                     ("Sanskrit Index" / "Index") all report their tags, with the first offset
+                     of each tag so callers can test for line-initial headers.
+
+Whole-word mode only asserts a boundary where the phrase edge is a word character
+("Next:" still matches "Next: Hymn 2").
+
+Usage (check a replacement table against a text file):
+  python scripts/text_patterns.py --corrections corrections.json --input verses.txt
+"""
+
+import argparse
+import json
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+WORD_CHAR_RE = re.compile(r'\w')
+
+
+def _is_word(ch: str) -> bool:
+    return WORD_CHAR_RE.match(ch) is not None
+
+
+def trie_pattern(phrases: Iterable[str]) -> str:
+    """Regex source matching any of the phrases, longest first, as a nested character trie."""
+    trie: Dict[str, dict] = {}
+    for p in phrases:
+        node = trie
+        for ch in p:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node) -> Optional[str]:
+        end = '' in node
+        singles, alts = [], []
+        for ch in sorted(k for k in node if k):
+            sub = build(node[ch])
+            if sub is None:
+                singles.append(re.escape(ch))
+            else:
+                alts.append(re.escape(ch) + sub)
+        if singles:
+            alts.append(singles[0] if len(singles) == 1 else '[' + ''.join(singles) + ']')
+        if not alts:
+            return None
+        body = alts[0] if len(alts) == 1 else '(?:' + '|'.join(alts) + ')'
+        if end:
+            body = '(?:' + body + ')?'
+        return body
+
+    return build(trie) or '(?!)'
+
+
+def phrase_pattern(phrases: List[str], whole_words: bool = True) -> str:
+    """
+    Regex source matching any phrase (longest first), for embedding in a larger pattern.
+    Tries are grouped by whether each phrase edge needs a word boundary.
+    """
+    if not whole_words:
+        return trie_pattern(phrases)
+    groups: Dict[Tuple[bool, bool], List[str]] = {}
+    for p in phrases:
+        groups.setdefault((bool(re.match(r'\w', p)), bool(re.search(r'\w$', p))), []).append(p)
+    parts = []
+    for (left, right), ps in sorted(groups.items()):
+        parts.append(('(?<!\\w)' if left else '') + '(?:' + trie_pattern(ps) + ')' + ('(?!\\w)' if right else ''))
+    return '|'.join(parts) if parts else '(?!)'
+
+
+def tag_phrases(**groups: Iterable[str]) -> Dict[str, List[str]]:
+    """{phrase: [tags]} for PhraseMatcher from tag=phrases keywords; a phrase may carry several tags."""
+    tags: Dict[str, List[str]] = {}
+    for tag, phrases in groups.items():
+        for p in phrases:
+            tags.setdefault(p, []).append(tag)
+    return tags
+
+
+class PhraseReplacer:
+    """Replace every dictionary phrase in one left-to-right pass (longest match, no cascading)."""
+
+    def __init__(self, mapping: Dict[str, str], ignore_case: bool = False, whole_words: bool = True):
+        self.ignore_case = ignore_case
+        self.mapping = {(k.lower() if ignore_case else k): v for k, v in mapping.items() if k}
+        self.regex = re.compile(phrase_pattern(list(self.mapping), whole_words), re.I if ignore_case else 0)
+
+    def _repl(self, m):
+        key = m.group(0)
+        return self.mapping[key.lower() if self.ignore_case else key]
+
+    def __call__(self, text: str) -> str:
+        if not text or not self.mapping:
+            return text
+        return self.regex.sub(self._repl, text)
+
+
+class PhraseMatcher:
+    """
+    Find which tags occur in a text. `phrases` maps literal phrases to tags; `patterns` maps
+    regex fragments to tags for the few entries that are not literal (e.g. r'={3,}').
+    """
+
+    def __init__(self, phrases: Dict[str, Iterable[str]], patterns: Optional[Dict[str, Iterable[str]]] = None,
+                 ignore_case: bool = True, whole_words: bool = True):
+        self.ignore_case = ignore_case
+        self.whole_words = whole_words
+        self.tags: Dict[str, Tuple[str, ...]] = {}
+        for p, tags in phrases.items():
+            key = p.lower() if ignore_case else p
+            self.tags[key] = tuple(dict.fromkeys(self.tags.get(key, ()) + tuple(tags)))
+        self.trie: Dict[str, dict] = {}
+        for p in self.tags:
+            node = self.trie
+            for ch in p:
+                node = node.setdefault(ch, {})
+            node[''] = {}
+        flags = re.I if ignore_case else 0
+        self.fragments = [(re.compile(src, flags), tuple(tags)) for src, tags in (patterns or {}).items()]
+        alts = ['(?P<lit>' + phrase_pattern(list(self.tags), whole_words) + ')']
+        alts += [f'(?P<p{i}>{src})' for i, src in enumerate(patterns or {})]
+        self.regex = re.compile('|'.join(alts), flags)
+
+    def _literal_tags(self, text: str, start: int, out: Dict[str, int]):
+        """Tags of every phrase that starts at `start` (the regex reports only the longest)."""
+        if self.whole_words and start > 0 and _is_word(text[start - 1]) and _is_word(text[start]):
+            return
+        node = self.trie
+        i = start
+        while i < len(text):
+            ch = text[i].lower() if self.ignore_case else text[i]
+            node = node.get(ch)
+            if node is None:
+                return
+            i += 1
+            if '' in node:
+                right_ok = (not self.whole_words or i == len(text)
+                            or not (_is_word(text[i - 1]) and _is_word(text[i])))
+                if right_ok:
+                    phrase = (text[start:i].lower() if self.ignore_case else text[start:i])
+                    for t in self.tags.get(phrase, ()):
+                        out.setdefault(t, start)
+
+    def find(self, text: str) -> Dict[str, int]:
+        """{tag: first offset} for all tags present in text."""
+        out: Dict[str, int] = {}
+        if not text:
+            return out
+        pos = 0
+        search = self.regex.search
+        while True:
+            m = search(text, pos)
+            if m is None:
+                return out
+            s = m.start()
+            self._literal_tags(text, s, out)
+            for rx, tags in self.fragments:
+                if rx.match(text, s):
+                    for t in tags:
+                        out.setdefault(t, s)
+            pos = s + 1  # overlapping occurrences starting later are still reported
+
+
+def main():
+    p = argparse.ArgumentParser(description="Apply a phrase replacement table to a text file in one pass per line")
+    p.add_argument("--corrections", required=True, help="JSON object {phrase: replacement}")
+    p.add_argument("--input", required=True, help="UTF-8 text file")
+    p.add_argument("--ignore-case", action="store_true")
+    args = p.parse_args()
+    with open(args.corrections, 'r', encoding='utf-8') as fh:
+        replacer = PhraseReplacer(json.load(fh), ignore_case=args.ignore_case)
+    with open(args.input, 'r', encoding='utf-8') as fh:
+        for line in fh:
+            print(replacer(line.rstrip('\n')))
+
+
+if __name__ == "__main__":
+    main()
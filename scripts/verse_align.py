@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+scripts/verse_align.py
+
+Banded Needleman-Wunsch alignment of translation entries to dataset verses within one
+(mandala, sukta), used by merge_translations.py --fuzzy instead of a positional zip, so a
+missing or split stanza only costs a gap instead of shifting every later verse.
+
+Pair confidence (0..1) combines two signals, computed for the whole hymn at once with numpy:
+  - length: each verse's share of the hymn's padas vs the entry's share of the hymn's
+    English words (min/max of the two shares)
+  - numbering: the entry's verse number (its key, else a leading "N " in the text)
+    agreeing / disagreeing with the record's verse_index (unknown counts as neutral)
+The DP maximises sum(confidence - 0.5) minus GAP_PENALTY per unpaired item, over cells
+within a band around the diagonal, so cost is O(n * band) per hymn. Each row of the band is
+filled with array operations (the in-row gap chain is a running maximum), so the Python
+loop is only over rows.
+
+Usage (review the alignment without merging):
+  python scripts/verse_align.py \
+    --dataset data/processed/rigveda_mandalas_1-10.jsonl \
+    --griffith data/translations/griffith_map_clean.csv \
+    [--out data/processed/griffith_alignment.csv] [--min-confidence 0.6]
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import re
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+GAP_PENALTY = 0.3
+BAND_SLACK = 3      # band half-width beyond the length difference of the two sequences
+TIE_EPS = 1e-9      # scores equal up to float rounding count as ties
+LEADING_NUM_RE = re.compile(r'^\s*(\d+)\b')
+
+
+def entry_number(key: Tuple[int, int, int], text: str) -> int:
+    """Verse number of a translation entry: its key's verse_index, else a leading number in the text; -1 if unknown."""
+    if key[2] and key[2] > 0:
+        return key[2]
+    m = LEADING_NUM_RE.match(text or "")
+    return int(m.group(1)) if m else -1
+
+
+def pair_confidence(src_num, src_len, tgt_num, tgt_padas) -> np.ndarray:
+    """(n_src, n_tgt) confidence matrix; numbers are -1 when unknown."""
+    src_num = np.asarray(src_num, dtype=np.int64)
+    tgt_num = np.asarray(tgt_num, dtype=np.int64)
+    src_share = np.maximum(np.asarray(src_len, dtype=np.float64), 1.0)
+    tgt_share = np.maximum(np.asarray(tgt_padas, dtype=np.float64), 1.0)
+    src_share /= src_share.sum()
+    tgt_share /= tgt_share.sum()
+    a = src_share[:, None]
+    b = tgt_share[None, :]
+    length = np.minimum(a, b) / np.maximum(a, b)
+    if len(src_share) == 1 or len(tgt_share) == 1:
+        length[:] = 0.5  # shares of a one-item side carry no information
+
+    known = (src_num[:, None] >= 0) & (tgt_num[None, :] >= 0)
+    numbering = np.where(known, (src_num[:, None] == tgt_num[None, :]).astype(np.float64), 0.5)
+    return 0.5 * length + 0.5 * numbering
+
+
+def align(conf: np.ndarray, gap: float = GAP_PENALTY, band: Optional[int] = None) -> List[Tuple[int, int, float]]:
+    """Banded global alignment over a confidence matrix. Returns [(src_i, tgt_j, confidence)] in order."""
+    n, m = conf.shape
+    if n == 0 or m == 0:
+        return []
+    if band is None:
+        band = abs(n - m) + BAND_SLACK
+    score = conf - 0.5
+    H = np.full((n + 1, m + 1), -np.inf)
+    back = np.zeros((n + 1, m + 1), dtype=np.int8)  # 1 diag, 2 skip src, 3 skip tgt
+    H[0, :min(m, band) + 1] = -gap * np.arange(min(m, band) + 1)
+    back[0, 1:] = 3
+    H[:min(n, band) + 1, 0] = -gap * np.arange(min(n, band) + 1)
+    back[1:, 0] = 2
+    for i in range(1, n + 1):
+        centre = i * m / n
+        lo = max(1, int(centre) - band)
+        hi = min(m, int(centre) + band + 1)
+        js = np.arange(lo, hi + 1)
+        prev = H[i - 1]
+        diag = prev[js - 1] + score[i - 1, js - 1]
+        up = prev[js] - gap
+        take_up = up > diag - TIE_EPS  # ties favour gaps, so the backtrace pairs items as early as possible
+        cand = np.where(take_up, up, diag)
+        # Gaps along the row: H[i, j] = max over k <= j of cand[k] - gap * (j - k), seeded by H[i, lo - 1]
+        run = np.maximum.accumulate(np.concatenate(([H[i, lo - 1] + gap * (lo - 1)], cand + gap * js)))
+        H[i, lo:hi + 1] = run[1:] - gap * js
+        left = run[:-1] - gap * (js - 1) - gap
+        back[i, lo:hi + 1] = np.where(left > cand - TIE_EPS, 3, np.where(take_up, 2, 1))
+    # The band is centred on the diagonal, so (n, m) is always inside it.
+    pairs = []
+    i, j = n, m
+    while i > 0 and j > 0:
+        step = back[i, j]
+        if step == 1:
+            i -= 1
+            j -= 1
+            pairs.append((i, j, float(conf[i, j])))
+        elif step == 2:
+            i -= 1
+        else:
+            j -= 1
+    pairs.reverse()
+    return pairs
+
+
+def align_hymn(entries: Sequence[Tuple[Tuple[int, int, int], str]],
+               records: Sequence[Dict[str, Any]]) -> List[Tuple[int, int, float]]:
+    """Align a hymn's [((m,s,v), text)] entries to its records (both in verse order)."""
+    if not entries or not records:
+        return []
+    conf = pair_confidence(
+        [entry_number(k, t) for k, t in entries],
+        [len((t or "").split()) for _, t in entries],
+        [int(r.get('verse_index') or -1) for r in records],
+        [len(r.get('padas') or []) for r in records],
+    )
+    return align(conf)
+
+
+def main():
+    from merge_translations import index_dataset, load_jsonl, load_translations
+
+    p = argparse.ArgumentParser(description="Align translation entries to dataset verses per (mandala,sukta) and report confidences")
+    p.add_argument("--dataset", required=True, help="Dataset JSONL")
+    p.add_argument("--griffith", required=True, help="Translations CSV or JSONL")
+    p.add_argument("--out", default=None, help="Optional CSV of aligned pairs (default: summary only)")
+    p.add_argument("--min-confidence", type=float, default=0.0, help="Only write pairs below this confidence (0 = all)")
+    args = p.parse_args()
+
+    dataset = load_jsonl(args.dataset)
+    _, ms_index = index_dataset(dataset)
+    _, by_ms = load_translations(args.griffith)
+    n_pairs = n_gaps = 0
+    confs = []
+    rows = []
+    for ms, entries in by_ms.items():
+        entries = sorted(entries, key=lambda e: e[0][2] if e[0][2] > 0 else 1e9)
+        recs = [dataset[idx] for idx, _ in ms_index.get(ms, [])]
+        pairs = align_hymn(entries, recs)
+        n_pairs += len(pairs)
+        n_gaps += len(entries) + len(recs) - 2 * len(pairs)
+        for i, j, c in pairs:
+            confs.append(c)
+            if args.out and (not args.min_confidence or c < args.min_confidence):
+                rows.append([ms[0], ms[1], entries[i][0][2], recs[j].get('verse_index'), round(c, 3), entries[i][1][:80]])
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8', newline='') as fh:
+            w = csv.writer(fh)
+            w.writerow(['mandala', 'sukta', 'entry_verse', 'record_verse', 'confidence', 'translation_snip'])
+            w.writerows(rows)
+    mean = sum(confs) / len(confs) if confs else 0.0
+    print(f"{len(by_ms)} hymns: {n_pairs} pairs, {n_gaps} gaps, mean confidence {mean:.3f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()